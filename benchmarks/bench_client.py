@@ -0,0 +1,163 @@
+# Measures client throughput against the in-process mock DIMO services.
+#
+#   python benchmarks/bench_client.py [--requests N] [--concurrency C]
+#       [--latency MS] [--jitter MS] [--error-rate P] [--rows N]
+#       [scenario ...]
+#
+# Scenarios: rest (Valuations.get_valuations), telemetry (a signals() query),
+# identity (a vehicles query per owner), exchange (uncached token exchanges) and auth
+# (the full challenge/sign/submit flow). For each, prints requests/s, p50/p99
+# latency, traced memory per in-flight request and the worst event-loop lag
+# seen by a 1ms ticker while the requests ran. Failures after retries are
+# counted, not raised.
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+
+from mock_dimo import MockDimo, make_jwt
+
+from dimo import DIMO
+from dimo.concurrency import bounded_as_completed
+
+PRIVATE_KEY = "4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318"
+CLIENT_ID = "0x2c7536E3605D9C16a7a3D7b1898e529396a65c23"
+
+SIGNALS = """
+query Signals($tokenId: Int!) {
+    signals(tokenId: $tokenId, from: "2024-01-01T00:00:00Z",
+            to: "2024-01-02T00:00:00Z", interval: "1m") {
+        timestamp
+        speed(agg: MAX)
+        powertrainRange(agg: MIN)
+    }
+}
+"""
+
+VEHICLES = """
+query Vehicles($owner: Address!) {
+    vehicles(first: 100, filterBy: {owner: $owner}) {
+        nodes { tokenId owner definition { make model year } }
+        pageInfo { hasNextPage endCursor }
+    }
+}
+"""
+
+VEHICLE_JWT = make_jwt({"sub": "1", "exp": time.time() + 86400})
+DEVELOPER_JWT = make_jwt({"sub": "developer", "exp": time.time() + 86400})
+
+
+def scenarios(dimo):
+    return {
+        "rest": lambda index: dimo.valuations.get_valuations(VEHICLE_JWT, index),
+        "telemetry": lambda index: dimo.telemetry.query(
+            SIGNALS, VEHICLE_JWT, variables={"tokenId": index}
+        ),
+        # One owner per request, so no two queries are identical
+        "identity": lambda index: dimo.query(
+            "Identity", VEHICLES, variables={"owner": f"0x{index:040x}"}
+        ),
+        "exchange": lambda index: dimo.token_exchange.exchange(
+            DEVELOPER_JWT, [1], index, use_cache=False
+        ),
+        "auth": lambda index: dimo.auth.get_token(
+            CLIENT_ID, "https://example.com", PRIVATE_KEY
+        ),
+    }
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(call, requests, concurrency):
+    latencies = []
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    async def timed(index):
+        started = time.perf_counter()
+        try:
+            await call(index)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    task = asyncio.ensure_future(ticker())
+    errors = 0
+    started = time.perf_counter()
+    async for _, _, error in bounded_as_completed(timed, range(requests), concurrency):
+        errors += error is not None
+    elapsed = time.perf_counter() - started
+    done.set()
+    await task
+    return elapsed, latencies, errors, max(lags, default=0.0)
+
+
+# Traced memory held by the in-flight requests, per request
+async def memory_per_request(call, requests, concurrency):
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        await run(call, requests, concurrency)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return (peak - baseline) / min(requests, concurrency)
+
+
+async def main(options):
+    server = MockDimo(
+        latency=options.latency / 1000,
+        jitter=options.jitter / 1000,
+        error_rate=options.error_rate,
+        rows=options.rows,
+    )
+    async with DIMO(transport=server.transport()) as dimo:
+        available = scenarios(dimo)
+        for name in options.scenarios or available:
+            call = available.get(name)
+            if call is None:
+                raise SystemExit(
+                    f"Unknown scenario {name!r}, pick from {list(available)}"
+                )
+            # Warms pools, caches and lazily loaded modules
+            await run(call, min(options.concurrency, options.requests), 1)
+            elapsed, latencies, errors, lag = await run(
+                call, options.requests, options.concurrency
+            )
+            memory = await memory_per_request(
+                call, max(1, options.requests // 10), options.concurrency
+            )
+            print(
+                f"{name:>9}: {options.requests / elapsed:9.1f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+                f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms  "
+                f"{memory / 1024:7.1f} KiB/req  "
+                f"max loop lag {lag * 1000:6.2f} ms  "
+                f"errors {errors}"
+            )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scenarios", nargs="*", help="default: all")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=5.0, help="milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rows", type=int, default=100, help="payload list size")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args(sys.argv[1:])))
@@ -0,0 +1,49 @@
+# Measures the cold-start cost of importing the SDK.
+#
+#   python benchmarks/bench_import.py [runs]
+#
+# Every scenario runs in a fresh interpreter; the median wall time of the
+# statement is reported next to the modules it loaded that are expensive
+# (eth_account for signing, graphql-core for batching and validation).
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    "import dimo": "import dimo",
+    "DIMO()": "import dimo; dimo.DIMO()",
+    "telemetry only": "import dimo; dimo.DIMO().telemetry",
+    "auth + signer": "import dimo; dimo.DIMO().auth.signer",
+    "eager equivalent": "import dimo, eth_account, graphql, dimo.api, dimo.graphql",
+}
+
+HEAVY = ("eth_account", "graphql")
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run(statement):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(statement=statement, heavy=HEAVY)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else "-"
+
+
+def main(runs):
+    for name, statement in SCENARIOS.items():
+        results = [run(statement) for _ in range(runs)]
+        median = statistics.median(elapsed for elapsed, _ in results)
+        print(f"{name:>16}: {median * 1000:7.1f} ms  loads: {results[0][1]}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
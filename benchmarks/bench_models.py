@@ -0,0 +1,89 @@
+# Measures the memory and decode time of dimo.models against plain dicts.
+#
+#   python benchmarks/bench_models.py [responses]
+#
+# Decodes `responses` signalsLatest bodies and Trips pages (20 trips each) and
+# keeps every result resident, as a fleet-wide job would. For each shape,
+# prints the decode time per response and the traced memory per response for
+# orjson dicts, compact records and records with lazy sub-trees.
+import sys
+import time
+import tracemalloc
+
+import orjson
+
+from dimo.models import decode
+
+SIGNAL = {"timestamp": "2024-01-01T00:00:00Z", "value": 0.0}
+
+
+def latest_body(index):
+    signals = {
+        "powertrainTransmissionTravelledDistance": {**SIGNAL, "value": index * 1.5},
+        "exteriorAirTemperature": {**SIGNAL, "value": 18.5},
+        "speed": {**SIGNAL, "value": float(index % 120)},
+        "powertrainType": {**SIGNAL, "value": "COMBUSTION"},
+    }
+    return orjson.dumps({"data": {"signalsLatest": signals}})
+
+
+def trips_body(index):
+    def point(hour):
+        location = {"latitude": 52.52 + index / 1e4, "longitude": 13.405}
+        return {
+            "time": f"2024-01-01T{hour:02d}:00:00Z",
+            "location": location,
+            "estimatedLocation": dict(location),
+        }
+
+    trips = [
+        {
+            "id": f"trip-{index}-{trip}",
+            "start": point(trip),
+            "end": point(trip + 1),
+            "droppedData": False,
+        }
+        for trip in range(20)
+    ]
+    return orjson.dumps({"trips": trips, "currentPage": 1, "totalPages": 3})
+
+
+DECODERS = {
+    "dict": orjson.loads,
+    "records": decode,
+    "lazy": lambda body: decode(body, lazy=("start", "end")),
+}
+
+
+def measure(bodies, decoder):
+    started = time.perf_counter()
+    for body in bodies:
+        decoder(body)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        resident = [decoder(body) for body in bodies]
+        memory = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del resident
+    return elapsed / len(bodies), memory / len(bodies)
+
+
+def main(responses):
+    for shape, build in (("signalsLatest", latest_body), ("trips", trips_body)):
+        bodies = [build(index) for index in range(responses)]
+        for name, decoder in DECODERS.items():
+            if shape == "signalsLatest" and name == "lazy":
+                continue
+            seconds, memory = measure(bodies, decoder)
+            print(
+                f"{shape:>13} {name:>7}: {seconds * 1e6:8.2f} us/response  "
+                f"{memory / 1024:7.2f} KiB/response"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
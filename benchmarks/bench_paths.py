@@ -0,0 +1,57 @@
+# Measures endpoint path construction.
+#
+#   python benchmarks/bench_paths.py [calls]
+#
+# Compares the previous per-call re.sub substitution with precompiled
+# endpoint templates; the target is well above 100k paths/s.
+import re
+import sys
+import time
+
+from dimo.endpoints import VALUATIONS_GET_VALUATIONS, compile_path
+from dimo.environments import dimo_environment
+
+BASE = dimo_environment["Production"]["Valuations"]
+PATH = "/v2/vehicles/:token_id/valuations"
+
+
+def regex_path(token_id):
+    # Previous behaviour of DIMO._get_full_path
+    full_path = f"{BASE}{PATH}"
+    for key, value in {"token_id": token_id}.items():
+        full_path = re.sub(f":{key}", str(value), full_path)
+    return full_path
+
+
+# Joined as DIMO._get_full_path does
+def template_path(token_id):
+    return BASE + compile_path(PATH).format({"token_id": token_id})
+
+
+def endpoint_path(token_id):
+    return BASE + VALUATIONS_GET_VALUATIONS.format(token_id=token_id)
+
+
+# Best of `rounds` runs, to keep scheduler noise out of the result
+def measure(build, calls, rounds=5):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for token_id in range(calls):
+            build(token_id)
+        best = min(best, time.perf_counter() - started)
+    return calls / best
+
+
+def main(calls):
+    assert regex_path(7) == template_path(7) == endpoint_path(7)
+    for name, build in (
+        ("re.sub", regex_path),
+        ("template", template_path),
+        ("endpoint", endpoint_path),
+    ):
+        print(f"{name:>9}: {measure(build, calls):12,.0f} paths/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,59 @@
+# Measures how long challenge signing blocks the event loop.
+#
+#   python benchmarks/bench_signer.py [rounds]
+#
+# A ticker coroutine sleeps 1ms in a loop and records how late it wakes up;
+# the worst lateness is the longest stretch the loop was blocked.
+import asyncio
+import sys
+import time
+
+from dimo.eth_signer import EthSigner, _load_account
+
+PRIVATE_KEY = "4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318"
+
+
+async def measure(sign, rounds):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    for index in range(rounds):
+        await sign(f"challenge {index}")
+        # Let the ticker run between signatures so lag reflects a single call
+        await asyncio.sleep(0.002)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await task
+    return elapsed, max(lags)
+
+
+async def main(rounds):
+    async def blocking(message):
+        # Previous behaviour: parse the key and sign inline on the loop
+        _load_account.cache_clear()
+        EthSigner.sign_message(message, PRIVATE_KEY)
+
+    signer = EthSigner()
+
+    async def offloaded(message):
+        await signer.sign(message, PRIVATE_KEY)
+
+    for name, sign in (("inline", blocking), ("executor", offloaded)):
+        elapsed, worst = await measure(sign, rounds)
+        print(
+            f"{name:>9}: {rounds / elapsed:8.1f} calls/s, "
+            f"max loop lag {worst * 1000:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
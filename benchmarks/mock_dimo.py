@@ -0,0 +1,117 @@
+# In-process mock of the DIMO services for benchmarks, served through an
+# httpx transport so no sockets or network are involved:
+#
+#   server = MockDimo(latency=0.02, error_rate=0.01, rows=500)
+#   dimo = DIMO(transport=server.transport())
+#
+# Auth answers the challenge flow, TokenExchange issues vehicle JWTs, Identity
+# and Telemetry answer any query with `rows` list elements, and the remaining
+# REST services return an object of about `rows` fields. Each request waits
+# `latency` seconds (plus up to `jitter`) and fails with a 503 with probability
+# `error_rate`.
+import asyncio
+import base64
+import random
+import time
+from collections import Counter
+
+import httpx
+import orjson
+
+
+def make_jwt(claims: dict) -> str:
+    def encode(value):
+        return base64.urlsafe_b64encode(orjson.dumps(value)).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+class MockDimo:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rows: int = 10,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rows = rows
+        self.requests = Counter()
+        self._random = random.Random(seed)
+        self._signals = None
+        self._vehicles = None
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        return httpx.MockTransport(self.handle)
+
+    def _service(self, host: str) -> str:
+        name = host.split(".")[0]
+        return {
+            "auth": "Auth",
+            "token-exchange-api": "TokenExchange",
+            "identity-api": "Identity",
+            "telemetry-api": "Telemetry",
+        }.get(name, name)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        service = self._service(request.url.host)
+        self.requests[service] += 1
+        delay = self.latency + self._random.random() * self.jitter
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return httpx.Response(503, json={"message": "unavailable"})
+
+        if service == "Auth":
+            return self._auth(request)
+        if service == "TokenExchange":
+            token_id = orjson.loads(request.content)["tokenId"]
+            claims = {"sub": str(token_id), "exp": time.time() + 600}
+            return httpx.Response(200, json={"token": make_jwt(claims)})
+        if service == "Telemetry":
+            return httpx.Response(200, content=self._signals_body())
+        if service == "Identity":
+            return httpx.Response(200, content=self._vehicles_body())
+        body = {f"field{index}": index * 1.5 for index in range(self.rows)}
+        return httpx.Response(200, json=body)
+
+    def _auth(self, request):
+        if request.url.path.endswith("generate_challenge"):
+            return httpx.Response(
+                200, json={"state": "state", "challenge": "sign this challenge"}
+            )
+        claims = {"iss": "mock", "sub": "developer", "exp": time.time() + 3600}
+        return httpx.Response(200, json={"access_token": make_jwt(claims)})
+
+    # Response bodies are built once per server and reused
+    def _signals_body(self):
+        if self._signals is None:
+            signals = [
+                {
+                    "timestamp": f"2024-01-01T{index // 3600 % 24:02d}:"
+                    f"{index // 60 % 60:02d}:{index % 60:02d}Z",
+                    "speed": 10.0 + index % 90,
+                    "powertrainRange": 400.0 - index % 300,
+                }
+                for index in range(self.rows)
+            ]
+            self._signals = orjson.dumps({"data": {"signals": signals}})
+        return self._signals
+
+    def _vehicles_body(self):
+        if self._vehicles is None:
+            nodes = [
+                {
+                    "tokenId": index,
+                    "owner": f"0x{index:040x}",
+                    "definition": {"make": "Make", "model": "Model", "year": 2020},
+                }
+                for index in range(self.rows)
+            ]
+            page = {"hasNextPage": False, "endCursor": None}
+            body = {"data": {"vehicles": {"nodes": nodes, "pageInfo": page}}}
+            self._vehicles = orjson.dumps(body)
+        return self._vehicles
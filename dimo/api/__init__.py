@@ -1,9 +1,4 @@
-from .auth import Auth
-from .attestation import Attestation
-from .device_definitions import DeviceDefinitions
-from .token_exchange import TokenExchange
-from .trips import Trips
-from .valuations import Valuations
+from importlib import import_module
 
 __all__ = [
     "Auth",
@@ -13,3 +8,22 @@ __all__ = [
     "Trips",
     "Valuations",
 ]
+
+_LAZY = {
+    "Auth": ".auth",
+    "Attestation": ".attestation",
+    "DeviceDefinitions": ".device_definitions",
+    "TokenExchange": ".token_exchange",
+    "Trips": ".trips",
+    "Valuations": ".valuations",
+}
+
+
+# PEP 562: each client module loads on first access
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,3 +1,4 @@
+from dimo.endpoints import ATTESTATION_POM_VC, ATTESTATION_VIN_VC
 from dimo.errors import check_type
 
 
@@ -10,11 +11,11 @@ class Attestation:
         check_type("vehicle_jwt", vehicle_jwt, str)
         check_type("token_id", token_id, int)
         params = {"force": True}
-        url = f"/v1/vc/vin/{token_id}"
+        endpoint = ATTESTATION_VIN_VC
         return await self._request(
-            "POST",
-            "Attestation",
-            url,
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(token_id=token_id),
             params=params,
             headers=self._get_auth_headers(vehicle_jwt),
         )
@@ -22,7 +23,10 @@ class Attestation:
     async def create_pom_vc(self, vehicle_jwt: str, token_id: int) -> dict:
         check_type("vehicle_jwt", vehicle_jwt, str)
         check_type("token_id", token_id, int)
-        url = f"/v1/vc/pom/{token_id}"
+        endpoint = ATTESTATION_POM_VC
         return await self._request(
-            "POST", "Attestation", url, headers=self._get_auth_headers(vehicle_jwt)
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(token_id=token_id),
+            headers=self._get_auth_headers(vehicle_jwt),
         )
@@ -1,14 +1,33 @@
-from dimo.eth_signer import EthSigner
+from dimo.endpoints import AUTH_GENERATE_CHALLENGE, AUTH_SUBMIT_CHALLENGE
 from dimo.errors import check_type, check_optional_type
+from dimo.tokens import DeveloperTokenManager
 from urllib.parse import urlencode
 from typing import Dict, Optional
 
 
 class Auth:
-    def __init__(self, request_method, get_auth_headers, env):
+    def __init__(self, request_method, get_auth_headers, env, signer=None, hooks=None):
         self._request = request_method
         self._get_auth_headers = get_auth_headers
         self.env = env
+        self._signer = signer
+        self.tokens = DeveloperTokenManager(
+            lambda **kwargs: self.get_token(**kwargs), hooks=hooks
+        )
+
+    # The default EthSigner, and eth_account behind it, is only imported once a
+    # challenge is signed
+    @property
+    def signer(self):
+        if self._signer is None:
+            from dimo.eth_signer import EthSigner
+
+            self._signer = EthSigner()
+        return self._signer
+
+    @signer.setter
+    def signer(self, signer):
+        self._signer = signer
 
     async def generate_challenge(
         self,
@@ -39,10 +58,11 @@ class Auth:
             "address": address,
         }
 
+        endpoint = AUTH_GENERATE_CHALLENGE
         return await self._request(
-            "POST",
-            "Auth",
-            "/auth/web3/generate_challenge",
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(),
             data=urlencode(body),
             headers=headers,
         )
@@ -50,6 +70,7 @@ class Auth:
     def sign_challenge(self, message: str, private_key: str) -> str:
         check_type("message", message, str)
         check_type("private_key", private_key, str)
+        from dimo.eth_signer import EthSigner
 
         return EthSigner.sign_message(message, private_key)
 
@@ -86,10 +107,11 @@ class Auth:
 
         encoded_data = urlencode(form_data)
 
+        endpoint = AUTH_SUBMIT_CHALLENGE
         return await self._request(
-            "POST",
-            "Auth",
-            "/auth/web3/submit_challenge",
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(),
             data=encoded_data,
             headers=headers,
         )
@@ -123,10 +145,8 @@ class Auth:
             address=address,
         )
 
-        sign = self.sign_challenge(
-            message=challenge["challenge"],
-            private_key=private_key,
-        )
+        # Signed off the event loop (or by a pluggable external signer)
+        sign = await self.signer.sign(challenge["challenge"], private_key)
 
         state = challenge["state"]
         signature = sign
@@ -135,3 +155,27 @@ class Auth:
             client_id, domain, state, signature, headers
         )
         return submit
+
+    # Same as get_token, but reuses a cached developer JWT until shortly before it expires
+    async def get_cached_token(
+        self,
+        client_id: str,
+        domain: str,
+        private_key: str,
+        address: Optional[str] = None,
+        scope="openid email",
+        response_type="code",
+    ) -> Dict:
+        check_type("client_id", client_id, str)
+        check_type("domain", domain, str)
+        check_type("private_key", private_key, str)
+        check_optional_type("address", address, str)
+
+        return await self.tokens.get(
+            client_id=client_id,
+            domain=domain,
+            private_key=private_key,
+            address=address,
+            scope=scope,
+            response_type=response_type,
+        )
@@ -1,32 +1,87 @@
+from typing import NamedTuple, Optional
+
+from dimo.concurrency import bounded_as_completed
+from dimo.endpoints import (
+    DEVICE_DEFINITIONS_DECODE_VIN,
+    DEVICE_DEFINITIONS_SEARCH,
+)
 from dimo.errors import check_type
 from dimo.errors import check_optional_type
 
 
+class DecodeResult(NamedTuple):
+    vin: str
+    response: Optional[dict]
+    error: Optional[BaseException]
+
+
 class DeviceDefinitions:
 
-    def __init__(self, request_method, get_auth_headers):
+    # Set vin_cache to a dimo.vin_cache.VinDecodeCache to reuse VIN decodes
+    # across calls and processes
+    def __init__(self, request_method, get_auth_headers, vin_cache=None):
         self._request = request_method
         self._get_auth_headers = get_auth_headers
+        self.vin_cache = vin_cache
 
-    async def decode_vin(self, developer_jwt: str, country_code: str, vin: str) -> dict:
+    async def decode_vin(
+        self,
+        developer_jwt: str,
+        country_code: str,
+        vin: str,
+        use_cache: bool = True,
+    ) -> dict:
         check_type("developer_jwt", developer_jwt, str)
         check_type("country_code", country_code, str)
         check_type("vin", vin, str)
+        if use_cache and self.vin_cache is not None:
+            return await self.vin_cache.get_or_fetch(
+                country_code,
+                vin,
+                lambda: self._decode_vin(developer_jwt, country_code, vin),
+            )
+        return await self._decode_vin(developer_jwt, country_code, vin)
+
+    async def _decode_vin(self, developer_jwt, country_code, vin):
         body = {
             "countryCode": country_code,
             "vin": vin,
         }
         headers = self._get_auth_headers(developer_jwt)
         headers["Content-Type"] = "application/json"
+        endpoint = DEVICE_DEFINITIONS_DECODE_VIN
         response = await self._request(
-            "POST",
-            "DeviceDefinitions",
-            "/device-definitions/decode-vin",
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(),
             headers=headers,
             data=body,
         )
         return response
 
+    # Decodes many VINs with at most `concurrency` requests in flight and yields a
+    # DecodeResult per VIN in completion order. With a vin_cache only misses reach
+    # the network; a failing VIN is reported in its result instead of aborting.
+    async def decode_vins(
+        self,
+        developer_jwt: str,
+        country_code: str,
+        vins,
+        concurrency: int = 10,
+        use_cache: bool = True,
+    ):
+        check_type("developer_jwt", developer_jwt, str)
+        check_type("country_code", country_code, str)
+        check_type("concurrency", concurrency, int)
+
+        async def decode_one(vin):
+            return await self.decode_vin(developer_jwt, country_code, vin, use_cache)
+
+        async for vin, response, error in bounded_as_completed(
+            decode_one, vins, concurrency
+        ):
+            yield DecodeResult(vin, response, error)
+
     async def search_device_definitions(
         self,
         query=None,
@@ -50,10 +105,11 @@ class DeviceDefinitions:
             "page": page,
             "pageSize": page_size,
         }
+        endpoint = DEVICE_DEFINITIONS_SEARCH
         response = await self._request(
-            "GET",
-            "DeviceDefinitions",
-            "/device-definitions/search",
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(),
             params=params,
         )
         return response
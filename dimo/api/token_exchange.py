@@ -1,33 +1,112 @@
+from typing import NamedTuple, Optional
+
+from dimo.concurrency import bounded_as_completed
 from dimo.constants import dimo_constants
-from dimo.errors import check_type
+from dimo.endpoints import TOKEN_EXCHANGE_EXCHANGE
+from dimo.errors import check_type, check_optional_type
+from dimo.ratelimit import TokenBucket
+from dimo.retry import RetryPolicy
+from dimo.tokens import VehicleTokenCache
+
+
+class ExchangeResult(NamedTuple):
+    token_id: int
+    response: Optional[dict]
+    error: Optional[BaseException]
 
 
 class TokenExchange:
 
-    def __init__(self, request_method, get_auth_headers):
+    def __init__(self, request_method, get_auth_headers, cache=None, hooks=None):
         self._request = request_method
         self._get_auth_headers = get_auth_headers
+        self.cache = cache if cache is not None else VehicleTokenCache(hooks=hooks)
 
+    # Vehicle JWTs are reused from the cache until shortly before they expire;
+    # pass use_cache=False to always request a fresh one. `retry_policy`
+    # replaces the client's RetryPolicy for the request, and the optional
+    # TokenBucket `limiter` is only waited on when a request is actually sent.
     async def exchange(
         self,
         developer_jwt: str,
         privileges: list,
         token_id: int,
         env: str = "Production",
+        use_cache: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        limiter: Optional[TokenBucket] = None,
     ) -> dict:
         check_type("developer_jwt", developer_jwt, str)
         check_type("privileges", privileges, list)
         check_type("token_id", token_id, int)
+
+        async def fetch():
+            if limiter is not None:
+                await limiter.acquire()
+            return await self._exchange(
+                developer_jwt, privileges, token_id, env, retry_policy
+            )
+
+        if not use_cache:
+            return await fetch()
+        return await self.cache.get_or_fetch(
+            developer_jwt, token_id, privileges, env, fetch
+        )
+
+    async def _exchange(self, developer_jwt, privileges, token_id, env, retry_policy):
+        options = {} if retry_policy is None else {"retry_policy": retry_policy}
         body = {
             "nftContractAddress": dimo_constants[env]["NFT_address"],
             "privileges": privileges,
             "tokenId": token_id,
         }
+        endpoint = TOKEN_EXCHANGE_EXCHANGE
         response = await self._request(
-            "POST",
-            "TokenExchange",
-            "/v1/tokens/exchange",
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(),
             headers=self._get_auth_headers(developer_jwt),
             data=body,
+            **options,
         )
         return response
+
+    # Exchanges vehicle JWTs for many token IDs with at most `concurrency` requests in
+    # flight and an optional `rate` limit (requests per second). Results are yielded
+    # as they complete; transient failures are retried and a failing token is
+    # reported in its ExchangeResult instead of aborting the batch.
+    async def exchange_many(
+        self,
+        developer_jwt: str,
+        token_ids,
+        privileges: list,
+        concurrency: int = 10,
+        rate: Optional[float] = None,
+        retries: int = 2,
+        backoff: float = 0.5,
+        env: str = "Production",
+        use_cache: bool = True,
+    ):
+        check_type("developer_jwt", developer_jwt, str)
+        check_type("privileges", privileges, list)
+        check_type("concurrency", concurrency, int)
+        check_optional_type("rate", rate, (int, float))
+        check_type("retries", retries, int)
+        limiter = TokenBucket(rate, burst=concurrency) if rate else None
+        policy = RetryPolicy(max_attempts=retries + 1, backoff_base=backoff)
+
+        async def exchange_one(token_id):
+            return await self.exchange(
+                developer_jwt,
+                privileges,
+                token_id,
+                env,
+                use_cache,
+                retry_policy=policy,
+                limiter=limiter,
+            )
+
+        async for token_id, response, error in bounded_as_completed(
+            exchange_one, token_ids, concurrency
+        ):
+            yield ExchangeResult(token_id, response, error)
@@ -1,4 +1,6 @@
+from dimo.endpoints import TRIPS_TRIPS
 from dimo.errors import check_type
+from dimo.models import compact
 
 
 class Trips:
@@ -7,17 +9,22 @@ class Trips:
         self._request = request_method
         self._get_auth_headers = get_auth_headers
 
-    async def trips(self, vehicle_jwt: str, token_id: int, page=None) -> dict:
+    # typed=True returns dimo.models records; keys in `lazy` (e.g. "end") are
+    # kept as JSON bytes until they are read
+    async def trips(
+        self, vehicle_jwt: str, token_id: int, page=None, typed=False, lazy=()
+    ):
         check_type("vehicle_jwt", vehicle_jwt, str)
         check_type("token_id", token_id, int)
         params = {}
         if page is not None:
             params["page"] = [page]
-        url = f"/v1/vehicle/{token_id}/trips"
-        return await self._request(
-            "GET",
-            "Trips",
-            url,
+        endpoint = TRIPS_TRIPS
+        response = await self._request(
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(token_id=token_id),
             params=params,
             headers=self._get_auth_headers(vehicle_jwt),
         )
+        return compact(response, lazy) if typed else response
@@ -1,3 +1,8 @@
+from dimo.endpoints import (
+    VALUATIONS_GET_VALUATIONS,
+    VALUATIONS_LIST_VEHICLE_OFFERS,
+    VALUATIONS_OFFERS_LOOKUP,
+)
 from dimo.errors import check_type
 
 
@@ -9,23 +14,32 @@ class Valuations:
     async def get_valuations(self, vehicle_jwt: str, token_id: int) -> dict:
         check_type("vehicle_jwt", vehicle_jwt, str)
         check_type("token_id", token_id, int)
-        url = f"/v2/vehicles/{token_id}/valuations"
+        endpoint = VALUATIONS_GET_VALUATIONS
         return await self._request(
-            "GET", "Valuations", url, headers=self._get_auth_headers(vehicle_jwt)
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(token_id=token_id),
+            headers=self._get_auth_headers(vehicle_jwt),
         )
 
     async def offers_lookup(self, vehicle_jwt: str, token_id: int) -> None:
         check_type("vehicle_jwt", vehicle_jwt, str)
         check_type("token_id", token_id, int)
-        url = f"v2/vehicles/{token_id}/instant-offer"
+        endpoint = VALUATIONS_OFFERS_LOOKUP
         return await self._request(
-            "GET", "Valuations", url, headers=self._get_auth_headers(vehicle_jwt)
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(token_id=token_id),
+            headers=self._get_auth_headers(vehicle_jwt),
         )
 
     async def list_vehicle_offers(self, vehicle_jwt: str, token_id: int) -> dict:
         check_type("vehicle_jwt", vehicle_jwt, str)
         check_type("token_id", token_id, int)
-        url = f"/v2/vehicles/{token_id}/offers"
+        endpoint = VALUATIONS_LIST_VEHICLE_OFFERS
         return await self._request(
-            "GET", "Valuations", url, headers=self._get_auth_headers(vehicle_jwt)
+            endpoint.method,
+            endpoint.service,
+            endpoint.format(token_id=token_id),
+            headers=self._get_auth_headers(vehicle_jwt),
         )
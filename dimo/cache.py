@@ -0,0 +1,116 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+def _consume_result(task):
+    # Marks a failed background task's exception as retrieved
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    # Collapses concurrent calls for the same key into one in-flight task
+    def __init__(self):
+        self._inflight = {}
+        self._waiters = {}
+
+    def __contains__(self, key):
+        return key in self._inflight
+
+    def __len__(self):
+        return len(self._inflight)
+
+    # Starts func() for key unless a call is already in flight and returns the shared task
+    def start(self, key, func) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            task.add_done_callback(_consume_result)
+        return task
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    # Awaits the shared task; cancelling one waiter does not cancel the others
+    async def do(self, key, func):
+        return await asyncio.shield(self.start(key, func))
+
+    # Like do(), but the shared task is cancelled once all of its waiters have
+    # been cancelled, so abandoned calls do not keep running
+    async def join(self, key, func):
+        task = self.start(key, func)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1:
+                task.cancel()
+            raise
+        finally:
+            remaining = self._waiters.pop(task) - 1
+            if remaining:
+                self._waiters[task] = remaining
+
+    def cancel_all(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+
+
+class TTLCache:
+    # Size-bounded LRU mapping whose entries expire at a per-entry deadline
+    def __init__(self, maxsize: int = 1024, clock=time.time):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > self._clock()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, expires_at: float):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,101 @@
+from importlib import import_module
+
+from dimo.errors import DimoValueError
+
+RESULT_FORMATS = ("json", "records", "columns", "numpy", "arrow", "pandas")
+
+
+def _require(module, extra):
+    try:
+        return import_module(module)
+    except ImportError as error:
+        raise ImportError(
+            f"This result format requires {module}: "
+            f"pip install dimo-python-sdk[{extra}]"
+        ) from error
+
+
+def check_result_format(result_format: str):
+    if result_format not in RESULT_FORMATS:
+        raise DimoValueError(
+            f"result_format must be one of {RESULT_FORMATS}, got {result_format!r}"
+        )
+
+
+class ColumnBuilder:
+    # Collects rows into one list per field (struct-of-arrays). Rows can be
+    # appended while they stream in and are not kept; a field missing from a
+    # row is recorded as None.
+    def __init__(self):
+        self.columns = {}
+        self.length = 0
+
+    def append(self, row: dict):
+        columns = self.columns
+        for key, value in row.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * self.length
+            column.append(value)
+        self.length += 1
+        if len(row) != len(columns):
+            for column in columns.values():
+                if len(column) < self.length:
+                    column.append(None)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+        return self
+
+    def build(self, result_format: str = "columns"):
+        if result_format == "columns":
+            return self.columns
+        if result_format == "numpy":
+            return to_numpy(self.columns)
+        if result_format == "arrow":
+            return to_arrow(self.columns)
+        if result_format == "pandas":
+            return to_pandas(self.columns)
+        check_result_format(result_format)
+        raise DimoValueError("Use the plain query methods for JSON results")
+
+
+def _timestamps(np, values):
+    # DIMO timestamps are UTC with a trailing Z, which numpy does not accept
+    return np.array(
+        [value[:-1] if value and value[-1] == "Z" else value for value in values],
+        dtype="datetime64[ms]",
+    )
+
+
+def _values(np, values):
+    try:
+        return np.array(values, dtype="float64")
+    except (TypeError, ValueError):
+        return np.array(values, dtype=object)
+
+
+# Converts columns to NumPy arrays: "timestamp" becomes datetime64[ms], numeric
+# fields float64 (None as NaN) and anything else an object array
+def to_numpy(columns: dict) -> dict:
+    np = _require("numpy", "numpy")
+    return {
+        name: _timestamps(np, values) if name == "timestamp" else _values(np, values)
+        for name, values in columns.items()
+    }
+
+
+def to_arrow(columns: dict):
+    pa = _require("pyarrow", "arrow")
+    return pa.table(
+        {
+            name: pa.array(values, from_pandas=True)
+            for name, values in to_numpy(columns).items()
+        }
+    )
+
+
+def to_pandas(columns: dict):
+    pd = _require("pandas", "pandas")
+    return pd.DataFrame(to_numpy(columns))
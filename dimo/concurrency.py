@@ -0,0 +1,51 @@
+import asyncio
+
+
+async def _iterate(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+# Runs func(item) for every item with at most `concurrency` calls in flight and
+# yields (item, result, error) tuples in completion order. Items are pulled
+# lazily, so arbitrarily large (or async) iterables never materialise as tasks.
+# Closing the generator early cancels whatever is still running.
+async def bounded_as_completed(func, items, concurrency: int):
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    iterator = _iterate(items)
+    pending = {}
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    item = await anext(iterator)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending[asyncio.ensure_future(func(item))] = item
+
+            if not pending:
+                return
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item = pending.pop(task)
+                if task.cancelled():
+                    yield item, None, asyncio.CancelledError()
+                elif task.exception() is not None:
+                    yield item, None, task.exception()
+                else:
+                    yield item, task.result(), None
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await iterator.aclose()
@@ -1,62 +1,561 @@
-from .api.attestation import Attestation
-from .api.auth import Auth
-from .api.device_definitions import DeviceDefinitions
-from .api.token_exchange import TokenExchange
-from .api.trips import Trips
-from .api.valuations import Valuations
+from .cache import SingleFlight
+from .endpoints import compile_path
+from .errors import DimoGraphQLError
+from .graphql.persisted import (
+    PERSISTED_QUERY_NOT_SUPPORTED,
+    PersistedQueries,
+    persisted_error,
+    persisted_extensions,
+)
+from .hooks import Hooks
+from .metrics import graphql_operation, rest_operation
+from .ratelimit import ServiceRateLimiter
+from .response_cache import ResponseCache, response_key
+from .request import AsyncRequest, ClientPool
+from .retry import RetryPolicy
+from .environments import dimo_environment
+import asyncio
+import time
+from contextlib import aclosing
+from functools import cached_property
+from importlib import import_module
 
-from .graphql.identity import Identity
-from .graphql.telemetry import Telemetry
+import httpx
+import orjson
 
-from .request import AsyncRequest
-from .environments import dimo_environment
-import re
+# Methods whose concurrent identical calls are coalesced with coalesce_requests
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+_LAZY_CLIENTS = {
+    "Attestation": ".api.attestation",
+    "Auth": ".api.auth",
+    "DeviceDefinitions": ".api.device_definitions",
+    "TokenExchange": ".api.token_exchange",
+    "Trips": ".api.trips",
+    "Valuations": ".api.valuations",
+    "Identity": ".graphql.identity",
+    "Telemetry": ".graphql.telemetry",
+}
+
+
+# PEP 562: the client classes this module used to import eagerly stay
+# importable from here, loading on first access
+def __getattr__(name):
+    module = _LAZY_CLIENTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module, "dimo"), name)
 
 
 class DIMO:
-    def __init__(self, env="Production"):
+    def __init__(
+        self,
+        env="Production",
+        limits=None,
+        timeout=None,
+        http2=False,
+        transport=None,
+        signer=None,
+        retry_policy=None,
+        rate_limits=None,
+        hooks=None,
+        response_cache=None,
+        persisted_queries=None,
+        schema_cache=None,
+        coalesce_requests=False,
+    ):
         self.env = env
+        # Event hooks for instrumentation, see dimo.hooks and dimo.metrics
+        self.hooks = hooks if hooks is not None else Hooks()
+        # Opt-in caching of read-mostly responses; True uses an in-memory
+        # ResponseCache with the default per-operation TTLs
+        if response_cache is True:
+            response_cache = ResponseCache()
+        self.response_cache = response_cache or None
+        # Automatic persisted queries for GraphQL; True sends hashes over POST,
+        # PersistedQueries(use_get=True) also allows GET
+        if persisted_queries is True:
+            persisted_queries = PersistedQueries()
+        self.persisted_queries = persisted_queries or None
+        # Client-side validation of GraphQL queries against introspected schemas;
+        # True keeps them in memory, SchemaCache(path=...) also on disk
+        if schema_cache is True:
+            from .graphql.schema import SchemaCache
+
+            schema_cache = SchemaCache()
+        self.schema_cache = schema_cache or None
         self.urls = dimo_environment[env]
-        self.attestation = Attestation(self.request, self._get_auth_headers)
-        self.auth = Auth(self.request, self._get_auth_headers, self.env)
-        self.device_definitions = DeviceDefinitions(
-            self.request, self._get_auth_headers
+        # One pooled AsyncClient per service host, shared by every sub-client
+        self._pool = ClientPool(
+            limits=limits, timeout=timeout, http2=http2, transport=transport
         )
-        self.token_exchange = TokenExchange(self.request, self._get_auth_headers)
-        self.trips = Trips(self.request, self._get_auth_headers)
-        self.valuations = Valuations(self.request, self._get_auth_headers)
-        self.identity = Identity(self)
-        self.telemetry = Telemetry(self)
+        # Use RetryPolicy(max_attempts=1) to disable retries
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        # Per-service request rates, e.g. {"Telemetry": 20}; a ServiceRateLimiter
+        # may be passed to share one budget between several DIMO instances
+        if isinstance(rate_limits, ServiceRateLimiter):
+            self.rate_limiter = rate_limits
+        else:
+            self.rate_limiter = ServiceRateLimiter(rate_limits)
+        # Opt-in: identical reads in flight at the same time share one request
+        # (and one response object, which callers must not mutate)
+        self.coalesce_requests = coalesce_requests
+        self._inflight = SingleFlight()
+        self._signer = signer
         self._session = AsyncRequest
 
+    # Sub-clients are created, and their modules imported, on first access, so
+    # e.g. a process that only queries Telemetry never loads eth_account
+    @cached_property
+    def attestation(self):
+        from .api.attestation import Attestation
+
+        return Attestation(self.request, self._get_auth_headers)
+
+    @cached_property
+    def auth(self):
+        from .api.auth import Auth
+
+        return Auth(
+            self.request,
+            self._get_auth_headers,
+            self.env,
+            signer=self._signer,
+            hooks=self.hooks,
+        )
+
+    @cached_property
+    def device_definitions(self):
+        from .api.device_definitions import DeviceDefinitions
+
+        return DeviceDefinitions(self.request, self._get_auth_headers)
+
+    @cached_property
+    def token_exchange(self):
+        from .api.token_exchange import TokenExchange
+
+        return TokenExchange(self.request, self._get_auth_headers, hooks=self.hooks)
+
+    @cached_property
+    def trips(self):
+        from .api.trips import Trips
+
+        return Trips(self.request, self._get_auth_headers)
+
+    @cached_property
+    def valuations(self):
+        from .api.valuations import Valuations
+
+        return Valuations(self.request, self._get_auth_headers)
+
+    @cached_property
+    def identity(self):
+        from .graphql.identity import Identity
+
+        return Identity(self)
+
+    @cached_property
+    def telemetry(self):
+        from .graphql.telemetry import Telemetry
+
+        return Telemetry(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    # Closes all pooled connections; the instance may be reused afterwards
+    async def aclose(self):
+        await self._pool.aclose()
+
     # Creates a full path for endpoints combining DIMO service, specific endpoint, and optional params
     def _get_full_path(self, service, path, params=None):
-        base_path = self.urls[service]
-        full_path = f"{base_path}{path}"
-
         if params:
-            for key, value in params.items():
-                pattern = f":{key}"
-                full_path = re.sub(pattern, str(value), full_path)
-        return full_path
+            path = compile_path(path).format(params, strict=False)
+        return self.urls[service] + path
 
     # Sets headers based on access_token or privileged_token
     def _get_auth_headers(self, token):
         return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
     # request method for HTTP requests for the REST API
-    async def request(self, http_method, service, path, **kwargs):
+    # Transient failures are retried according to retry_policy (the client's
+    # unless one is passed for this call); pass idempotent=True or False to
+    # override whether repeating the request is safe
+    # Idempotent reads of operations with a TTL are served from response_cache
+    # Concurrent identical reads (GET/HEAD and GraphQL queries with
+    # coalesce_requests, or per call with coalesce=True/False) are sent once
+    # and share the response
+    async def request(
+        self,
+        http_method,
+        service,
+        path,
+        idempotent=None,
+        operation=None,
+        coalesce=None,
+        retry_policy=None,
+        **kwargs,
+    ):
+        if idempotent is None:
+            idempotent = self.retry_policy.is_idempotent(http_method, service, path)
+        if coalesce is None:
+            coalesce = (
+                self.coalesce_requests
+                and idempotent
+                and http_method.upper() in READ_METHODS
+            )
+        cache = self.response_cache
+        if operation is None and (self.hooks or cache is not None):
+            endpoint = getattr(path, "endpoint", None)
+            if endpoint is not None:
+                operation = endpoint.name
+            else:
+                operation = rest_operation(http_method, path)
+
+        if cache is not None and idempotent:
+            ttl = cache.ttl(operation)
+            if ttl is not None:
+                return await cache.get_or_fetch(
+                    response_key(service, path, kwargs),
+                    ttl,
+                    lambda: self._send(
+                        http_method,
+                        service,
+                        path,
+                        idempotent,
+                        operation,
+                        kwargs,
+                        retry_policy,
+                    ),
+                    hooks=self.hooks,
+                )
+        if coalesce:
+            key = response_key(service, path, kwargs)
+            if key in self._inflight and self.hooks:
+                self.hooks.emit("cache_hit", cache="inflight")
+            return await self._inflight.join(
+                key,
+                lambda: self._send(
+                    http_method,
+                    service,
+                    path,
+                    idempotent,
+                    operation,
+                    kwargs,
+                    retry_policy,
+                ),
+            )
+        return await self._send(
+            http_method, service, path, idempotent, operation, kwargs, retry_policy
+        )
+
+    async def _send(
+        self,
+        http_method,
+        service,
+        path,
+        idempotent,
+        operation,
+        kwargs,
+        retry_policy=None,
+    ):
         full_path = self._get_full_path(service, path)
-        async_request = AsyncRequest(http_method, full_path)
-        return await async_request(**kwargs)
+        policy = retry_policy or self.retry_policy
+        hooks = self.hooks
+        attempt = 0
+        while True:
+            async_request = AsyncRequest(
+                http_method, full_path, client=self._pool.get(full_path)
+            )
+            await self.rate_limiter.acquire(service)
+            # Decided once per attempt, so a handler subscribed mid-request
+            # never sees a request_end without its request_start
+            emit = bool(hooks)
+            if emit:
+                hooks.emit(
+                    "request_start",
+                    service=service,
+                    operation=operation,
+                    method=http_method,
+                    url=full_path,
+                    attempt=attempt,
+                )
+                started = time.perf_counter()
+            try:
+                response = await async_request(**kwargs)
+            except Exception as error:
+                self.rate_limiter.observe(service, error)
+                if emit:
+                    self._emit_request_end(
+                        async_request, service, operation, attempt, started, error
+                    )
+                if not policy.should_retry(error, attempt, idempotent):
+                    raise
+                delay = policy.delay(error, attempt)
+                if hooks:
+                    hooks.emit(
+                        "retry",
+                        service=service,
+                        operation=operation,
+                        attempt=attempt,
+                        delay=delay,
+                        error=error,
+                    )
+            except BaseException as error:
+                # Cancellation (e.g. of a coalesced or fleet call) still ends
+                # the attempt, so in-flight counts go back down
+                self.rate_limiter.observe(service, error)
+                if emit:
+                    self._emit_request_end(
+                        async_request, service, operation, attempt, started, error
+                    )
+                raise
+            else:
+                self.rate_limiter.observe(service)
+                if emit:
+                    self._emit_request_end(
+                        async_request, service, operation, attempt, started
+                    )
+                return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _emit_request_end(
+        self, async_request, service, operation, attempt, started, error=None
+    ):
+        duration = time.perf_counter() - started
+        response = async_request.response
+        bytes_received = async_request.bytes_received
+        if bytes_received is None:
+            bytes_received = len(response.content) if response is not None else 0
+        self.hooks.emit(
+            "request_end",
+            service=service,
+            operation=operation,
+            method=async_request.http_method,
+            url=async_request.url,
+            attempt=attempt,
+            status=response.status_code if response is not None else None,
+            duration=duration,
+            bytes_sent=len(response.request.content) if response is not None else 0,
+            bytes_received=bytes_received,
+            error=error,
+        )
+
+    # Streaming variant of request: yields the elements of the JSON array at `items`
+    # (e.g. ("data", "vehicles", "nodes")) while the body is still arriving, so
+    # long responses are never held in memory whole. Failures are only retried
+    # before the first element has been yielded. `on_complete` receives the values
+    # of the top-level keys in `capture` once the body has been read.
+    async def stream(
+        self,
+        http_method,
+        service,
+        path,
+        items,
+        capture=(),
+        on_complete=None,
+        idempotent=None,
+        operation=None,
+        **kwargs,
+    ):
+        full_path = self._get_full_path(service, path)
+        if idempotent is None:
+            idempotent = self.retry_policy.is_idempotent(http_method, service, path)
+        hooks = self.hooks
+        if hooks and operation is None:
+            endpoint = getattr(path, "endpoint", None)
+            if endpoint is not None:
+                operation = endpoint.name
+            else:
+                operation = rest_operation(http_method, path)
+
+        attempt = 0
+        while True:
+            async_request = AsyncRequest(
+                http_method, full_path, client=self._pool.get(full_path)
+            )
+            await self.rate_limiter.acquire(service)
+            # Decided once per attempt, so a handler subscribed mid-request
+            # never sees a request_end without its request_start
+            emit = bool(hooks)
+            if emit:
+                hooks.emit(
+                    "request_start",
+                    service=service,
+                    operation=operation,
+                    method=http_method,
+                    url=full_path,
+                    attempt=attempt,
+                )
+                started = time.perf_counter()
+            yielded = False
+            try:
+                async with aclosing(
+                    async_request.stream(items, capture, **kwargs)
+                ) as body:
+                    async for item in body:
+                        yielded = True
+                        yield item
+            except Exception as error:
+                self.rate_limiter.observe(service, error)
+                if emit:
+                    self._emit_request_end(
+                        async_request, service, operation, attempt, started, error
+                    )
+                if yielded or not self.retry_policy.should_retry(
+                    error, attempt, idempotent
+                ):
+                    raise
+                delay = self.retry_policy.delay(error, attempt)
+                if hooks:
+                    hooks.emit(
+                        "retry",
+                        service=service,
+                        operation=operation,
+                        attempt=attempt,
+                        delay=delay,
+                        error=error,
+                    )
+            except GeneratorExit:
+                # The consumer stopped early; the request itself succeeded
+                self.rate_limiter.observe(service)
+                if emit:
+                    self._emit_request_end(
+                        async_request, service, operation, attempt, started
+                    )
+                raise
+            except BaseException as error:
+                self.rate_limiter.observe(service, error)
+                if emit:
+                    self._emit_request_end(
+                        async_request, service, operation, attempt, started, error
+                    )
+                raise
+            else:
+                self.rate_limiter.observe(service)
+                if emit:
+                    self._emit_request_end(
+                        async_request, service, operation, attempt, started
+                    )
+                if on_complete is not None:
+                    on_complete(async_request.captured)
+                return
+            await asyncio.sleep(delay)
+            attempt += 1
 
     # query method for graphQL queries, identity, and telemetry
-    async def query(self, service, query, variables=None, token=None):
+    # With schema_cache, queries are validated locally and sent minified; pass
+    # validate=False to skip that
+    async def query(self, service, query, variables=None, token=None, validate=True):
+        if validate and self.schema_cache is not None:
+            query = await self.schema_cache.prepare(self, service, query, token)
         headers = self._get_auth_headers(token) if token else {}
         headers["Content-Type"] = "application/json"
         headers["User-Agent"] = "dimo-python-sdk"
 
         data = {"query": query, "variables": variables or {}}
 
-        response = await self.request("POST", service, "", headers=headers, data=data)
+        # Queries are reads and may be retried; mutations may not
+        idempotent = not query.lstrip().startswith("mutation")
+        operation = (
+            graphql_operation(query)
+            if self.hooks or self.response_cache is not None
+            else None
+        )
+        persisted = self.persisted_queries
+        if persisted is not None and persisted.enabled(service):
+            extensions = persisted_extensions(query)
+            response = await self._persisted_query(
+                service, data["variables"], extensions, headers, idempotent, operation
+            )
+            outcome = persisted_error(response)
+            if outcome is None:
+                persisted.hits += 1
+                return response
+            persisted.misses += 1
+            if outcome == PERSISTED_QUERY_NOT_SUPPORTED:
+                persisted.unsupported.add(service)
+            else:
+                # Registers the query under its hash for the next call
+                data["extensions"] = extensions
+
+        response = await self.request(
+            "POST",
+            service,
+            "",
+            headers=headers,
+            data=data,
+            idempotent=idempotent,
+            operation=operation,
+            coalesce=idempotent and self.coalesce_requests,
+        )
         return response
+
+    # Sends a query as its hash only. Servers may report an unknown hash with an
+    # error status (e.g. 422), whose body is returned like a normal response.
+    async def _persisted_query(
+        self, service, variables, extensions, headers, idempotent, operation
+    ):
+        http_method = "POST"
+        request_kwargs = {"data": {"variables": variables, "extensions": extensions}}
+        if self.persisted_queries.use_get and idempotent:
+            params = self.persisted_queries.get_params(variables, extensions)
+            if params is not None:
+                http_method = "GET"
+                request_kwargs = {"params": params}
+        try:
+            return await self.request(
+                http_method,
+                service,
+                "",
+                headers=headers,
+                idempotent=idempotent,
+                operation=operation,
+                coalesce=idempotent and self.coalesce_requests,
+                **request_kwargs,
+            )
+        except httpx.HTTPStatusError as error:
+            try:
+                response = orjson.loads(error.response.content)
+            except orjson.JSONDecodeError:
+                response = None
+            if persisted_error(response) is None:
+                raise
+            return response
+
+    # Streaming variant of query that yields the elements of the list at `items`,
+    # e.g. ("data", "signals"). GraphQL errors in the response are raised as
+    # DimoGraphQLError after the elements that did arrive.
+    async def stream_query(self, service, query, items, variables=None, token=None):
+        if self.schema_cache is not None:
+            query = await self.schema_cache.prepare(self, service, query, token)
+        headers = self._get_auth_headers(token) if token else {}
+        headers["Content-Type"] = "application/json"
+        headers["User-Agent"] = "dimo-python-sdk"
+        data = {"query": query, "variables": variables or {}}
+
+        def raise_errors(captured):
+            errors = captured.get("errors")
+            if errors:
+                message = errors[0].get("message", "GraphQL error")
+                raise DimoGraphQLError(message, errors)
+
+        stream = self.stream(
+            "POST",
+            service,
+            "",
+            items,
+            capture=("errors",),
+            on_complete=raise_errors,
+            idempotent=not query.lstrip().startswith("mutation"),
+            operation=graphql_operation(query) if self.hooks else None,
+            headers=headers,
+            data=data,
+        )
+        async with aclosing(stream):
+            async for item in stream:
+                yield item
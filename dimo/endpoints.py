@@ -0,0 +1,194 @@
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Type
+
+from dimo.errors import DimoTypeError, DimoValueError
+
+_PLACEHOLDER = re.compile(r":([A-Za-z_]\w*)")
+
+
+class PathTemplate:
+    # A path with :name placeholders, compiled once into positional and named
+    # format strings so that formatting needs no regex work
+    __slots__ = ("path", "names", "_pattern", "_named")
+
+    def __init__(self, path: str):
+        chunks = _PLACEHOLDER.split(path)
+        literals = [
+            chunk.replace("{", "{{").replace("}", "}}") for chunk in chunks[0::2]
+        ]
+        self.path = path
+        self.names = tuple(chunks[1::2])
+        self._pattern = "{}".join(literals)
+        self._named = _PLACEHOLDER.sub(
+            r"{\1}", path.replace("{", "{{").replace("}", "}}")
+        )
+
+    # Substitutes params into the placeholders; placeholders without a value are
+    # left as they are unless `strict`
+    def format(self, params: dict, strict: bool = True) -> str:
+        if not self.names:
+            return self.path
+        try:
+            return self._pattern.format(*[params[name] for name in self.names])
+        except KeyError as error:
+            if strict:
+                raise DimoValueError(
+                    f"Missing path parameter {error} for {self.path}"
+                ) from None
+        return self._pattern.format(
+            *[params.get(name, f":{name}") for name in self.names]
+        )
+
+
+@lru_cache(maxsize=512)
+def compile_path(path: str) -> PathTemplate:
+    return PathTemplate(path)
+
+
+class EndpointPath(str):
+    # A formatted path that remembers the Endpoint it came from, so DIMO.request
+    # can name the call without parsing the path; compares equal to the plain string.
+    # Each Endpoint has its own subclass carrying `endpoint` as a class attribute,
+    # so wrapping a path costs no per-instance dict.
+    __slots__ = ()
+    endpoint: Optional["Endpoint"] = None
+
+
+class Endpoint:
+    # A REST endpoint of a DIMO service; `types` declares the expected type of
+    # each path placeholder
+    __slots__ = (
+        "name",
+        "service",
+        "method",
+        "template",
+        "types",
+        "_checks",
+        "_path_type",
+        "_static",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        service: str,
+        method: str,
+        path: str,
+        types: Optional[Dict[str, Type]] = None,
+    ):
+        self.name = name
+        self.service = service
+        self.method = method
+        self.template = compile_path(path)
+        self.types = types or {}
+        unknown = set(self.types) - set(self.template.names)
+        if unknown:
+            raise DimoValueError(f"{name} has no placeholders named {sorted(unknown)}")
+        self._checks = tuple(self.types.items())
+        self._path_type = type(
+            "EndpointPath", (EndpointPath,), {"__slots__": (), "endpoint": self}
+        )
+        self._static = None
+        if not self.template.names:
+            self._static = self._path_type(path)
+
+    @property
+    def path(self) -> str:
+        return self.template.path
+
+    def format(self, **params) -> EndpointPath:
+        if self._static is not None:
+            return self._static
+        for name, expected_type in self._checks:
+            value = params.get(name)
+            # Values of exactly the declared type skip the isinstance call
+            if type(value) is not expected_type and not isinstance(
+                value, expected_type
+            ):
+                raise DimoTypeError(name, expected_type, value)
+        try:
+            return self._path_type(self.template._named.format_map(params))
+        except KeyError:
+            # Raises DimoValueError naming the missing parameter
+            return self._path_type(self.template.format(params))
+
+    def __repr__(self):
+        return f"Endpoint({self.name!r}, {self.method} {self.service}{self.path})"
+
+
+# Every REST endpoint the SDK calls, keyed by name
+ENDPOINTS: Dict[str, Endpoint] = {}
+
+
+def register(name, service, method, path, types=None) -> Endpoint:
+    if name in ENDPOINTS:
+        raise DimoValueError(f"Endpoint {name} is already registered")
+    endpoint = Endpoint(name, service, method, path, types)
+    ENDPOINTS[name] = endpoint
+    return endpoint
+
+
+def endpoints_for(service: str):
+    return [endpoint for endpoint in ENDPOINTS.values() if endpoint.service == service]
+
+
+ATTESTATION_VIN_VC = register(
+    "attestation.create_vin_vc",
+    "Attestation",
+    "POST",
+    "/v1/vc/vin/:token_id",
+    {"token_id": int},
+)
+ATTESTATION_POM_VC = register(
+    "attestation.create_pom_vc",
+    "Attestation",
+    "POST",
+    "/v1/vc/pom/:token_id",
+    {"token_id": int},
+)
+AUTH_GENERATE_CHALLENGE = register(
+    "auth.generate_challenge", "Auth", "POST", "/auth/web3/generate_challenge"
+)
+AUTH_SUBMIT_CHALLENGE = register(
+    "auth.submit_challenge", "Auth", "POST", "/auth/web3/submit_challenge"
+)
+DEVICE_DEFINITIONS_DECODE_VIN = register(
+    "device_definitions.decode_vin",
+    "DeviceDefinitions",
+    "POST",
+    "/device-definitions/decode-vin",
+)
+DEVICE_DEFINITIONS_SEARCH = register(
+    "device_definitions.search_device_definitions",
+    "DeviceDefinitions",
+    "GET",
+    "/device-definitions/search",
+)
+TOKEN_EXCHANGE_EXCHANGE = register(
+    "token_exchange.exchange", "TokenExchange", "POST", "/v1/tokens/exchange"
+)
+TRIPS_TRIPS = register(
+    "trips.trips", "Trips", "GET", "/v1/vehicle/:token_id/trips", {"token_id": int}
+)
+VALUATIONS_GET_VALUATIONS = register(
+    "valuations.get_valuations",
+    "Valuations",
+    "GET",
+    "/v2/vehicles/:token_id/valuations",
+    {"token_id": int},
+)
+VALUATIONS_OFFERS_LOOKUP = register(
+    "valuations.offers_lookup",
+    "Valuations",
+    "GET",
+    "v2/vehicles/:token_id/instant-offer",
+    {"token_id": int},
+)
+VALUATIONS_LIST_VEHICLE_OFFERS = register(
+    "valuations.list_vehicle_offers",
+    "Valuations",
+    "GET",
+    "/v2/vehicles/:token_id/offers",
+    {"token_id": int},
+)
@@ -30,3 +30,10 @@ def check_optional_type(param_name: str, value: Any, expected_type: Union[Type,
 
 class DimoValueError(DimoError):
     pass
+
+
+class DimoGraphQLError(DimoError):
+    def __init__(self, message: str, errors=None):
+        self.errors = errors or []
+        self.message = message
+        super().__init__(self.message)
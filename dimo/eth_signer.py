@@ -1,14 +1,40 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import lru_cache
+from typing import Optional
+
 from eth_account import Account
 from eth_account.messages import encode_defunct
+from eth_account.signers.local import LocalAccount
 from eth_utils import to_bytes, remove_0x_prefix, add_0x_prefix
 
 
+# Key derivation is the expensive part of Account.from_key, so parsed accounts
+# are kept per private key (per process when signing in a process pool)
+@lru_cache(maxsize=32)
+def _load_account(private_key: str) -> LocalAccount:
+    return Account.from_key(private_key)
+
+
 class EthSigner:
+    # Signs challenges in `executor` (a thread or process pool; None uses the
+    # loop's default thread pool) so ECDSA work never blocks the event loop.
+    # Any object exposing `async sign(message, private_key) -> str` can replace it
+    # as the signer of Auth, e.g. to delegate to a KMS or hardware wallet.
+    def __init__(self, executor: Optional[Executor] = None):
+        self.executor = executor
+
     @staticmethod
     def sign_message(message: str, private_key: str) -> str:
         private_key = add_0x_prefix(remove_0x_prefix(private_key))
         message_hash = encode_defunct(text=message)
-        account = Account.from_key(private_key)
+        account = _load_account(private_key)
         signed_message = account.sign_message(message_hash)
 
-        return add_0x_prefix(signed_message.signature.hex())
\ No newline at end of file
+        return add_0x_prefix(signed_message.signature.hex())
+
+    async def sign(self, message: str, private_key: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, EthSigner.sign_message, message, private_key
+        )
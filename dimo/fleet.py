@@ -0,0 +1,114 @@
+import asyncio
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+from dimo.concurrency import bounded_as_completed
+from dimo.errors import check_optional_type, check_type
+from dimo.ratelimit import TokenBucket
+
+# Privilege 1: all-time, non-location data
+DEFAULT_PRIVILEGES = [1]
+
+
+class FleetResult(NamedTuple):
+    token_id: int
+    result: Any
+    error: Optional[BaseException]
+
+
+class FleetProgress(NamedTuple):
+    succeeded: int
+    failed: int
+    in_flight: int
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+
+# Runs func(vehicle_jwt, token_id) for every token ID and yields a FleetResult
+# per vehicle in completion order. Each vehicle's JWT exchange is pipelined with
+# its call: while some vehicles are still exchanging, others are already being
+# queried. At most `concurrency` vehicles are in progress and at most
+# `exchange_concurrency` exchanges in flight (optionally limited to
+# `exchange_rate` per second); token IDs are pulled lazily, so fleets of any
+# size never materialise as tasks. Exchanges and calls are retried by the
+# client's RetryPolicy only, and every failure is reported in its FleetResult
+# instead of ending the run.
+#
+# `on_progress` receives a FleetProgress after each vehicle. Closing the
+# generator (e.g. after breaking out of the loop) or cancelling the consuming
+# task cancels the vehicles still in progress.
+async def map_vehicles(
+    dimo,
+    developer_jwt: str,
+    token_ids,
+    func: Callable[[str, int], Awaitable[Any]],
+    privileges: Optional[list] = None,
+    concurrency: int = 50,
+    exchange_concurrency: Optional[int] = None,
+    exchange_rate: Optional[float] = None,
+    on_progress: Optional[Callable[[FleetProgress], None]] = None,
+    use_cache: bool = True,
+):
+    check_type("developer_jwt", developer_jwt, str)
+    check_type("concurrency", concurrency, int)
+    check_optional_type("exchange_concurrency", exchange_concurrency, int)
+    check_optional_type("exchange_rate", exchange_rate, (int, float))
+    privileges = list(privileges or DEFAULT_PRIVILEGES)
+    exchange_slots = asyncio.Semaphore(exchange_concurrency or concurrency)
+    limiter = (
+        TokenBucket(exchange_rate, burst=exchange_concurrency or concurrency)
+        if exchange_rate
+        else None
+    )
+    started = 0
+
+    async def run(token_id):
+        nonlocal started
+        started += 1
+        async with exchange_slots:
+            response = await dimo.token_exchange.exchange(
+                developer_jwt,
+                privileges,
+                token_id,
+                dimo.env,
+                use_cache,
+                limiter=limiter,
+            )
+        return await func(response["token"], token_id)
+
+    succeeded = failed = 0
+    stream = bounded_as_completed(run, token_ids, concurrency)
+    try:
+        async for token_id, result, error in stream:
+            if error is None:
+                succeeded += 1
+            else:
+                failed += 1
+            if on_progress is not None:
+                on_progress(
+                    FleetProgress(succeeded, failed, started - succeeded - failed)
+                )
+            yield FleetResult(token_id, result, error)
+    finally:
+        # Cancels the vehicles in progress when the caller stops early
+        await stream.aclose()
+
+
+# Telemetry.get_signals_latest for every vehicle, see map_vehicles
+def signals_latest(dimo, developer_jwt: str, token_ids, **options):
+    return map_vehicles(
+        dimo, developer_jwt, token_ids, dimo.telemetry.get_signals_latest, **options
+    )
+
+
+# Valuations.get_valuations for every vehicle, see map_vehicles
+def valuations(dimo, developer_jwt: str, token_ids, **options):
+    return map_vehicles(
+        dimo, developer_jwt, token_ids, dimo.valuations.get_valuations, **options
+    )
+
+
+# Trips.trips (first page) for every vehicle, see map_vehicles
+def trips(dimo, developer_jwt: str, token_ids, **options):
+    return map_vehicles(dimo, developer_jwt, token_ids, dimo.trips.trips, **options)
@@ -1,4 +1,15 @@
-from .identity import Identity
-from .telemetry import Telemetry
+from importlib import import_module
 
 __all__ = ["Identity", "Telemetry"]
+
+_LAZY = {"Identity": ".identity", "Telemetry": ".telemetry"}
+
+
+# PEP 562: the clients (and graphql-core behind them) load on first access
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
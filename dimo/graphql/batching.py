@@ -0,0 +1,217 @@
+import asyncio
+from functools import lru_cache
+from typing import Optional
+
+from graphql import (
+    FieldNode,
+    GraphQLError,
+    NameNode,
+    OperationDefinitionNode,
+    OperationType,
+    VariableNode,
+    Visitor,
+    parse,
+    print_ast,
+    visit,
+)
+
+# Re-exported; the variable lives apart so Telemetry can read it cheaply
+from .context import active_batcher
+
+
+class _PrefixVariables(Visitor):
+    def __init__(self, prefix):
+        super().__init__()
+        self.prefix = prefix
+
+    def enter_variable(self, node, *_):
+        return VariableNode(name=NameNode(value=self.prefix + node.name.value))
+
+
+# Returns the single query operation of a document, or None when the document
+# cannot be merged (mutations, fragments, several operations, parse errors)
+@lru_cache(maxsize=256)
+def _batchable_operation(query: str) -> Optional[OperationDefinitionNode]:
+    try:
+        document = parse(query)
+    except GraphQLError:
+        return None
+    if len(document.definitions) != 1:
+        return None
+    operation = document.definitions[0]
+    if (
+        not isinstance(operation, OperationDefinitionNode)
+        or operation.operation != OperationType.QUERY
+    ):
+        return None
+    if not all(
+        isinstance(node, FieldNode) for node in operation.selection_set.selections
+    ):
+        return None
+    return operation
+
+
+def is_batchable(query: str) -> bool:
+    return _batchable_operation(query) is not None
+
+
+# Renders the variable definitions and aliased root fields of `query` for slot
+# `index` of a merged document. Returns (variable_definitions, selections,
+# aliases) where aliases maps each merged response key to the original key.
+@lru_cache(maxsize=1024)
+def _render_slot(query: str, index: int):
+    operation = _batchable_operation(query)
+    prefix = f"b{index}_"
+    renamed = visit(operation, _PrefixVariables(prefix))
+
+    variable_definitions = [print_ast(node) for node in renamed.variable_definitions]
+    selections = []
+    aliases = {}
+    for field in renamed.selection_set.selections:
+        original = (field.alias or field.name).value
+        alias = prefix + original
+        aliases[alias] = original
+        aliased = FieldNode(
+            alias=NameNode(value=alias),
+            name=field.name,
+            arguments=field.arguments,
+            directives=field.directives,
+            selection_set=field.selection_set,
+        )
+        selections.append(print_ast(aliased))
+    return variable_definitions, selections, aliases
+
+
+# Merges queries into one aliased multi-root document. Returns the document,
+# the merged variables and the per-query alias maps used to split the response.
+def merge_queries(queries):
+    variable_definitions = []
+    selections = []
+    variables = {}
+    alias_maps = []
+    for index, (query, query_variables) in enumerate(queries):
+        slot_definitions, slot_selections, aliases = _render_slot(query, index)
+        variable_definitions.extend(slot_definitions)
+        selections.extend(slot_selections)
+        alias_maps.append(aliases)
+        for name, value in (query_variables or {}).items():
+            variables[f"b{index}_{name}"] = value
+
+    signature = f"({', '.join(variable_definitions)})" if variable_definitions else ""
+    body = "\n".join(selections)
+    document = f"query Batch{signature} {{\n{body}\n}}"
+    return document, variables, alias_maps
+
+
+# Splits a merged GraphQL response back into one response per original query
+def split_response(response, alias_maps):
+    response = response or {}
+    data = response.get("data")
+    errors = response.get("errors") or []
+
+    results = []
+    for aliases in alias_maps:
+        result = {"data": None}
+        if data is not None:
+            result["data"] = {
+                original: data.get(alias) for alias, original in aliases.items()
+            }
+        slot_errors = []
+        for error in errors:
+            path = error.get("path") if isinstance(error, dict) else None
+            if not path:
+                slot_errors.append(error)
+            elif path[0] in aliases:
+                slot_errors.append({**error, "path": [aliases[path[0]], *path[1:]]})
+        if slot_errors:
+            result["errors"] = slot_errors
+        results.append(result)
+    return results
+
+
+class QueryBatcher:
+    # Coalesces queries sent to one GraphQL service within `window` seconds into
+    # aliased multi-root documents of at most `max_size` queries. Queries are only
+    # merged when they share an auth token, since the token scopes what a
+    # document may read.
+    def __init__(self, dimo, service: str, window: float = 0.005, max_size: int = 25):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.dimo = dimo
+        self.service = service
+        self.window = window
+        self.max_size = max_size
+        self._pending = {}
+        self._timers = {}
+        self._sending = set()
+
+    async def query(self, query: str, variables=None, token=None):
+        # Invalid queries fail on their own instead of with the whole batch
+        if self.dimo.schema_cache is not None:
+            query = await self.dimo.schema_cache.prepare(
+                self.dimo, self.service, query, token
+            )
+        if not is_batchable(query):
+            return await self.dimo.query(
+                self.service, query, variables=variables, token=token
+            )
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        group = self._pending.setdefault(token, [])
+        group.append((query, variables, future))
+        if len(group) >= self.max_size:
+            self._flush(token)
+        elif len(group) == 1:
+            self._timers[token] = loop.call_later(self.window, self._flush, token)
+        return await future
+
+    def _flush(self, token):
+        timer = self._timers.pop(token, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._pending.pop(token, None)
+        if group:
+            task = asyncio.ensure_future(self._send(token, group))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    # Sends everything still queued and waits for the responses
+    async def flush(self):
+        for token in list(self._pending):
+            self._flush(token)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    async def _send(self, token, group):
+        futures = [future for _, _, future in group]
+        try:
+            if len(group) == 1:
+                query, variables, _ = group[0]
+                results = [
+                    await self.dimo.query(
+                        self.service, query, variables=variables, token=token
+                    )
+                ]
+            else:
+                document, variables, alias_maps = merge_queries(
+                    [(query, variables) for query, variables, _ in group]
+                )
+                response = await self.dimo.query(
+                    self.service, document, variables=variables, token=token
+                )
+                results = split_response(response, alias_maps)
+        except Exception as error:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        except BaseException:
+            # A cancelled send must not leave its callers waiting forever
+            for future in futures:
+                future.cancel()
+            raise
+
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,174 @@
+from enum import Enum
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import orjson
+
+from dimo.errors import DimoValueError
+
+
+class Aggregation(str, Enum):
+    # Aggregations accepted by signals() fields; RAND, FIRST and LAST also apply
+    # to string signals
+    AVG = "AVG"
+    MED = "MED"
+    MAX = "MAX"
+    MIN = "MIN"
+    RAND = "RAND"
+    FIRST = "FIRST"
+    LAST = "LAST"
+    UNIQUE = "UNIQUE"
+    TOP = "TOP"
+
+
+AGG = Aggregation
+
+SIGNAL_FIELDS_QUERY = """
+query SignalFields {
+    __type(name: "SignalAggregations") {
+        fields {
+            name
+        }
+    }
+}
+"""
+
+
+def _literal(value) -> str:
+    # GraphQL input literal for filter values
+    if isinstance(value, dict):
+        body = ", ".join(f"{key}: {_literal(item)}" for key, item in value.items())
+        return f"{{{body}}}"
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join(_literal(item) for item in value)}]"
+    return orjson.dumps(value).decode()
+
+
+# Renders the document for one query shape; identical shapes share the text
+@lru_cache(maxsize=512)
+def render_signals_document(
+    selections: Tuple[Tuple[str, str, str], ...], filter_literal: Optional[str]
+) -> str:
+    lines = ["timestamp"]
+    for alias, signal, aggregation in selections:
+        prefix = "" if alias == signal else f"{alias}: "
+        lines.append(f"{prefix}{signal}(agg: {aggregation})")
+    filter_argument = f", filter: {filter_literal}" if filter_literal else ""
+    fields = "\n        ".join(lines)
+    return (
+        "query Signals($tokenId: Int!, $startDate: Time!, $endDate: Time!, "
+        "$interval: String!) {\n"
+        "    signals(tokenId: $tokenId, from: $startDate, to: $endDate, "
+        f"interval: $interval{filter_argument}) {{\n"
+        f"        {fields}\n"
+        "    }\n"
+        "}"
+    )
+
+
+class SignalsQuery:
+    # Immutable builder for Telemetry signals() queries that selects only the
+    # requested aggregations:
+    #
+    #   query = telemetry.signals(token_id, "1h", start, end).select(
+    #       speed=AGG.MAX, avgSpeed=("speed", AGG.AVG)
+    #   )
+    #   rows = await query.fetch(vehicle_jwt)
+    #
+    # A keyword names the signal, or the response alias when given a
+    # (signal, aggregation) tuple.
+    def __init__(
+        self,
+        telemetry,
+        token_id: int,
+        interval: str,
+        start_date: str,
+        end_date: str,
+        filter: Optional[dict] = None,
+        selections: Tuple[Tuple[str, str, str], ...] = (),
+    ):
+        self.telemetry = telemetry
+        self.token_id = token_id
+        self.interval = interval
+        self.start_date = start_date
+        self.end_date = end_date
+        self.filter = filter
+        self.selections = selections
+
+    def _copy(self, **changes):
+        fields = {
+            "token_id": self.token_id,
+            "interval": self.interval,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "filter": self.filter,
+            "selections": self.selections,
+        }
+        fields.update(changes)
+        return SignalsQuery(self.telemetry, **fields)
+
+    def select(self, **fields) -> "SignalsQuery":
+        selections = {alias: (signal, agg) for alias, signal, agg in self.selections}
+        for alias, spec in fields.items():
+            signal, aggregation = spec if isinstance(spec, tuple) else (alias, spec)
+            selections[alias] = (signal, Aggregation(aggregation).value)
+        return self._copy(
+            selections=tuple(
+                (alias, signal, agg) for alias, (signal, agg) in selections.items()
+            )
+        )
+
+    def where(self, **filter) -> "SignalsQuery":
+        return self._copy(filter={**(self.filter or {}), **filter})
+
+    @property
+    def signal_names(self):
+        return {signal for _, signal, _ in self.selections}
+
+    @property
+    def document(self) -> str:
+        if not self.selections:
+            raise DimoValueError("Select at least one signal")
+        filter_literal = _literal(self.filter) if self.filter else None
+        return render_signals_document(self.selections, filter_literal)
+
+    @property
+    def variables(self) -> dict:
+        return {
+            "tokenId": self.token_id,
+            "startDate": self.start_date,
+            "endDate": self.end_date,
+            "interval": self.interval,
+        }
+
+    def validate(self, known_signals):
+        unknown = sorted(self.signal_names - set(known_signals))
+        if unknown:
+            raise DimoValueError(f"Unknown Telemetry signals: {', '.join(unknown)}")
+
+    async def _validated(self, vehicle_jwt, validate):
+        if validate:
+            self.validate(await self.telemetry.signal_names(vehicle_jwt))
+        return self.document
+
+    # Fetches data.signals in one request
+    async def fetch(
+        self, vehicle_jwt: str, result_format: str = "json", validate: bool = True
+    ):
+        document = await self._validated(vehicle_jwt, validate)
+        return await self.telemetry._signals(
+            document, vehicle_jwt, self.variables, result_format
+        )
+
+    # Fetches the range in concurrent windows, see Telemetry.signals_range
+    async def fetch_range(self, vehicle_jwt: str, validate: bool = True, **options):
+        document = await self._validated(vehicle_jwt, validate)
+        return await self.telemetry.signals_range(
+            document,
+            vehicle_jwt,
+            self.start_date,
+            self.end_date,
+            self.interval,
+            variables={"tokenId": self.token_id, "interval": self.interval},
+            **options,
+        )
@@ -0,0 +1,8 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# Batcher active for the current task, set by Telemetry.batch(). Kept apart from
+# dimo.graphql.batching so checking it does not import graphql-core.
+active_batcher: ContextVar[Optional["QueryBatcher"]] = ContextVar(
+    "dimo_active_batcher", default=None
+)
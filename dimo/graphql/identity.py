@@ -1,3 +1,166 @@
+import asyncio
+from contextlib import aclosing
+from typing import Optional
+
+from dimo.errors import DimoGraphQLError, check_type, check_optional_type
+
+
+def _connection(response, path):
+    node = (response or {}).get("data")
+    for key in path:
+        if not isinstance(node, dict):
+            node = None
+            break
+        node = node.get(key)
+    if not isinstance(node, dict):
+        errors = (response or {}).get("errors") or []
+        message = errors[0].get("message") if errors else "missing connection"
+        raise DimoGraphQLError(
+            f"Could not read {'.'.join(path)} page: {message}", errors
+        )
+    return node
+
+
+# Documents shared by the one-shot sample methods and their iter_* variants.
+# Each pages over vehicles with $first/$after and selects pageInfo; the
+# one-shot methods send after: null and return the first page.
+VEHICLE_DEFINITIONS_PER_ADDRESS_QUERY = """
+query ListVehicleDefinitionsPerAddress($owner: Address!, $first: Int!, $after: String) {
+  vehicles(filterBy: {owner: $owner}, first: $first, after: $after) {
+    nodes {
+      aftermarketDevice {
+        tokenId
+        address
+      }
+      syntheticDevice {
+        address
+        tokenId
+      }
+      definition {
+        make
+        model
+        year
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+MMY_BY_OWNER_QUERY = """
+query MMYByOwner($owner: Address!, $first: Int!, $after: String) {
+  vehicles(filterBy: {owner: $owner}, first: $first, after: $after) {
+    nodes {
+      definition {
+        make
+        model
+        year
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+TOKEN_IDS_PRIVILEGES_BY_OWNER_QUERY = """
+query TokenIDsPrivilegesByOwner($owner: Address!, $first: Int!, $after: String, $firstPrivileges: Int!) {
+  vehicles(filterBy: {owner: $owner}, first: $first, after: $after) {
+    nodes {
+      tokenId
+      privileges(first: $firstPrivileges) {
+        nodes {
+          setAt
+          expiresAt
+          id
+        }
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+TOKEN_IDS_GRANTED_TO_DEV_BY_OWNER_QUERY = """
+query ListTokenIdsGrantedToDevByOwner($privileged: Address!, $owner: Address!, $first: Int!, $after: String) {
+  vehicles(filterBy: {privileged: $privileged, owner: $owner}, first: $first, after: $after) {
+    nodes {
+      tokenId
+      definition {
+        make
+      }
+      aftermarketDevice {
+        manufacturer {
+          name
+        }
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+DCN_BY_OWNER_QUERY = """
+query DCNByOwner($owner: Address!, $first: Int!, $after: String) {
+  vehicles(filterBy: {owner: $owner}, first: $first, after: $after) {
+    nodes {
+      dcn {
+        node
+        name
+        vehicle {
+          tokenId
+        }
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+REWARDS_HISTORY_BY_OWNER_QUERY = """
+query GetVehicleDataByOwner($owner: Address!, $first: Int!, $after: String, $historyFirst: Int!) {
+  vehicles (filterBy: {owner: $owner}, first: $first, after: $after) {
+    nodes {
+      earnings {
+        history (first: $historyFirst) {
+          edges {
+            node {
+              week
+              aftermarketDeviceTokens
+              syntheticDeviceTokens
+              sentAt
+              beneficiary
+              connectionStreak
+              streakTokens
+            }
+          }
+        }
+        totalTokens
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
+
+
 class Identity:
     def __init__(self, dimo_instance):
         self.dimo = dimo_instance
@@ -6,6 +169,76 @@ class Identity:
     async def query(self, query):
         return await self.dimo.query("Identity", query)
 
+    # Yields the elements of the list at `items` while the response arrives, so
+    # large vehicle lists are never held in memory whole
+    async def stream_query(
+        self, query, variables=None, items=("data", "vehicles", "nodes")
+    ):
+        stream = self.dimo.stream_query("Identity", query, items, variables=variables)
+        async with aclosing(stream):
+            async for item in stream:
+                yield item
+
+    # Follows the cursor of the connection at `path` and yields its nodes. The query
+    # must declare $first: Int! and $after: String and select
+    # pageInfo { hasNextPage endCursor } next to nodes. The next page is fetched
+    # while the caller consumes the current one, so at most two pages are held.
+    async def paginate(
+        self,
+        query: str,
+        variables: Optional[dict] = None,
+        path=("vehicles",),
+        page_size: int = 100,
+        max_items: Optional[int] = None,
+    ):
+        check_type("query", query, str)
+        check_optional_type("variables", variables, dict)
+        check_type("page_size", page_size, int)
+        check_optional_type("max_items", max_items, int)
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        variables = dict(variables or {})
+
+        def fetch(after, remaining):
+            first = page_size if remaining is None else min(page_size, remaining)
+            page_variables = {**variables, "first": first, "after": after}
+            return asyncio.ensure_future(
+                self.dimo.query("Identity", query, variables=page_variables)
+            )
+
+        yielded = 0
+        if max_items is not None and max_items <= 0:
+            return
+        next_page = fetch(None, max_items)
+        try:
+            while next_page is not None:
+                response = await next_page
+                next_page = None
+                connection = _connection(response, path)
+                nodes = connection.get("nodes") or []
+                page_info = connection.get("pageInfo") or {}
+
+                remaining = None if max_items is None else max_items - yielded
+                if (
+                    nodes
+                    and page_info.get("hasNextPage")
+                    and page_info.get("endCursor")
+                    and (remaining is None or len(nodes) < remaining)
+                ):
+                    next_page = fetch(
+                        page_info["endCursor"],
+                        None if remaining is None else remaining - len(nodes),
+                    )
+
+                for node in nodes:
+                    if max_items is not None and yielded >= max_items:
+                        return
+                    yield node
+                    yielded += 1
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
     # Sample query - count DIMO vehicles
     async def count_dimo_vehicles(self) -> dict:
         query = """
@@ -21,123 +254,57 @@ class Identity:
     async def list_vehicle_definitions_per_address(
         self, address: str, limit: int
     ) -> dict:
-        query = """
-      query ListVehicleDefinitionsPerAddress($owner: Address!, $first: Int!) {
-        vehicles(filterBy: {owner: $owner}, first: $first) {
-          nodes {
-            aftermarketDevice {
-              tokenId
-              address
-            } 
-            syntheticDevice {
-              address
-              tokenId
-            }
-            definition {
-              make
-              model
-              year
-            }
-          }
-        }
-      }
-      """
-        variables = {"owner": address, "first": limit}
+        variables = {"owner": address, "first": limit, "after": None}
 
-        return await self.dimo.query("Identity", query, variables=variables)
+        return await self.dimo.query(
+            "Identity", VEHICLE_DEFINITIONS_PER_ADDRESS_QUERY, variables=variables
+        )
 
     # Sample query - MMY per owner
     async def mmy_by_owner(self, address: str, limit: int) -> dict:
-        query = """
-    query MMYByOwner($owner: Address!, $first: Int!) {
-      vehicles(filterBy: {owner: $owner}, first: $first) {
-        nodes {
-          definition {
-            make
-            model
-            year
-          }
-        }
-      }
-    }
-    """
-        variables = {"owner": address, "first": limit}
+        variables = {"owner": address, "first": limit, "after": None}
 
-        return await self.dimo.query("Identity", query, variables=variables)
+        return await self.dimo.query(
+            "Identity", MMY_BY_OWNER_QUERY, variables=variables
+        )
 
     # Sample query - tokenIDs & privileges by owner
     async def list_token_ids_privileges_by_owner(
         self, address: str, vehicle_limit: int, privileges_limit: int
     ) -> dict:
-        query = """
-    query TokenIDsPrivilegesByOwner($owner: Address!, $firstVehicles: Int!, $firstPrivileges: Int!) {
-      vehicles(filterBy: {owner: $owner}, first: $firstVehicles) {
-        nodes {
-          tokenId
-          privileges(first: $firstPrivileges) {
-            nodes {
-              setAt
-              expiresAt
-              id
-            }
-          }
-        }
-      }
-    }
-    """
         variables = {
             "owner": address,
-            "firstVehicles": vehicle_limit,
+            "first": vehicle_limit,
+            "after": None,
             "firstPrivileges": privileges_limit,
         }
 
-        return await self.dimo.query("Identity", query, variables=variables)
+        return await self.dimo.query(
+            "Identity", TOKEN_IDS_PRIVILEGES_BY_OWNER_QUERY, variables=variables
+        )
 
     # Sample query - list of tokenIDs granted to a dev from an owner
     async def list_token_ids_granted_to_dev_by_owner(
         self, dev_address: str, owner_address: str, limit: int
     ) -> dict:
-        query = """
-    query ListTokenIdsGrantedToDevByOwner($privileged: Address!, $owner: Address!, $first: Int!) {
-      vehicles(filterBy: {privileged: $privileged, owner: $owner}, first: $first) {
-        nodes {
-          tokenId
-          definition {
-            make
-          }
-          aftermarketDevice {
-            manufacturer {
-              name
-            }
-          }
+        variables = {
+            "owner": owner_address,
+            "privileged": dev_address,
+            "first": limit,
+            "after": None,
         }
-      }
-    }
-      """
-        variables = {"owner": owner_address, "privileged": dev_address, "first": limit}
 
-        return self.dimo.query("Identity", query, variables=variables)
+        return await self.dimo.query(
+            "Identity", TOKEN_IDS_GRANTED_TO_DEV_BY_OWNER_QUERY, variables=variables
+        )
 
     # Sample query - DCNs by Owner
-    def dcn_by_owner(self, address: str, limit: int) -> dict:
-        query = """
-    query DCNByOwner($owner: Address!, $first: Int!) {
-      vehicles(filterBy: {owner: $owner}, first: $first) {
-        nodes {
-          dcn {
-            node
-            name
-            vehicle {
-              tokenId
-            }
-          }
-        }
-      }
-    }
-    """
-        variables = {"owner": address, "first": limit}
+    async def dcn_by_owner(self, address: str, limit: int) -> dict:
+        variables = {"owner": address, "first": limit, "after": None}
 
-        return self.dimo.query("Identity", query, variables=variables)
+        return await self.dimo.query(
+            "Identity", DCN_BY_OWNER_QUERY, variables=variables
+        )
 
     # Sample query - MMY by TokenID
     async def mmy_by_token_id(self, token_id: int) -> dict:
@@ -179,30 +346,101 @@ class Identity:
 
     # Sample query - get rewards history by owner
     async def rewards_history_by_owner(self, address: str, limit: int) -> dict:
-        query = """
-      query GetVehicleDataByOwner($owner: Address!, $first: Int!) {
-        vehicles (filterBy: {owner: $owner}, first: $first) {
-          nodes {
-            earnings {
-              history (first: $first) {
-                edges {
-                  node {
-                    week
-                    aftermarketDeviceTokens
-                    syntheticDeviceTokens
-                    sentAt
-                    beneficiary
-                    connectionStreak
-                    streakTokens
-                  }
-                }
-              }
-              totalTokens
-            }
-          }
+        variables = {
+            "owner": address,
+            "first": limit,
+            "after": None,
+            "historyFirst": limit,
         }
-      }
-      """
-        variables = {"owner": address, "first": limit}
 
-        return await self.dimo.query("Identity", query, variables=variables)
+        return await self.dimo.query(
+            "Identity", REWARDS_HISTORY_BY_OWNER_QUERY, variables=variables
+        )
+
+    # Paginated variant of list_vehicle_definitions_per_address
+    async def iter_vehicle_definitions_per_address(
+        self, address: str, page_size: int = 100, max_items: Optional[int] = None
+    ):
+        async for node in self.paginate(
+            VEHICLE_DEFINITIONS_PER_ADDRESS_QUERY,
+            {"owner": address},
+            page_size=page_size,
+            max_items=max_items,
+        ):
+            yield node
+
+    # Paginated variant of mmy_by_owner
+    async def iter_mmy_by_owner(
+        self, address: str, page_size: int = 100, max_items: Optional[int] = None
+    ):
+        async for node in self.paginate(
+            MMY_BY_OWNER_QUERY,
+            {"owner": address},
+            page_size=page_size,
+            max_items=max_items,
+        ):
+            yield node
+
+    # Paginated variant of list_token_ids_privileges_by_owner
+    async def iter_token_ids_privileges_by_owner(
+        self,
+        address: str,
+        privileges_limit: int,
+        page_size: int = 100,
+        max_items: Optional[int] = None,
+    ):
+        variables = {"owner": address, "firstPrivileges": privileges_limit}
+        async for node in self.paginate(
+            TOKEN_IDS_PRIVILEGES_BY_OWNER_QUERY,
+            variables,
+            page_size=page_size,
+            max_items=max_items,
+        ):
+            yield node
+
+    # Paginated variant of list_token_ids_granted_to_dev_by_owner
+    async def iter_token_ids_granted_to_dev_by_owner(
+        self,
+        dev_address: str,
+        owner_address: str,
+        page_size: int = 100,
+        max_items: Optional[int] = None,
+    ):
+        variables = {"owner": owner_address, "privileged": dev_address}
+        async for node in self.paginate(
+            TOKEN_IDS_GRANTED_TO_DEV_BY_OWNER_QUERY,
+            variables,
+            page_size=page_size,
+            max_items=max_items,
+        ):
+            yield node
+
+    # Paginated variant of dcn_by_owner
+    async def iter_dcn_by_owner(
+        self, address: str, page_size: int = 100, max_items: Optional[int] = None
+    ):
+        async for node in self.paginate(
+            DCN_BY_OWNER_QUERY,
+            {"owner": address},
+            page_size=page_size,
+            max_items=max_items,
+        ):
+            yield node
+
+    # Paginated variant of rewards_history_by_owner; pages over vehicles and
+    # returns up to history_limit earnings entries per vehicle
+    async def iter_rewards_history_by_owner(
+        self,
+        address: str,
+        history_limit: int,
+        page_size: int = 100,
+        max_items: Optional[int] = None,
+    ):
+        variables = {"owner": address, "historyFirst": history_limit}
+        async for node in self.paginate(
+            REWARDS_HISTORY_BY_OWNER_QUERY,
+            variables,
+            page_size=page_size,
+            max_items=max_items,
+        ):
+            yield node
@@ -0,0 +1,76 @@
+import hashlib
+from functools import lru_cache
+from typing import Optional
+
+import orjson
+
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+PERSISTED_QUERY_NOT_SUPPORTED = "PersistedQueryNotSupported"
+
+_ERROR_CODES = {
+    "PERSISTED_QUERY_NOT_FOUND": PERSISTED_QUERY_NOT_FOUND,
+    "PERSISTED_QUERY_NOT_SUPPORTED": PERSISTED_QUERY_NOT_SUPPORTED,
+}
+
+
+# sha256 of a query document, memoized so repeated queries are hashed once
+@lru_cache(maxsize=1024)
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def persisted_extensions(query: str) -> dict:
+    return {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+
+
+# Returns PERSISTED_QUERY_NOT_FOUND or PERSISTED_QUERY_NOT_SUPPORTED when a
+# response's errors report one, by message or by extensions.code
+def persisted_error(response) -> Optional[str]:
+    if not isinstance(response, dict):
+        return None
+    for error in response.get("errors") or ():
+        message = error.get("message")
+        if message in (PERSISTED_QUERY_NOT_FOUND, PERSISTED_QUERY_NOT_SUPPORTED):
+            return message
+        code = (error.get("extensions") or {}).get("code")
+        if code in _ERROR_CODES:
+            return _ERROR_CODES[code]
+    return None
+
+
+class PersistedQueries:
+    # Automatic persisted queries for DIMO.query, enabled with
+    # DIMO(persisted_queries=...). A query is first sent as its sha256 hash only;
+    # when the server does not know the hash yet, the full text is sent along
+    # with the hash so the server stores it for the next call. Services that
+    # answer PersistedQueryNotSupported get full-text queries from then on.
+    #
+    # With `use_get`, hash-only queries (not mutations) are sent as GET requests
+    # so HTTP caches in between can serve them; requests whose URL parameters
+    # would exceed `max_get_length` bytes stay POSTs.
+    def __init__(self, use_get: bool = False, max_get_length: int = 2048):
+        self.use_get = use_get
+        self.max_get_length = max_get_length
+        self.unsupported = set()
+        self.hits = 0
+        self.misses = 0
+
+    def enabled(self, service: str) -> bool:
+        return service not in self.unsupported
+
+    # URL parameters of a hash-only GET, or None when they would be too long
+    def get_params(self, variables, extensions) -> Optional[dict]:
+        params = {
+            "variables": orjson.dumps(variables).decode(),
+            "extensions": orjson.dumps(extensions).decode(),
+        }
+        if sum(len(value) for value in params.values()) > self.max_get_length:
+            return None
+        return params
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "unsupported": sorted(self.unsupported),
+        }
@@ -0,0 +1,171 @@
+import asyncio
+import re
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import List, Tuple
+
+from dimo.errors import DimoError, DimoGraphQLError, DimoValueError
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ns|us|µs|ms|s|m|h|d)")
+_DURATION_UNITS = {
+    "ns": 1e-9,
+    "us": 1e-6,
+    "µs": 1e-6,
+    "ms": 1e-3,
+    "s": 1.0,
+    "m": 60.0,
+    "h": 3600.0,
+    "d": 86400.0,
+}
+
+# Rows x signals a single signals() request should return at most
+DEFAULT_MAX_POINTS = 5000
+
+
+# Parses a Go-style duration as used by signals(interval:), e.g. "24h" or "1h30m"
+def parse_duration(value: str) -> timedelta:
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        raise DimoValueError(f"Invalid interval {value!r}")
+    return timedelta(
+        seconds=sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    )
+
+
+def parse_time(value: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError as error:
+        raise DimoValueError(f"Invalid timestamp {value!r}") from error
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def format_time(value: datetime) -> str:
+    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="auto") + "Z"
+
+
+# Counts the aggregated signals selected under signals(...) in a query
+@lru_cache(maxsize=256)
+def count_signals(query: str) -> int:
+    # Imported here so plain Telemetry queries do not load graphql-core
+    from graphql import FieldNode, GraphQLError, parse
+
+    try:
+        document = parse(query)
+    except GraphQLError:
+        return 1
+    for definition in document.definitions:
+        for field in getattr(definition.selection_set, "selections", ()):
+            if isinstance(field, FieldNode) and field.name.value == "signals":
+                selections = (
+                    field.selection_set.selections if field.selection_set else ()
+                )
+                return max(
+                    1,
+                    sum(
+                        1
+                        for node in selections
+                        if not (
+                            isinstance(node, FieldNode)
+                            and node.name.value == "timestamp"
+                        )
+                    ),
+                )
+    return 1
+
+
+# Splits [start, end) into consecutive windows of whole intervals, each holding
+# at most max_points // signal_count rows
+def split_time_range(
+    start: str,
+    end: str,
+    interval: str,
+    signal_count: int = 1,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> List[Tuple[str, str]]:
+    start_time, end_time = parse_time(start), parse_time(end)
+    if end_time <= start_time:
+        raise DimoValueError("end_date must be after start_date")
+    step = parse_duration(interval)
+    if step <= timedelta(0):
+        raise DimoValueError("interval must be positive")
+    rows = max(1, max_points // max(1, signal_count))
+    window = step * rows
+
+    windows = []
+    cursor = start_time
+    while cursor < end_time:
+        window_end = min(cursor + window, end_time)
+        windows.append((format_time(cursor), format_time(window_end)))
+        cursor = window_end
+    return windows
+
+
+class ChunkError(DimoError):
+    # A window that still failed after its retries
+    def __init__(self, window, error):
+        self.window = window
+        self.error = error
+        self.message = f"Fetching {window[0]} - {window[1]} failed: {error}"
+        super().__init__(self.message)
+
+
+# Fetches the windows with at most `concurrency` in flight and yields their rows
+# in window order; rows repeated at a window boundary are dropped. fetch(start,
+# end) returns a window's response and rows(response) its rows, raising
+# DimoGraphQLError for errors the server reported. Failed requests are already
+# retried by the client's RetryPolicy, so only server-reported GraphQL errors
+# are retried here: up to `retries` times, after backoff(attempt) seconds.
+async def fetch_windows(
+    fetch, rows, windows, concurrency: int, retries: int, backoff, timestamp_key
+):
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    async def fetch_window(window):
+        attempt = 0
+        while True:
+            try:
+                response = await fetch(*window)
+            except Exception as error:
+                raise ChunkError(window, error) from error
+            try:
+                return rows(response)
+            except DimoGraphQLError as error:
+                if attempt >= retries:
+                    raise ChunkError(window, error) from error
+            await asyncio.sleep(backoff(attempt))
+            attempt += 1
+
+    pending = deque()
+    windows = iter(windows)
+    last_timestamp = None
+    try:
+        while True:
+            for window in windows:
+                pending.append(asyncio.ensure_future(fetch_window(window)))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            window_rows = await pending.popleft()
+            for index, row in enumerate(window_rows):
+                if (
+                    index == 0
+                    and last_timestamp is not None
+                    and isinstance(row, dict)
+                    and row.get(timestamp_key) == last_timestamp
+                ):
+                    continue
+                yield row
+            if window_rows and isinstance(window_rows[-1], dict):
+                last_timestamp = window_rows[-1].get(timestamp_key)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,185 @@
+import asyncio
+import math
+import os
+import time
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+import orjson
+from graphql import (
+    DocumentNode,
+    GraphQLError,
+    GraphQLSchema,
+    build_client_schema,
+    get_introspection_query,
+    parse,
+    print_ast,
+    strip_ignored_characters,
+    validate,
+)
+
+from dimo.cache import SingleFlight, TTLCache
+from dimo.errors import DimoGraphQLError
+
+# Bumped whenever the layout of cached schema files changes
+SCHEMA_FORMAT_VERSION = 1
+DEFAULT_MAX_AGE = 86400.0
+INTROSPECTION_QUERY = get_introspection_query(descriptions=False)
+
+
+# Parses a document once; the AST is shared and must not be mutated
+@lru_cache(maxsize=512)
+def parse_document(query: str) -> DocumentNode:
+    try:
+        return parse(query)
+    except GraphQLError as error:
+        raise DimoGraphQLError(
+            f"Invalid GraphQL document: {error.message}", [error.formatted]
+        ) from error
+
+
+# Canonical compact text of a document: printed from its AST with comments,
+# commas and insignificant whitespace removed
+@lru_cache(maxsize=512)
+def minify_query(query: str) -> str:
+    return strip_ignored_characters(print_ast(parse_document(query)))
+
+
+class SchemaCache:
+    # Client-side GraphQL schemas for DIMO(schema_cache=...). Each service's
+    # schema is introspected once and, with `path`, written to
+    # <path>/<service>.schema.json with a version stamp so later processes skip
+    # the introspection. Files older than `max_age` seconds, written in another
+    # format version or fetched from another URL are ignored.
+    #
+    # Queries are validated against the schema and minified before they are
+    # sent, so invalid documents fail without a round trip; results are
+    # memoized per query text. When a schema cannot be loaded (e.g. the server
+    # disables introspection), queries go out unchecked and loading is retried
+    # after `retry_after` seconds.
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+        retry_after: float = 300.0,
+        maxsize: int = 1024,
+        clock=time.time,
+    ):
+        self.path = os.path.expanduser(path) if path is not None else None
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self._clock = clock
+        self._schemas = {}
+        self._unavailable = {}
+        self._prepared = TTLCache(maxsize, clock=clock)
+        self._flight = SingleFlight()
+
+    def _file(self, service: str) -> str:
+        return os.path.join(self.path, f"{service}.schema.json")
+
+    def _read(self, service: str, url: str) -> Optional[dict]:
+        try:
+            with open(self._file(service), "rb") as file:
+                stamp = orjson.loads(file.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        if (
+            stamp.get("version") != SCHEMA_FORMAT_VERSION
+            or stamp.get("url") != url
+            or self._clock() - stamp.get("fetched_at", 0) > self.max_age
+        ):
+            return None
+        return stamp
+
+    def _write(self, service: str, stamp: dict):
+        os.makedirs(self.path, exist_ok=True)
+        target = self._file(service)
+        temporary = f"{target}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(orjson.dumps(stamp))
+        os.replace(temporary, target)
+
+    async def _introspect(self, dimo, service, token):
+        try:
+            response = await dimo.query(
+                service, INTROSPECTION_QUERY, token=token, validate=False
+            )
+        except httpx.HTTPStatusError:
+            return None
+        if not isinstance(response, dict) or response.get("errors"):
+            return None
+        return response.get("data")
+
+    async def _load(self, dimo, service, token) -> Optional[GraphQLSchema]:
+        url = dimo.urls[service]
+        loop = asyncio.get_running_loop()
+        stamp = None
+        if self.path is not None:
+            stamp = await loop.run_in_executor(None, self._read, service, url)
+        if stamp is None:
+            introspection = await self._introspect(dimo, service, token)
+            if not introspection:
+                self._unavailable[service] = self._clock() + self.retry_after
+                return None
+            stamp = {
+                "version": SCHEMA_FORMAT_VERSION,
+                "service": service,
+                "url": url,
+                "fetched_at": self._clock(),
+                "introspection": introspection,
+            }
+            if self.path is not None:
+                await loop.run_in_executor(None, self._write, service, stamp)
+
+        try:
+            schema = build_client_schema(stamp["introspection"])
+        except (GraphQLError, TypeError):
+            self._unavailable[service] = self._clock() + self.retry_after
+            return None
+        self._schemas[service] = (schema, stamp["fetched_at"])
+        self._unavailable.pop(service, None)
+        self._prepared.clear()
+        return schema
+
+    # Returns the service's schema, loading it on first use, or None while it is
+    # unavailable. `token` authorizes the introspection query if one is needed.
+    async def schema(self, dimo, service: str, token=None) -> Optional[GraphQLSchema]:
+        entry = self._schemas.get(service)
+        if entry is not None and self._clock() - entry[1] <= self.max_age:
+            return entry[0]
+        if self._clock() < self._unavailable.get(service, 0):
+            return None
+        return await self._flight.do(service, lambda: self._load(dimo, service, token))
+
+    # Validates `query` against the service's schema and returns its minified
+    # text. Raises DimoGraphQLError carrying every validation error.
+    async def prepare(self, dimo, service: str, query: str, token=None) -> str:
+        key = (service, query)
+        prepared = self._prepared.get(key)
+        if prepared is not None:
+            return prepared
+        document = parse_document(query)
+        schema = await self.schema(dimo, service, token)
+        if schema is None:
+            return query
+        errors = validate(schema, document)
+        if errors:
+            raise DimoGraphQLError(
+                f"Invalid {service} query: {errors[0].message}",
+                [error.formatted for error in errors],
+            )
+        prepared = minify_query(query)
+        self._prepared.set(key, prepared, math.inf)
+        return prepared
+
+    # Drops the loaded schemas and, with `path`, their files
+    def clear(self):
+        self._schemas.clear()
+        self._unavailable.clear()
+        self._prepared.clear()
+        if self.path is None:
+            return
+        for name in os.listdir(self.path) if os.path.isdir(self.path) else ():
+            if name.endswith(".schema.json"):
+                os.remove(os.path.join(self.path, name))
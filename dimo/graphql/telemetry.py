@@ -1,13 +1,214 @@
+from contextlib import aclosing, asynccontextmanager
+from typing import Optional
+
+from dimo.columnar import ColumnBuilder, check_result_format
+from dimo.errors import DimoGraphQLError, check_type
+from dimo.models import compact
+
+from .context import active_batcher
+from .builder import SIGNAL_FIELDS_QUERY, SignalsQuery
+from .ranges import DEFAULT_MAX_POINTS, count_signals, fetch_windows, split_time_range
+
+
+def _signal_rows(response):
+    response = response or {}
+    errors = response.get("errors")
+    if errors:
+        raise DimoGraphQLError(errors[0].get("message", "GraphQL error"), errors)
+    return ((response.get("data") or {}).get("signals")) or []
+
+
+async def _collect(rows, result_format):
+    if result_format == "records":
+        return [compact(row) async for row in rows]
+    builder = ColumnBuilder()
+    async for row in rows:
+        builder.append(row)
+    return builder.build(result_format)
+
+
 class Telemetry:
     def __init__(self, dimo_instance):
         self.dimo = dimo_instance
+        self._batcher = None
+        self._signal_names = None
+
+    # Coalesces all concurrent queries sharing a vehicle JWT within `window`
+    # seconds into aliased multi-root documents of up to `max_size` queries
+    def enable_batching(self, window: float = 0.005, max_size: int = 25):
+        from .batching import QueryBatcher
+
+        self._batcher = QueryBatcher(self.dimo, "Telemetry", window, max_size)
+
+    def disable_batching(self):
+        self._batcher = None
+
+    # Batches queries issued by the current task (and tasks it spawns) inside the
+    # block; anything still queued is sent when the block exits
+    @asynccontextmanager
+    async def batch(self, window: float = 0.005, max_size: int = 25):
+        from .batching import QueryBatcher
+
+        batcher = QueryBatcher(self.dimo, "Telemetry", window, max_size)
+        token = active_batcher.set(batcher)
+        try:
+            yield batcher
+        finally:
+            active_batcher.reset(token)
+            await batcher.flush()
+
+    def _current_batcher(self):
+        batcher = active_batcher.get()
+        if batcher is not None and batcher.dimo is self.dimo:
+            return batcher
+        return self._batcher
+
+    async def _query(self, query, vehicle_jwt: str, variables=None):
+        batcher = self._current_batcher()
+        if batcher is not None:
+            return await batcher.query(query, variables=variables, token=vehicle_jwt)
+        return await self.dimo.query(
+            "Telemetry", query, token=vehicle_jwt, variables=variables
+        )
 
     # Primary query method
-    async def query(self, query, vehicle_jwt: str):
+    async def query(self, query, vehicle_jwt: str, variables=None):
+        if variables is not None or self._current_batcher() is not None:
+            return await self._query(query, vehicle_jwt, variables=variables)
         return await self.dimo.query("Telemetry", query, token=vehicle_jwt)
 
-    # Sample query - get signals latest
-    async def get_signals_latest(self, vehicle_jwt: str, token_id: int) -> dict:
+    # Yields the elements of the list at `items` while the response arrives, e.g.
+    # the rows of a long signals() range, without holding the whole body
+    async def stream_query(
+        self, query, vehicle_jwt: str, variables=None, items=("data", "signals")
+    ):
+        stream = self.dimo.stream_query(
+            "Telemetry", query, items, variables=variables, token=vehicle_jwt
+        )
+        async with aclosing(stream):
+            async for item in stream:
+                yield item
+
+    # Returns the rows of data.signals as JSON or, for other result formats, as
+    # records or columns built while the rows stream in (see dimo.models and
+    # dimo.columnar)
+    async def _signals(self, query, vehicle_jwt, variables, result_format):
+        check_result_format(result_format)
+        if result_format == "json":
+            return await self._query(query, vehicle_jwt, variables=variables)
+        return await _collect(
+            self.stream_query(query, vehicle_jwt, variables), result_format
+        )
+
+    # Starts a SignalsQuery builder; chain .select(...) and .fetch(vehicle_jwt)
+    def signals(
+        self,
+        token_id: int,
+        interval: str,
+        start_date: str,
+        end_date: str,
+        filter: Optional[dict] = None,
+    ) -> SignalsQuery:
+        check_type("token_id", token_id, int)
+        check_type("interval", interval, str)
+        return SignalsQuery(self, token_id, interval, start_date, end_date, filter)
+
+    # Names of the signals the Telemetry API can aggregate, loaded once per
+    # instance; taken from the cached schema when DIMO has a schema_cache
+    async def signal_names(self, vehicle_jwt: str) -> frozenset:
+        schema_cache = self.dimo.schema_cache
+        if self._signal_names is None and schema_cache is not None:
+            schema = await schema_cache.schema(self.dimo, "Telemetry", vehicle_jwt)
+            signal_type = schema.get_type("SignalAggregations") if schema else None
+            if signal_type is not None:
+                self._signal_names = frozenset(signal_type.fields) - {"timestamp"}
+        if self._signal_names is None:
+            response = await self.dimo.query(
+                "Telemetry", SIGNAL_FIELDS_QUERY, token=vehicle_jwt
+            )
+            signal_type = ((response or {}).get("data") or {}).get("__type") or {}
+            names = frozenset(
+                field["name"] for field in signal_type.get("fields") or []
+            )
+            if not names:
+                raise DimoGraphQLError(
+                    "Could not load the Telemetry signal list",
+                    (response or {}).get("errors"),
+                )
+            self._signal_names = names - {"timestamp"}
+        return self._signal_names
+
+    # Runs a signals() query over [start_date, end_date) split into windows of whole
+    # intervals, each returning at most `max_points` rows x signals. The query must
+    # declare $startDate and $endDate. Up to `concurrency` windows are fetched at
+    # once; a window whose response carries GraphQL errors is requested again up
+    # to `retries` times (failed requests are retried by the client's
+    # RetryPolicy). Rows are yielded in time order.
+    async def iter_signals_range(
+        self,
+        query: str,
+        vehicle_jwt: str,
+        start_date: str,
+        end_date: str,
+        interval: str,
+        variables=None,
+        concurrency: int = 4,
+        retries: int = 2,
+        max_points: int = DEFAULT_MAX_POINTS,
+    ):
+        windows = split_time_range(
+            start_date, end_date, interval, count_signals(query), max_points
+        )
+
+        async def fetch(start, end):
+            window_variables = {**(variables or {}), "startDate": start, "endDate": end}
+            return await self._query(query, vehicle_jwt, variables=window_variables)
+
+        async for row in fetch_windows(
+            fetch,
+            _signal_rows,
+            windows,
+            concurrency,
+            retries,
+            self.dimo.retry_policy.backoff,
+            "timestamp",
+        ):
+            yield row
+
+    # Collects iter_signals_range into a list of rows or another result format
+    async def signals_range(
+        self,
+        query: str,
+        vehicle_jwt: str,
+        start_date: str,
+        end_date: str,
+        interval: str,
+        variables=None,
+        concurrency: int = 4,
+        retries: int = 2,
+        max_points: int = DEFAULT_MAX_POINTS,
+        result_format: str = "json",
+    ):
+        check_result_format(result_format)
+        rows = self.iter_signals_range(
+            query,
+            vehicle_jwt,
+            start_date,
+            end_date,
+            interval,
+            variables=variables,
+            concurrency=concurrency,
+            retries=retries,
+            max_points=max_points,
+        )
+        if result_format == "json":
+            return [row async for row in rows]
+        return await _collect(rows, result_format)
+
+    # Sample query - get signals latest; typed=True returns dimo.models records
+    async def get_signals_latest(
+        self, vehicle_jwt: str, token_id: int, typed: bool = False
+    ):
         query = """
         query GetSignalsLatest($tokenId: Int!) {
             signalsLatest(tokenId: $tokenId){
@@ -32,14 +233,18 @@ class Telemetry:
         """
         variables = {"tokenId": token_id}
 
-        return await self.dimo.query(
-            "Telemetry", query, token=vehicle_jwt, variables=variables
-        )
+        response = await self._query(query, vehicle_jwt, variables=variables)
+        return compact(response) if typed else response
 
     # Sample query - daily signals from autopi
     async def get_daily_signals_autopi(
-        self, vehicle_jwt: str, token_id: int, start_date: str, end_date: str
-    ) -> dict:
+        self,
+        vehicle_jwt: str,
+        token_id: int,
+        start_date: str,
+        end_date: str,
+        result_format: str = "json",
+    ):
         query = """
         query GetDailySignalsAutopi($tokenId: Int!, $startDate: Time!, $endDate: Time!) {
             signals(
@@ -62,14 +267,17 @@ class Telemetry:
             """
         variables = {"tokenId": token_id, "startDate": start_date, "endDate": end_date}
 
-        return await self.dimo.query(
-            "Telemetry", query, token=vehicle_jwt, variables=variables
-        )
+        return await self._signals(query, vehicle_jwt, variables, result_format)
 
     # Sample query - daily average speed of a specific vehicle
     async def get_daily_average_speed(
-        self, vehicle_jwt: str, token_id: int, start_date: str, end_date: str
-    ) -> dict:
+        self,
+        vehicle_jwt: str,
+        token_id: int,
+        start_date: str,
+        end_date: str,
+        result_format: str = "json",
+    ):
         query = """
         query GetDailyAverageSpeed($tokenId: Int!, $startDate: Time!, $endDate: Time!) {
          signals (
@@ -86,14 +294,17 @@ class Telemetry:
         """
         variables = {"tokenId": token_id, "startDate": start_date, "endDate": end_date}
 
-        return await self.dimo.query(
-            "Telemetry", query, token=vehicle_jwt, variables=variables
-        )
+        return await self._signals(query, vehicle_jwt, variables, result_format)
 
     # Sample query - daily max speed of a specific vehicle
     async def get_daily_max_speed(
-        self, vehicle_jwt: str, token_id: int, start_date: str, end_date: str
-    ) -> dict:
+        self,
+        vehicle_jwt: str,
+        token_id: int,
+        start_date: str,
+        end_date: str,
+        result_format: str = "json",
+    ):
         query = """
         query GetMaxSpeed($tokenId: Int!, $startDate: Time!, $endDate: Time!) {
             signals(
@@ -110,9 +321,7 @@ class Telemetry:
         """
         variables = {"tokenId": token_id, "startDate": start_date, "endDate": end_date}
 
-        return await self.dimo.query(
-            "Telemetry", query, token=vehicle_jwt, variables=variables
-        )
+        return await self._signals(query, vehicle_jwt, variables, result_format)
 
     # Sample query - get the VIN of a specific vehicle
     async def get_vehicle_vin_vc(self, vehicle_jwt: str, token_id: int) -> dict:
@@ -124,9 +333,7 @@ class Telemetry:
         }"""
         variables = {"tokenId": token_id}
 
-        return await self.dimo.query(
-            "Telemetry", query, token=vehicle_jwt, variables=variables
-        )
+        return await self._query(query, vehicle_jwt, variables=variables)
 
     async def get_vin(self, vehicle_jwt: str, token_id: int):
         try:
@@ -146,9 +353,7 @@ class Telemetry:
                 """
                 variables = {"tokenId": token_id}
 
-                return await self.dimo.query(
-                    "Telemetry", query, token=vehicle_jwt, variables=variables
-                )
+                return await self._query(query, vehicle_jwt, variables=variables)
             else:
                 # Hier eine tatsächliche Exception werfen
                 raise Exception("There was an error generating a VIN VC.")
@@ -0,0 +1,71 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# request_start: service, operation, method, url, attempt
+# request_end:   service, operation, method, url, attempt, status, duration,
+#                bytes_sent, bytes_received, error
+# retry:         service, operation, attempt, delay, error
+# cache_hit, cache_miss: cache ("inflight" hits are reads joining an
+#                identical request already in flight)
+# token_refresh: kind, duration, error
+EVENTS = frozenset(
+    {
+        "request_start",
+        "request_end",
+        "retry",
+        "cache_hit",
+        "cache_miss",
+        "token_refresh",
+    }
+)
+
+
+class Hooks:
+    # Event hooks of a DIMO instance. Handlers are called synchronously with the
+    # event's fields as keyword arguments; an exception raised by a handler is
+    # logged and never affects the request that emitted the event.
+    def __init__(self):
+        self._handlers = {}
+
+    def __bool__(self):
+        return bool(self._handlers)
+
+    def on(self, event: str, handler=None):
+        if event not in EVENTS:
+            raise ValueError(
+                f"Unknown event '{event}', expected one of {sorted(EVENTS)}"
+            )
+        if handler is None:
+            # Used as a decorator
+            return lambda func: self.on(event, func)
+        self._handlers.setdefault(event, []).append(handler)
+        return handler
+
+    def off(self, event: str, handler):
+        handlers = self._handlers.get(event, [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self._handlers.pop(event, None)
+
+    # Registers every on_<event> method of `subscriber`, e.g. a MetricsCollector
+    def subscribe(self, subscriber):
+        for event in EVENTS:
+            handler = getattr(subscriber, f"on_{event}", None)
+            if handler is not None:
+                self.on(event, handler)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        for event in EVENTS:
+            handler = getattr(subscriber, f"on_{event}", None)
+            if handler is not None:
+                self.off(event, handler)
+
+    def emit(self, event: str, **fields):
+        for handler in self._handlers.get(event, ()):
+            try:
+                handler(**fields)
+            except Exception:
+                logger.exception("DIMO %s hook %r failed", event, handler)
@@ -0,0 +1,224 @@
+import bisect
+import re
+from collections import defaultdict
+from typing import Optional
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+_OPERATION_NAME = re.compile(r"^\s*(?:query|mutation|subscription)\s+(\w+)")
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+# Names a GraphQL document after its operation, e.g. "GetSignalsLatest"
+def graphql_operation(query: str) -> str:
+    match = _OPERATION_NAME.match(query)
+    return match.group(1) if match else "anonymous"
+
+
+# Names a REST call after its method and path with numeric IDs collapsed, so
+# per-vehicle paths share one series
+def rest_operation(http_method: str, path: str) -> str:
+    return f"{http_method.upper()} {_NUMERIC_SEGMENT.sub('/:id', path)}"
+
+
+class Histogram:
+    # Non-cumulative bucket histogram; the last bucket catches everything above
+    # the largest bound
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    # Estimates the q-quantile by interpolating inside the bucket that reaches it
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                return lower + (upper - lower) * max(0.0, rank - seen) / count
+            seen += count
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip(self.bounds + (float("inf"),), self.counts)),
+        }
+
+
+class MetricsCollector:
+    # In-process metrics built from DIMO hook events; register it with
+    # dimo.hooks.subscribe(collector) and read collector.snapshot()
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.reset()
+
+    def reset(self):
+        self.latency = defaultdict(lambda: Histogram(self.buckets))
+        self.responses = defaultdict(int)
+        self.bytes_sent = defaultdict(int)
+        self.bytes_received = defaultdict(int)
+        self.retries = defaultdict(int)
+        self.in_flight = defaultdict(int)
+        self.cache = defaultdict(int)
+        self.token_refreshes = defaultdict(int)
+
+    def on_request_start(self, service, **_):
+        self.in_flight[service] += 1
+
+    def on_request_end(
+        self,
+        service,
+        operation,
+        status,
+        duration,
+        bytes_sent,
+        bytes_received,
+        error,
+        **_,
+    ):
+        key = (service, operation)
+        self.in_flight[service] -= 1
+        self.latency[key].observe(duration)
+        outcome = status if status is not None else type(error).__name__
+        self.responses[key + (outcome,)] += 1
+        self.bytes_sent[key] += bytes_sent
+        self.bytes_received[key] += bytes_received
+
+    def on_retry(self, service, operation, **_):
+        self.retries[(service, operation)] += 1
+
+    def on_cache_hit(self, cache, **_):
+        self.cache[(cache, "hit")] += 1
+
+    def on_cache_miss(self, cache, **_):
+        self.cache[(cache, "miss")] += 1
+
+    def on_token_refresh(self, kind, **_):
+        self.token_refreshes[kind] += 1
+
+    def snapshot(self) -> dict:
+        operations = {}
+        for (service, operation), histogram in self.latency.items():
+            key = (service, operation)
+            operations[f"{service} {operation}"] = {
+                "latency": histogram.snapshot(),
+                "responses": {
+                    outcome: count
+                    for (s, o, outcome), count in self.responses.items()
+                    if (s, o) == key
+                },
+                "bytes_sent": self.bytes_sent[key],
+                "bytes_received": self.bytes_received[key],
+                "retries": self.retries.get(key, 0),
+            }
+        return {
+            "operations": operations,
+            "in_flight": dict(self.in_flight),
+            "cache": {
+                f"{cache}.{result}": n for (cache, result), n in self.cache.items()
+            },
+            "token_refreshes": dict(self.token_refreshes),
+        }
+
+    # Operations ordered by their estimated q-quantile latency, slowest first
+    def slowest(self, q: float = 0.99, limit: int = 10):
+        ranked = sorted(
+            ((key, histogram.quantile(q)) for key, histogram in self.latency.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return ranked[:limit]
+
+
+class OpenTelemetryMetrics:
+    # Forwards DIMO hook events to OpenTelemetry instruments. Requires
+    # `pip install dimo-python-sdk[otel]`; uses the global meter provider unless
+    # a meter is given.
+    def __init__(self, meter=None):
+        try:
+            from opentelemetry import metrics
+        except ImportError as error:
+            raise ImportError(
+                "OpenTelemetryMetrics requires opentelemetry-api: "
+                "pip install dimo-python-sdk[otel]"
+            ) from error
+
+        meter = meter or metrics.get_meter("dimo")
+        self._duration = meter.create_histogram(
+            "dimo.client.request.duration", unit="s"
+        )
+        self._requests = meter.create_counter("dimo.client.requests")
+        self._in_flight = meter.create_up_down_counter("dimo.client.requests.in_flight")
+        self._bytes_sent = meter.create_counter("dimo.client.request.size", unit="By")
+        self._bytes_received = meter.create_counter(
+            "dimo.client.response.size", unit="By"
+        )
+        self._retries = meter.create_counter("dimo.client.retries")
+        self._cache = meter.create_counter("dimo.client.cache.lookups")
+        self._token_refreshes = meter.create_counter("dimo.client.token.refreshes")
+
+    def on_request_start(self, service, **_):
+        self._in_flight.add(1, {"service": service})
+
+    def on_request_end(
+        self,
+        service,
+        operation,
+        status,
+        duration,
+        bytes_sent,
+        bytes_received,
+        error,
+        **_,
+    ):
+        attributes = {"service": service, "operation": operation}
+        self._in_flight.add(-1, {"service": service})
+        self._duration.record(duration, attributes)
+        outcome = status if status is not None else type(error).__name__
+        self._requests.add(1, {**attributes, "status": outcome})
+        self._bytes_sent.add(bytes_sent, attributes)
+        self._bytes_received.add(bytes_received, attributes)
+
+    def on_retry(self, service, operation, **_):
+        self._retries.add(1, {"service": service, "operation": operation})
+
+    def on_cache_hit(self, cache, **_):
+        self._cache.add(1, {"cache": cache, "result": "hit"})
+
+    def on_cache_miss(self, cache, **_):
+        self._cache.add(1, {"cache": cache, "result": "miss"})
+
+    def on_token_refresh(self, kind, **_):
+        self._token_refreshes.add(1, {"kind": kind})
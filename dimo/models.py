@@ -0,0 +1,195 @@
+import dataclasses
+import functools
+import keyword
+from typing import Iterable
+
+import orjson
+
+# Compact, typed views of DIMO responses. orjson decodes a body once and the
+# resulting dicts are turned into __slots__ records, which take a fraction of
+# the memory of a dict with the same keys once the dicts are dropped:
+#
+#   latest = models.decode(response.content)
+#   latest.data.signalsLatest.speed.value
+#
+# Objects become records whose attributes are the JSON keys, {timestamp, value}
+# pairs become SignalValue and lists become tuples. Keys named in `lazy` keep
+# their sub-tree as JSON bytes, decoded into records the first time the
+# attribute is read. Records also support record["key"] and .get() so code
+# written against the plain JSON keeps working, and to_dict() returns it.
+
+
+class SignalValue:
+    __slots__ = ("timestamp", "value")
+
+    def __init__(self, timestamp, value):
+        self.timestamp = timestamp
+        self.value = value
+
+    def to_dict(self) -> dict:
+        return {"timestamp": self.timestamp, "value": self.value}
+
+    def __getitem__(self, key):
+        if key == "timestamp":
+            return self.timestamp
+        if key == "value":
+            return self.value
+        raise KeyError(key)
+
+    def __eq__(self, other):
+        if not isinstance(other, SignalValue):
+            return NotImplemented
+        return self.timestamp == other.timestamp and self.value == other.value
+
+    def __repr__(self):
+        return f"SignalValue(timestamp={self.timestamp!r}, value={self.value!r})"
+
+
+class Record:
+    # Base class of the generated record types. _fields are the JSON keys in
+    # response order; a lazy field is stored as bytes under "_" + its name.
+    # The types are slotted dataclasses with a positional __init__; equality
+    # and repr come from this class.
+    __slots__ = ()
+    _fields = ()
+    _lazy = frozenset()
+
+    def to_dict(self) -> dict:
+        return {name: _plain(getattr(self, name)) for name in self._fields}
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self._fields:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __eq__(self, other):
+        if not isinstance(other, Record):
+            return NotImplemented
+        return self._fields == other._fields and all(
+            getattr(self, name) == getattr(other, name) for name in self._fields
+        )
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"Record({fields})"
+
+
+# Reads a lazy field, decoding its JSON bytes on first access
+def _lazy_field(slot):
+    def get(self):
+        value = getattr(self, slot)
+        if type(value) is bytes:
+            value = _compact(orjson.loads(value), frozenset())
+            setattr(self, slot, value)
+        return value
+
+    return property(get)
+
+
+def _valid_field(name) -> bool:
+    return (
+        name.isidentifier()
+        and not keyword.iskeyword(name)
+        and not name.startswith("_")
+        and not hasattr(Record, name)
+    )
+
+
+# The record class for one set of keys, or None when a key cannot be an
+# attribute (such objects stay dicts)
+@functools.lru_cache(maxsize=1024)
+def record_type(fields: tuple, lazy: frozenset = frozenset()):
+    if not all(_valid_field(name) for name in fields):
+        return None
+    slots = tuple("_" + name if name in lazy else name for name in fields)
+    namespace = {"_fields": fields, "_lazy": lazy}
+    for name in lazy:
+        namespace[name] = _lazy_field("_" + name)
+    return dataclasses.make_dataclass(
+        "Record",
+        slots,
+        bases=(Record,),
+        namespace=namespace,
+        eq=False,
+        repr=False,
+        slots=True,
+    )
+
+
+# Converts decoded JSON into records, SignalValues and tuples
+def compact(value, lazy: Iterable[str] = ()):
+    return _compact(value, frozenset(lazy))
+
+
+# Decodes a JSON body straight into records
+def decode(content: bytes, lazy: Iterable[str] = ()):
+    return _compact(orjson.loads(content), frozenset(lazy))
+
+
+_CONTAINERS = (dict, list)
+
+
+# Scalars are returned as they are without a call per value, which is most of
+# the decode time otherwise
+def _compact(value, lazy: frozenset):
+    if type(value) is list:
+        return tuple(
+            [
+                _compact(item, lazy) if type(item) in _CONTAINERS else item
+                for item in value
+            ]
+        )
+    if type(value) is not dict:
+        return value
+    if len(value) == 2 and "timestamp" in value and "value" in value:
+        return SignalValue(value["timestamp"], value["value"])
+    fields = tuple(value)
+    present = lazy.intersection(fields) if lazy else lazy
+    cls = record_type(fields, present)
+    if cls is None:
+        return {
+            key: _compact(item, lazy) if type(item) in _CONTAINERS else item
+            for key, item in value.items()
+        }
+    if not present:
+        return cls(
+            *[
+                _compact(item, lazy) if type(item) in _CONTAINERS else item
+                for item in value.values()
+            ]
+        )
+    return cls(
+        *[
+            (
+                (_encode(item) if key in present else _compact(item, lazy))
+                if type(item) in _CONTAINERS
+                else item
+            )
+            for key, item in value.items()
+        ]
+    )
+
+
+# orjson output keeps its growth buffer, several KiB even for small values, so
+# lazy sub-trees are copied into exactly sized bytes
+def _encode(value) -> bytes:
+    return bytes(memoryview(orjson.dumps(value)))
+
+
+# Converts records back into the plain JSON structure
+def _plain(value):
+    if isinstance(value, (Record, SignalValue)):
+        return value.to_dict()
+    if type(value) is tuple:
+        return [_plain(item) for item in value]
+    if type(value) is dict:
+        return {key: _plain(item) for key, item in value.items()}
+    return value
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Optional
+
+from httpx import HTTPStatusError
+
+from dimo.environments import dimo_environment
+from dimo.errors import DimoValueError
+
+SERVICES = frozenset(service for urls in dimo_environment.values() for service in urls)
+
+
+class TokenBucket:
+    # Allows `rate` acquisitions per second with bursts up to `burst`;
+    # acquire() waits for capacity instead of failing
+    def __init__(
+        self, rate: float, burst: Optional[float] = None, clock=time.monotonic
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1.0))
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Changes the rate from now on; capacity earned so far is kept
+    def set_rate(self, rate: float):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._refill()
+        self.rate = float(rate)
+
+    async def acquire(self, tokens: float = 1.0):
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class ServiceRateLimiter:
+    # Holds one TokenBucket per DIMO service. `limits` maps service names from
+    # dimo_environment to requests per second or (rate, burst) tuples; services
+    # without an entry are not throttled. With `adaptive`, a 429 multiplies the
+    # service's rate by `decrease` (down to `min_fraction` of the configured rate)
+    # and every successful response adds back `recover` of the configured rate.
+    def __init__(
+        self,
+        limits: Optional[dict] = None,
+        adaptive: bool = True,
+        decrease: float = 0.5,
+        recover: float = 0.05,
+        min_fraction: float = 0.05,
+        clock=time.monotonic,
+    ):
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        self.adaptive = adaptive
+        self.decrease = decrease
+        self.recover = recover
+        self.min_fraction = min_fraction
+        self._clock = clock
+        self._configured = {}
+        self._buckets = {}
+        for service, limit in (limits or {}).items():
+            self.set_limit(service, limit)
+
+    def set_limit(self, service: str, limit):
+        if service not in SERVICES:
+            raise DimoValueError(
+                f"Unknown DIMO service '{service}', expected one of {sorted(SERVICES)}"
+            )
+        if limit is None:
+            self._configured.pop(service, None)
+            self._buckets.pop(service, None)
+            return
+        rate, burst = limit if isinstance(limit, tuple) else (limit, None)
+        self._buckets[service] = TokenBucket(rate, burst, clock=self._clock)
+        self._configured[service] = float(rate)
+
+    def rate(self, service: str) -> Optional[float]:
+        bucket = self._buckets.get(service)
+        return bucket.rate if bucket is not None else None
+
+    # Waits until the service has capacity for one more request
+    async def acquire(self, service: str):
+        bucket = self._buckets.get(service)
+        if bucket is not None:
+            await bucket.acquire()
+
+    # Feeds the outcome of a request back into the service's rate
+    def observe(self, service: str, error: Optional[BaseException] = None):
+        bucket = self._buckets.get(service)
+        if bucket is None or not self.adaptive:
+            return
+        configured = self._configured[service]
+        if isinstance(error, HTTPStatusError) and error.response.status_code == 429:
+            floor = configured * self.min_fraction
+            bucket.set_rate(max(floor, bucket.rate * self.decrease))
+        elif error is None and bucket.rate < configured:
+            bucket.set_rate(min(configured, bucket.rate + configured * self.recover))
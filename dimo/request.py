@@ -1,15 +1,90 @@
+import asyncio
+
 import orjson
-from httpx import AsyncClient
+from httpx import AsyncClient, Limits, Timeout, URL
+
+from dimo.streaming import JsonStreamParser
+
+# Defaults for the shared connection pool; keep-alive connections are reused across calls
+DEFAULT_LIMITS = Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+)
+DEFAULT_TIMEOUT = Timeout(10.0)
+
+TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class ClientPool:
+    # Owns one long-lived AsyncClient per service host (scheme, host, port)
+    def __init__(self, limits=None, timeout=None, http2=False, transport=None):
+        self.limits = limits or DEFAULT_LIMITS
+        self.timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+        self.http2 = http2
+        self.transport = transport
+        self._clients = {}
+        self._loop = None
+        # Clients left behind by a previous event loop, closed on the new one
+        self._stale = []
+        self._closing = None
+
+    def _build_client(self):
+        kwargs = {"limits": self.limits, "timeout": self.timeout, "http2": self.http2}
+        if self.transport is not None:
+            kwargs["transport"] = self.transport
+        return AsyncClient(**kwargs)
+
+    def get(self, url) -> AsyncClient:
+        # Connections are bound to the event loop that opened them, so a pool
+        # reused from a new loop (e.g. repeated asyncio.run) starts over. The
+        # old clients are closed in the background; sockets whose loop is
+        # already closed cannot be shut down cleanly and are left to the GC.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._stale.extend(self._clients.values())
+            self._clients = {}
+            self._loop = loop
+            if self._stale:
+                self._closing = loop.create_task(self._close_stale())
+
+        parsed = URL(url)
+        key = (parsed.scheme, parsed.host, parsed.port)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._build_client()
+            self._clients[key] = client
+        return client
+
+    async def _close_stale(self):
+        while self._stale:
+            client = self._stale.pop()
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients = {}
+        for client in clients:
+            await client.aclose()
+        await self._close_stale()
 
 
 class AsyncRequest:
 
-    def __init__(self, http_method, url):
+    def __init__(self, http_method, url, client=None):
         self.http_method = http_method
         self.url = url
-        self.client = AsyncClient()
+        # Standalone use without a pool falls back to a private client
+        self.client = client if client is not None else AsyncClient()
+        # Last httpx.Response, kept for instrumentation
+        self.response = None
+        # Body size counted while streaming, when the body is never held whole
+        self.bytes_received = None
+        self.captured = {}
 
-    async def __call__(self, headers=None, data=None, params=None, **kwargs):
+    @staticmethod
+    def _prepare(headers, data, kwargs):
         headers = headers or {}
         headers.update(kwargs.pop("headers", {}))
 
@@ -19,6 +94,10 @@ class AsyncRequest:
             and headers.get("Content-Type") == "application/json"
         ):
             data = orjson.dumps(data)
+        return headers, data
+
+    async def __call__(self, headers=None, data=None, params=None, **kwargs):
+        headers, data = self._prepare(headers, data, kwargs)
 
         # Perform the async request
         response = await self.client.request(
@@ -29,6 +108,7 @@ class AsyncRequest:
             data=data,
             **kwargs,
         )
+        self.response = response
 
         # TODO: Better error responses
         response.raise_for_status()
@@ -36,3 +116,32 @@ class AsyncRequest:
         if response.content:
             return orjson.loads(response.content)
         return None
+
+    # Streams the response body and yields the elements of the JSON array at
+    # `path` as they arrive. Values of the top-level keys in `capture` are left
+    # in self.captured once the body has been read.
+    async def stream(
+        self, path, capture=(), headers=None, data=None, params=None, **kwargs
+    ):
+        headers, data = self._prepare(headers, data, kwargs)
+        async with self.client.stream(
+            method=self.http_method,
+            url=self.url,
+            headers=headers,
+            params=params,
+            data=data,
+            **kwargs,
+        ) as response:
+            self.response = response
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+
+            parser = JsonStreamParser(path, capture)
+            self.bytes_received = 0
+            async for chunk in response.aiter_bytes():
+                self.bytes_received += len(chunk)
+                for item in parser.feed(chunk):
+                    yield item
+            parser.close()
+            self.captured = parser.captured
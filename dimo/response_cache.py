@@ -0,0 +1,278 @@
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from typing import Optional
+
+import orjson
+
+from dimo.cache import SingleFlight, TTLCache
+from dimo.tokens import token_identity
+
+# TTLs (seconds) for read-mostly operations, keyed by the operation names used
+# in metrics: endpoint names for REST calls, operation names for GraphQL queries
+READ_MOSTLY_TTLS = {
+    "device_definitions.search_device_definitions": 3600.0,
+    "device_definitions.decode_vin": 86400.0,
+    "valuations.get_valuations": 3600.0,
+    "MMYByTokenID": 3600.0,
+}
+
+
+def _jsonable(value):
+    if isinstance(value, bytes):
+        return value.decode("latin-1")
+    return str(value)
+
+
+# Derives the cache key of a request from its service, path, query params, body
+# (which holds the GraphQL query and variables) and the identity of its token
+def response_key(service: str, path: str, request_kwargs: dict) -> str:
+    headers = request_kwargs.get("headers") or {}
+    authorization = headers.get("Authorization", "")
+    identity = token_identity(authorization[7:]) if authorization else None
+    data = request_kwargs.get("data")
+    if isinstance(data, bytes):
+        data = data.decode("latin-1")
+    material = orjson.dumps(
+        [service, path, request_kwargs.get("params"), data, identity],
+        default=_jsonable,
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+    )
+    return hashlib.sha256(material).hexdigest()
+
+
+class MemoryBackend:
+    # In-process LRU; cached responses are shared objects and must not be mutated
+    def __init__(self, maxsize: int = 4096, clock=time.time):
+        self._cache = TTLCache(maxsize, clock=clock)
+
+    async def get(self, key):
+        return self._cache.get(key)
+
+    async def set(self, key, value, fresh_until: float, stale_until: float):
+        self._cache.set(key, (value, fresh_until), stale_until)
+
+    async def delete(self, key):
+        self._cache.pop(key)
+
+    async def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class SQLiteBackend:
+    # Durable cache in a SQLite file, shareable between processes. Queries run in
+    # `executor` (None uses the loop's default thread pool) to keep disk I/O off
+    # the event loop; the least recently used rows beyond `maxsize` are evicted.
+    # Hits are plain reads: access times are kept in memory and written in
+    # batches, with the next write or every `touch_batch` hits.
+    def __init__(
+        self,
+        path: str,
+        maxsize: int = 100000,
+        executor=None,
+        clock=time.time,
+        table: str = "responses",
+        touch_batch: int = 256,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.path = path
+        self.maxsize = maxsize
+        self.executor = executor
+        self._clock = clock
+        self._table = table
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.touch_batch = touch_batch
+        self._touched = {}
+        self._hits = 0
+        # Imported here so `import dimo` does not load sqlite3
+        import sqlite3
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, fresh_until REAL NOT NULL,"
+                " stale_until REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed)"
+            )
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    # Expired rows are left to eviction rather than deleted by the reader
+    def _get(self, key):
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, fresh_until, stale_until FROM {self._table} WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or row[2] <= now:
+                return None
+            self._touched[key] = now
+            self._hits += 1
+            if self._hits >= self.touch_batch:
+                with self._conn:
+                    self._flush_touched()
+        return orjson.loads(row[0]), row[1]
+
+    # Writes the pending access times; call inside a transaction
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                f"UPDATE {self._table} SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()],
+            )
+            self._touched = {}
+        self._hits = 0
+
+    def _set(self, key, value, fresh_until, stale_until):
+        now = self._clock()
+        with self._lock, self._conn:
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?, ?, ?)",
+                (key, orjson.dumps(value), fresh_until, stale_until, now),
+            )
+            self._writes += 1
+            # Counting rows is a table scan, so eviction runs every few writes
+            if self._writes % 64 == 0:
+                self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute(f"DELETE FROM {self._table} WHERE stale_until <= ?", (now,))
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()
+        if count > self.maxsize:
+            self._conn.execute(
+                f"DELETE FROM {self._table} WHERE key IN (SELECT key FROM "
+                f"{self._table} ORDER BY accessed LIMIT ?)",
+                (count - self.maxsize,),
+            )
+
+    def _delete(self, key):
+        with self._lock, self._conn:
+            self._touched.pop(key, None)
+            self._conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+
+    def _clear(self):
+        with self._lock, self._conn:
+            self._touched = {}
+            self._conn.execute(f"DELETE FROM {self._table}")
+
+    async def get(self, key):
+        return await self._run(self._get, key)
+
+    async def set(self, key, value, fresh_until: float, stale_until: float):
+        await self._run(self._set, key, value, fresh_until, stale_until)
+
+    async def delete(self, key):
+        await self._run(self._delete, key)
+
+    async def clear(self):
+        await self._run(self._clear)
+
+    def close(self):
+        with self._lock:
+            with self._conn:
+                self._flush_touched()
+            self._conn.close()
+
+
+class RedisBackend:
+    # Stores entries in any client with the redis.asyncio interface (get, set with
+    # `ex`, delete, scan_iter). Redis expires entries itself; size bounds and LRU
+    # eviction come from the server's maxmemory policy.
+    def __init__(self, client, prefix: str = "dimo:response:", clock=time.time):
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock
+
+    async def get(self, key):
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        value, fresh_until = orjson.loads(raw)
+        return value, fresh_until
+
+    async def set(self, key, value, fresh_until: float, stale_until: float):
+        ttl = max(1, math.ceil(stale_until - self._clock()))
+        await self.client.set(
+            self.prefix + key, orjson.dumps([value, fresh_until]), ex=ttl
+        )
+
+    async def delete(self, key):
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+
+class ResponseCache:
+    # Opt-in cache for idempotent reads, enabled with DIMO(response_cache=...).
+    # Only operations listed in `ttls` (or every operation when `default_ttl` is
+    # set) are cached. After its TTL an entry stays servable for `stale_ttl`
+    # seconds while one background request refreshes it, so readers never wait
+    # on a refresh. Responses carrying GraphQL errors are not stored.
+    def __init__(
+        self,
+        backend=None,
+        ttls: Optional[dict] = None,
+        default_ttl: Optional[float] = None,
+        stale_ttl: float = 300.0,
+        clock=time.time,
+    ):
+        self.backend = backend if backend is not None else MemoryBackend(clock=clock)
+        self.ttls = dict(READ_MOSTLY_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._flight = SingleFlight()
+
+    def ttl(self, operation: Optional[str]) -> Optional[float]:
+        return self.ttls.get(operation, self.default_ttl)
+
+    async def _fetch_and_store(self, key, ttl, fetch):
+        response = await fetch()
+        if isinstance(response, dict) and response.get("errors"):
+            return response
+        fresh_until = self._clock() + ttl
+        await self.backend.set(key, response, fresh_until, fresh_until + self.stale_ttl)
+        return response
+
+    # Returns the cached response for key, calling fetch() on a miss. `hooks`
+    # receives cache_hit/cache_miss events.
+    async def get_or_fetch(self, key, ttl: float, fetch, hooks=None):
+        entry = await self.backend.get(key)
+        if entry is not None:
+            response, fresh_until = entry
+            if hooks:
+                hooks.emit("cache_hit", cache="response")
+            if self._clock() >= fresh_until and key not in self._flight:
+                self._flight.start(key, lambda: self._fetch_and_store(key, ttl, fetch))
+            return response
+
+        if hooks:
+            hooks.emit("cache_miss", cache="response")
+        return await self._flight.do(
+            key, lambda: self._fetch_and_store(key, ttl, fetch)
+        )
+
+    async def invalidate(self, key):
+        await self.backend.delete(key)
+
+    async def clear(self):
+        self._flight.cancel_all()
+        await self.backend.clear()
@@ -0,0 +1,101 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from httpx import ConnectError, ConnectTimeout, HTTPStatusError, PoolTimeout
+from httpx import TransportError
+
+from dimo.request import TRANSIENT_STATUS_CODES
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# POST endpoints that only read or issue short-lived credentials, so repeating
+# them has no side effects
+IDEMPOTENT_ENDPOINTS = frozenset(
+    {
+        ("Auth", "/auth/web3/generate_challenge"),
+        ("DeviceDefinitions", "/device-definitions/decode-vin"),
+        ("TokenExchange", "/v1/tokens/exchange"),
+    }
+)
+
+# Errors raised before the request reached the server are always safe to retry
+_NOT_SENT_ERRORS = (ConnectError, ConnectTimeout, PoolTimeout)
+
+
+# Parses a Retry-After header given in seconds or as an HTTP date
+def parse_retry_after(value: Optional[str], now=None) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, retry_at.timestamp() - now)
+
+
+class RetryPolicy:
+    # Retries transient failures with capped exponential backoff and full jitter.
+    # Non-idempotent requests are only retried when the server cannot have acted
+    # on them: connection failures and 429 responses.
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        jitter: bool = True,
+        retry_statuses=TRANSIENT_STATUS_CODES,
+        respect_retry_after: bool = True,
+        max_retry_after: float = 60.0,
+        random=random.random,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self._random = random
+
+    @staticmethod
+    def is_idempotent(http_method: str, service: str, path: str) -> bool:
+        return (
+            http_method.upper() in IDEMPOTENT_METHODS
+            or (service, path) in IDEMPOTENT_ENDPOINTS
+        )
+
+    # `attempt` counts from 0 for the first try
+    def should_retry(
+        self, error: BaseException, attempt: int, idempotent: bool
+    ) -> bool:
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if isinstance(error, _NOT_SENT_ERRORS):
+            return True
+        if isinstance(error, TransportError):
+            return idempotent
+        if isinstance(error, HTTPStatusError):
+            status = error.response.status_code
+            if status not in self.retry_statuses:
+                return False
+            return idempotent or status == 429
+        return False
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_cap, self.backoff_base * 2**attempt)
+        return delay * self._random() if self.jitter else delay
+
+    def delay(self, error: BaseException, attempt: int) -> float:
+        if self.respect_retry_after and isinstance(error, HTTPStatusError):
+            retry_after = parse_retry_after(error.response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+        return self.backoff(attempt)
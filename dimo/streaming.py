@@ -0,0 +1,158 @@
+import re
+from typing import Iterable, List
+
+import orjson
+
+from dimo.errors import DimoValueError
+
+_STRUCTURAL = re.compile(rb'[{}\[\]",:]')
+_WHITESPACE = b" \t\r\n"
+
+
+def _string_end(buffer, start):
+    # Index of the quote closing the string that starts at `start`, or -1 if the
+    # buffer ends first
+    end = buffer.find(b'"', start)
+    while end != -1:
+        backslashes = 0
+        while buffer[end - 1 - backslashes] == 0x5C:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end
+        end = buffer.find(b'"', end + 1)
+    return -1
+
+
+class _Frame:
+    __slots__ = ("is_object", "key", "target")
+
+    def __init__(self, is_object, target=False):
+        self.is_object = is_object
+        self.key = None
+        self.target = target
+
+
+class JsonStreamParser:
+    # Incrementally decodes the elements of the array found at `path` (a tuple of
+    # object keys, e.g. ("data", "signals")) from a JSON document fed in chunks.
+    # Only the element being read is buffered, so memory stays flat however long
+    # the array is. The values of the top-level keys in `capture` (e.g. GraphQL
+    # "errors") are decoded into `captured`.
+    def __init__(self, path: Iterable[str], capture: Iterable[str] = ()):
+        self.path = tuple(path)
+        self.capture = frozenset(capture)
+        self.captured = {}
+        self._buffer = b""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._key = None
+        self._item_start = None
+        self._capture_key = None
+        self._capture_start = None
+        self._finished = False
+
+    def _is_target(self):
+        stack = self._stack
+        if len(stack) != len(self.path):
+            return False
+        return all(
+            frame.is_object and frame.key == key for frame, key in zip(stack, self.path)
+        )
+
+    def _decode(self, start, end):
+        segment = self._buffer[start:end].strip(_WHITESPACE)
+        return orjson.loads(segment) if segment else None
+
+    def feed(self, chunk: bytes) -> list:
+        if self._finished and chunk.strip(_WHITESPACE):
+            raise DimoValueError("Unexpected data after the end of the JSON document")
+        buffer = self._buffer = self._buffer + chunk
+        stack = self._stack
+        items = []
+        pos = self._pos
+        while True:
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            index = match.start()
+            char = buffer[index]
+            if char == 0x22:  # "
+                end = _string_end(buffer, index + 1)
+                if end == -1:
+                    # Resume at the opening quote once more bytes arrive
+                    pos = index
+                    break
+                if stack and stack[-1].is_object:
+                    self._key = buffer[index : end + 1]
+                pos = end + 1
+                continue
+
+            pos = index + 1
+            top = stack[-1] if stack else None
+            if char == 0x3A:  # :
+                if top is None or not top.is_object or self._key is None:
+                    raise DimoValueError(f"Malformed JSON at byte {index}")
+                top.key = orjson.loads(self._key)
+                if len(stack) == 1 and top.key in self.capture:
+                    self._capture_key = top.key
+                    self._capture_start = pos
+            elif char == 0x2C:  # ,
+                if top is None:
+                    raise DimoValueError(f"Malformed JSON at byte {index}")
+                if top.target:
+                    item = self._decode(self._item_start, index)
+                    items.append(item)
+                    self._item_start = pos
+                elif self._capture_start is not None and len(stack) == 1:
+                    self._finish_capture(index)
+            elif char == 0x5B or char == 0x7B:  # [ {
+                target = char == 0x5B and self._item_start is None and self._is_target()
+                stack.append(_Frame(char == 0x7B, target))
+                if target:
+                    self._item_start = pos
+            else:  # ] }
+                if top is None or top.is_object != (char == 0x7D):
+                    raise DimoValueError(f"Malformed JSON at byte {index}")
+                if top.target:
+                    segment = buffer[self._item_start : index].strip(_WHITESPACE)
+                    if segment:
+                        items.append(orjson.loads(segment))
+                    self._item_start = None
+                elif self._capture_start is not None and len(stack) == 1:
+                    self._finish_capture(index)
+                stack.pop()
+                if not stack:
+                    self._finished = True
+
+        # Drop everything that no pending element or captured value still needs
+        keep = pos
+        for start in (self._item_start, self._capture_start):
+            if start is not None:
+                keep = min(keep, start)
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._item_start is not None:
+            self._item_start -= keep
+        if self._capture_start is not None:
+            self._capture_start -= keep
+        return items
+
+    def _finish_capture(self, end):
+        self.captured[self._capture_key] = self._decode(self._capture_start, end)
+        self._capture_key = None
+        self._capture_start = None
+
+    # Checks that no array or object was left open
+    def close(self):
+        if self._stack:
+            raise DimoValueError("JSON document ended unexpectedly")
+
+
+# Decodes the elements at `path` from an async iterable of byte chunks
+async def iter_json_items(chunks, path, capture=()):
+    parser = JsonStreamParser(path, capture)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    parser.close()
@@ -0,0 +1,178 @@
+import asyncio
+import functools
+import inspect
+import os
+import threading
+from typing import Optional
+
+from .dimo import DIMO as AsyncDIMO
+
+
+class LoopThread:
+    # An event loop running forever in a daemon thread. Coroutines submitted from
+    # any other thread run on it, so connection pools, caches and rate limiters
+    # bound to the loop are shared by every calling thread.
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="dimo-sync-loop", daemon=True
+        )
+        self._thread.start()
+
+    # Awaits `awaitable` on the loop and returns its result
+    def run(self, awaitable, timeout: Optional[float] = None):
+        if threading.get_ident() == self._thread.ident:
+            close = getattr(awaitable, "close", None)
+            if close is not None:
+                close()
+            raise RuntimeError(
+                "The synchronous DIMO client cannot be called from its own event loop"
+            )
+        future = asyncio.run_coroutine_threadsafe(_resolve(awaitable), self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Timeouts and KeyboardInterrupt stop the call on the loop as well
+            future.cancel()
+            raise
+
+    def stop(self):
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_shared = None
+_shared_pid = None
+_shared_lock = threading.Lock()
+
+
+# The process-wide loop thread, started on first use and again in forked
+# children (e.g. Celery prefork workers), where the parent's thread is gone
+def shared_loop() -> LoopThread:
+    global _shared, _shared_pid
+    with _shared_lock:
+        if _shared is None or _shared_pid != os.getpid():
+            _shared = LoopThread()
+            _shared_pid = os.getpid()
+        return _shared
+
+
+async def _resolve(awaitable):
+    # Awaits until the result is no longer awaitable, which also covers methods
+    # that return an un-awaited coroutine
+    result = await awaitable
+    while inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+# Iterates an async iterator from synchronous code, one element per round trip
+def _iterate(runner, iterator):
+    try:
+        while True:
+            try:
+                yield runner.run(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            runner.run(aclose())
+
+
+# Whether instances of cls expose coroutine or async generator methods
+@functools.lru_cache(maxsize=None)
+def _has_async_api(cls) -> bool:
+    return any(
+        inspect.iscoroutinefunction(value) or inspect.isasyncgenfunction(value)
+        for name, value in inspect.getmembers(cls)
+        if not name.startswith("__")
+    )
+
+
+def _blocking_result(runner, result):
+    if inspect.isawaitable(result):
+        result = runner.run(result)
+    if hasattr(result, "__anext__"):
+        return _iterate(runner, result)
+    if _has_async_api(type(result)):
+        return Blocking(result, runner)
+    return result
+
+
+class Blocking:
+    # Blocking view of an async SDK object: coroutine methods run on `runner` and
+    # return their result, async generators become plain iterators, and
+    # sub-clients (or other objects with async methods) are wrapped the same way.
+    # Plain attributes are read from and written to the wrapped object.
+    def __init__(self, target, runner: LoopThread):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_runner", runner)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        runner = self._runner
+        if callable(attribute) and not inspect.isclass(attribute):
+
+            @functools.wraps(attribute)
+            def blocking(*args, **kwargs):
+                return _blocking_result(runner, attribute(*args, **kwargs))
+
+            self.__dict__[name] = blocking
+            return blocking
+        if _has_async_api(type(attribute)):
+            wrapped = Blocking(attribute, runner)
+            self.__dict__[name] = wrapped
+            return wrapped
+        return attribute
+
+    def __setattr__(self, name, value):
+        self.__dict__.pop(name, None)
+        setattr(self._target, name, value)
+
+    def __dir__(self):
+        return sorted(set(dir(self._target)) | set(self.__dict__))
+
+    def __repr__(self):
+        return f"<blocking {self._target!r}>"
+
+
+class DIMO(Blocking):
+    # Synchronous DIMO client for threaded code such as Django views or Celery
+    # tasks. It takes the same arguments as dimo.DIMO and exposes every method
+    # of it and its sub-clients as a blocking call:
+    #
+    #   dimo = DIMO("Production")
+    #   auth = dimo.auth.get_token(client_id=..., domain=..., private_key=...)
+    #   signals = dimo.telemetry.get_signals_latest(vehicle_jwt, token_id)
+    #
+    # All instances run on one background event loop, so each keeps a warm
+    # connection pool that every thread shares. Streaming methods return plain
+    # iterators; close them (or exhaust them) to release the connection.
+    def __init__(self, *args, runner: Optional[LoopThread] = None, **kwargs):
+        super().__init__(AsyncDIMO(*args, **kwargs), runner or shared_loop())
+
+    # The underlying async client, e.g. for the dimo.fleet helpers
+    @property
+    def async_client(self) -> AsyncDIMO:
+        return self._target
+
+    # Runs a coroutine on the client's loop and returns its result
+    def run(self, coroutine, timeout: Optional[float] = None):
+        return self._runner.run(coroutine, timeout)
+
+    # Iterates an async iterator (e.g. from dimo.fleet) on the client's loop
+    def iterate(self, iterator):
+        return _iterate(self._runner, iterator)
+
+    def close(self):
+        self._runner.run(self._target.aclose())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,241 @@
+import base64
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Optional
+
+import orjson
+
+from dimo.cache import SingleFlight, TTLCache
+from dimo.errors import DimoValueError
+
+
+# Returns the payload claims of a JWT without verifying its signature
+def decode_jwt_claims(token: str) -> dict:
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = orjson.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError) as error:
+        raise DimoValueError(f"Could not decode JWT claims: {error}") from error
+    if not isinstance(claims, dict):
+        raise DimoValueError("JWT payload is not a JSON object")
+    return claims
+
+
+# Returns the exp claim of a JWT as a unix timestamp, or None if it has none
+def jwt_expiry(token: str) -> Optional[float]:
+    try:
+        exp = decode_jwt_claims(token).get("exp")
+    except DimoValueError:
+        return None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+# Claims that change whenever a token is re-issued without changing what it grants
+TIME_CLAIMS = frozenset({"exp", "iat", "nbf", "jti"})
+
+
+# Identifies what a bearer token grants: a hash of all its claims except the
+# time claims, so re-issued tokens of the same holder and privileges map to the
+# same identity while any other difference (privilege_ids, scope, ...) does
+# not. Tokens without readable claims are identified by their hash.
+@lru_cache(maxsize=4096)
+def token_identity(token: str) -> str:
+    try:
+        claims = decode_jwt_claims(token)
+    except DimoValueError:
+        claims = {}
+    if not claims:
+        return hashlib.sha256(token.encode()).hexdigest()
+    material = {
+        name: value for name, value in claims.items() if name not in TIME_CLAIMS
+    }
+    return hashlib.sha256(
+        orjson.dumps(material, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+
+
+def _emit(hooks, event, **fields):
+    if hooks:
+        hooks.emit(event, **fields)
+
+
+# Emits a token_refresh event with the duration (and error) of the wrapped fetch
+@asynccontextmanager
+async def _timed_refresh(hooks, kind):
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as raised:
+        error = raised
+        raise
+    finally:
+        _emit(
+            hooks,
+            "token_refresh",
+            kind=kind,
+            duration=time.perf_counter() - started,
+            error=error,
+        )
+
+
+class DeveloperTokenManager:
+    # Caches developer JWTs per (client_id, domain, address, scope) and refreshes
+    # them in the background once they enter the refresh margin before expiry
+    def __init__(
+        self, fetch_token, refresh_margin: float = 60.0, clock=time.time, hooks=None
+    ):
+        self._fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self.hooks = hooks
+        self._tokens = {}
+        self._flight = SingleFlight()
+
+    def _expires_at(self, response):
+        if not isinstance(response, dict):
+            return None
+        access_token = response.get("access_token")
+        if isinstance(access_token, str):
+            expiry = jwt_expiry(access_token)
+            if expiry is not None:
+                return expiry
+        expires_in = response.get("expires_in")
+        if isinstance(expires_in, (int, float)):
+            return self._clock() + expires_in
+        return None
+
+    async def _refresh(self, key, fetch):
+        async with _timed_refresh(self.hooks, "developer"):
+            response = await fetch()
+        expires_at = self._expires_at(response)
+        if expires_at is not None:
+            self._tokens[key] = (response, expires_at)
+        return response
+
+    async def get(
+        self,
+        client_id: str,
+        domain: str,
+        private_key: str,
+        address: Optional[str] = None,
+        scope: str = "openid email",
+        response_type: str = "code",
+    ) -> dict:
+        if address is None:
+            address = client_id
+        key = (client_id, domain, address, scope)
+
+        async def fetch():
+            return await self._fetch_token(
+                client_id=client_id,
+                domain=domain,
+                private_key=private_key,
+                address=address,
+                scope=scope,
+                response_type=response_type,
+            )
+
+        entry = self._tokens.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            now = self._clock()
+            if now < expires_at - self.refresh_margin:
+                _emit(self.hooks, "cache_hit", cache="developer_token")
+                return response
+            if now < expires_at:
+                _emit(self.hooks, "cache_hit", cache="developer_token")
+                # Still valid: serve it and refresh without blocking the caller
+                self._flight.start(key, lambda: self._refresh(key, fetch))
+                return response
+            del self._tokens[key]
+
+        _emit(self.hooks, "cache_miss", cache="developer_token")
+        return await self._flight.do(key, lambda: self._refresh(key, fetch))
+
+    def invalidate(
+        self, client_id: str, domain: str, address=None, scope="openid email"
+    ):
+        self._tokens.pop((client_id, domain, address or client_id, scope), None)
+
+    # Drops all cached tokens and cancels pending refreshes
+    def clear(self):
+        self._tokens.clear()
+        self._flight.cancel_all()
+
+
+class VehicleTokenCache:
+    # LRU/TTL cache of vehicle JWTs keyed by (developer identity, token_id,
+    # sorted privileges, env); entries expire refresh_margin before their exp claim
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        refresh_margin: float = 30.0,
+        clock=time.time,
+        hooks=None,
+    ):
+        self.refresh_margin = refresh_margin
+        self.hooks = hooks
+        self._cache = TTLCache(maxsize, clock=clock)
+        self._flight = SingleFlight()
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    # Identifies the developer behind a JWT so re-issued developer tokens share entries
+    @staticmethod
+    def developer_identity(developer_jwt: str):
+        try:
+            claims = decode_jwt_claims(developer_jwt)
+        except DimoValueError:
+            claims = {}
+        subject = claims.get("sub")
+        if subject:
+            return (claims.get("iss"), subject, str(claims.get("aud")))
+        return hashlib.sha256(developer_jwt.encode()).hexdigest()
+
+    def key(self, developer_jwt: str, token_id: int, privileges, env: str):
+        return (
+            self.developer_identity(developer_jwt),
+            token_id,
+            tuple(sorted(privileges)),
+            env,
+        )
+
+    async def _fetch_and_store(self, key, fetch):
+        async with _timed_refresh(self.hooks, "vehicle"):
+            response = await fetch()
+        token = response.get("token") if isinstance(response, dict) else None
+        expiry = jwt_expiry(token) if isinstance(token, str) else None
+        if expiry is not None:
+            self._cache.set(key, response, expiry - self.refresh_margin)
+        return response
+
+    async def get_or_fetch(
+        self, developer_jwt: str, token_id: int, privileges, env, fetch
+    ):
+        key = self.key(developer_jwt, token_id, privileges, env)
+        response = self._cache.get(key)
+        if response is not None:
+            _emit(self.hooks, "cache_hit", cache="vehicle_token")
+            return response
+        _emit(self.hooks, "cache_miss", cache="vehicle_token")
+        return await self._flight.do(key, lambda: self._fetch_and_store(key, fetch))
+
+    def invalidate(self, developer_jwt: str, token_id: int, privileges, env):
+        self._cache.pop(self.key(developer_jwt, token_id, privileges, env))
+
+    def clear(self):
+        self._cache.clear()
+        self._flight.cancel_all()
@@ -0,0 +1,92 @@
+import time
+from typing import Optional
+
+from dimo.cache import SingleFlight
+from dimo.response_cache import SQLiteBackend
+
+DEFAULT_TTL = 90 * 86400.0
+
+
+# Returns the part of a 17-character VIN that determines its decoded definition:
+# WMI and VDS (positions 1-8) plus the model year (position 10). The check digit,
+# plant code and serial number are dropped. Other VINs have no pattern.
+def vin_pattern(vin: str) -> Optional[str]:
+    if len(vin) != 17:
+        return None
+    return vin[:8] + vin[9]
+
+
+def normalize_vin(vin: str) -> str:
+    return vin.strip().upper()
+
+
+class VinDecodeCache:
+    # Durable cache of decode_vin responses in a SQLite file that several
+    # processes can share. With `match_pattern`, a VIN whose WMI, VDS and model
+    # year were decoded before is answered from that entry without a request.
+    # Any object with the SQLiteBackend get/set interface can be used as backend.
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        backend=None,
+        ttl: float = DEFAULT_TTL,
+        match_pattern: bool = True,
+        clock=time.time,
+    ):
+        if backend is None:
+            if path is None:
+                raise ValueError("VinDecodeCache needs a path or a backend")
+            backend = SQLiteBackend(path, maxsize=10_000_000, table="vin_decodes")
+        self.backend = backend
+        self.ttl = ttl
+        self.match_pattern = match_pattern
+        self._clock = clock
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def _keys(self, country_code: str, vin: str):
+        vin = normalize_vin(vin)
+        keys = [f"vin:{country_code}:{vin}"]
+        pattern = vin_pattern(vin) if self.match_pattern else None
+        if pattern is not None:
+            keys.append(f"pattern:{country_code}:{pattern}")
+        return keys
+
+    async def get(self, country_code: str, vin: str):
+        for key in self._keys(country_code, vin):
+            entry = await self.backend.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0]
+        self.misses += 1
+        return None
+
+    async def set(self, country_code: str, vin: str, response):
+        expires_at = self._clock() + self.ttl
+        for key in self._keys(country_code, vin):
+            await self.backend.set(key, response, expires_at, expires_at)
+
+    # Returns the cached response or awaits fetch(); concurrent lookups of VINs
+    # sharing a pattern wait for one request
+    async def get_or_fetch(self, country_code: str, vin: str, fetch):
+        response = await self.get(country_code, vin)
+        if response is not None:
+            return response
+        flight_key = self._keys(country_code, vin)[-1]
+
+        async def fetch_and_store():
+            response = await fetch()
+            if response is not None:
+                await self.set(country_code, vin, response)
+            return response
+
+        return await self._flight.do(flight_key, fetch_and_store)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,20 @@
+import base64
+
+import orjson
+
+
+# A clock for the cache, token and rate limiter tests; advance it by setting now
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# An unsigned JWT carrying `claims`
+def make_jwt(claims):
+    def encode(part):
+        return base64.urlsafe_b64encode(orjson.dumps(part)).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
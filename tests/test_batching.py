@@ -0,0 +1,206 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+from graphql import parse
+
+from dimo.graphql.batching import (
+    QueryBatcher,
+    is_batchable,
+    merge_queries,
+    split_response,
+)
+from dimo.graphql.telemetry import Telemetry
+
+SIGNALS_LATEST = """
+query GetSignalsLatest($tokenId: Int!) {
+    signalsLatest(tokenId: $tokenId) {
+        speed { timestamp value }
+    }
+}
+"""
+
+VIN = """
+query GetVIN($tokenId: Int!) {
+    vinVCLatest(tokenId: $tokenId) { vin }
+}
+"""
+
+
+def test_merge_queries_aliases_roots_and_variables():
+    """
+    Tests that merged documents alias every root field and variable per query
+    """
+    document, variables, alias_maps = merge_queries(
+        [(SIGNALS_LATEST, {"tokenId": 1}), (VIN, {"tokenId": 1})]
+    )
+
+    parse(document)
+    assert "b0_signalsLatest: signalsLatest(tokenId: $b0_tokenId)" in document
+    assert "b1_vinVCLatest: vinVCLatest(tokenId: $b1_tokenId)" in document
+    assert variables == {"b0_tokenId": 1, "b1_tokenId": 1}
+    assert alias_maps == [
+        {"b0_signalsLatest": "signalsLatest"},
+        {"b1_vinVCLatest": "vinVCLatest"},
+    ]
+
+
+def test_is_batchable():
+    """
+    Tests that mutations and multi-definition documents are not merged
+    """
+    assert is_batchable(SIGNALS_LATEST)
+    assert not is_batchable("mutation { doThing }")
+    assert not is_batchable("query { ...F } fragment F on Query { a }")
+    assert not is_batchable("not graphql {")
+
+
+def test_split_response_routes_data_and_errors():
+    """
+    Tests that data and path-scoped errors go back to the right query
+    """
+    response = {
+        "data": {"b0_signalsLatest": {"speed": 1}, "b1_vinVCLatest": None},
+        "errors": [
+            {"message": "no vc", "path": ["b1_vinVCLatest"]},
+            {"message": "global"},
+        ],
+    }
+    first, second = split_response(
+        response,
+        [{"b0_signalsLatest": "signalsLatest"}, {"b1_vinVCLatest": "vinVCLatest"}],
+    )
+
+    assert first == {
+        "data": {"signalsLatest": {"speed": 1}},
+        "errors": [{"message": "global"}],
+    }
+    assert second["data"] == {"vinVCLatest": None}
+    assert second["errors"][0] == {"message": "no vc", "path": ["vinVCLatest"]}
+
+
+@pytest.mark.asyncio
+async def test_batcher_coalesces_concurrent_queries():
+    """
+    Tests that concurrent queries with the same token become one request
+    """
+    dimo = AsyncMock()
+    dimo.schema_cache = None
+
+    async def respond(service, query, variables=None, token=None):
+        return {
+            "data": {
+                f"b{index}_signalsLatest": {"tokenId": variables[f"b{index}_tokenId"]}
+                for index in range(3)
+            }
+        }
+
+    dimo.query.side_effect = respond
+    batcher = QueryBatcher(dimo, "Telemetry", window=0.001)
+
+    results = await asyncio.gather(
+        *(
+            batcher.query(SIGNALS_LATEST, {"tokenId": token_id}, token="jwt")
+            for token_id in (10, 11, 12)
+        )
+    )
+
+    assert dimo.query.await_count == 1
+    assert [result["data"]["signalsLatest"]["tokenId"] for result in results] == [
+        10,
+        11,
+        12,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_at_max_size_and_per_token():
+    """
+    Tests that batches are split by size and never mix auth tokens
+    """
+    dimo = AsyncMock()
+    dimo.schema_cache = None
+    dimo.query.return_value = {"data": {}}
+    batcher = QueryBatcher(dimo, "Telemetry", window=0.001, max_size=2)
+
+    await asyncio.gather(
+        batcher.query(VIN, {"tokenId": 1}, token="a"),
+        batcher.query(VIN, {"tokenId": 2}, token="a"),
+        batcher.query(VIN, {"tokenId": 3}, token="a"),
+        batcher.query(VIN, {"tokenId": 4}, token="b"),
+    )
+
+    tokens = sorted(call.kwargs["token"] for call in dimo.query.await_args_list)
+    assert tokens == ["a", "a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_request_errors():
+    """
+    Tests that a failed batch request fails every waiting caller
+    """
+    dimo = AsyncMock()
+    dimo.schema_cache = None
+    dimo.query.side_effect = RuntimeError("boom")
+    batcher = QueryBatcher(dimo, "Telemetry", window=0.001)
+
+    results = await asyncio.gather(
+        batcher.query(VIN, {"tokenId": 1}, token="a"),
+        batcher.query(VIN, {"tokenId": 2}, token="a"),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batcher_cancels_callers_of_a_cancelled_send():
+    """
+    Tests that cancelling an in-flight batch request cancels its callers
+    """
+    started = asyncio.Event()
+
+    async def query(*args, **kwargs):
+        started.set()
+        await asyncio.Event().wait()
+
+    dimo = AsyncMock()
+    dimo.schema_cache = None
+    dimo.query.side_effect = query
+    batcher = QueryBatcher(dimo, "Telemetry", window=0.001)
+
+    callers = asyncio.gather(
+        batcher.query(VIN, {"tokenId": 1}, token="a"),
+        batcher.query(VIN, {"tokenId": 2}, token="a"),
+        return_exceptions=True,
+    )
+    await started.wait()
+    for task in list(batcher._sending):
+        task.cancel()
+    results = await asyncio.wait_for(callers, 1)
+
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert not batcher._sending
+
+
+@pytest.mark.asyncio
+async def test_telemetry_batch_context():
+    """
+    Tests that Telemetry calls inside batch() share one request
+    """
+    dimo = AsyncMock()
+    dimo.schema_cache = None
+    dimo.query.return_value = {
+        "data": {"b0_signalsLatest": {"speed": None}, "b1_vinVCLatest": {"vin": "X"}}
+    }
+    telemetry = Telemetry(dimo)
+
+    async with telemetry.batch(window=0.001):
+        latest, vin = await asyncio.gather(
+            telemetry.get_signals_latest("jwt", 1),
+            telemetry.get_vehicle_vin_vc("jwt", 1),
+        )
+
+    assert dimo.query.await_count == 1
+    assert latest == {"data": {"signalsLatest": {"speed": None}}}
+    assert vin == {"data": {"vinVCLatest": {"vin": "X"}}}
@@ -0,0 +1,90 @@
+import pytest
+from graphql import parse
+from unittest.mock import AsyncMock
+
+from dimo.errors import DimoValueError
+from dimo.graphql.builder import AGG, render_signals_document
+from dimo.graphql.telemetry import Telemetry
+
+SIGNAL_FIELDS = {
+    "data": {
+        "__type": {
+            "fields": [
+                {"name": "timestamp"},
+                {"name": "speed"},
+                {"name": "powertrainRange"},
+            ]
+        }
+    }
+}
+
+
+def make_telemetry(*responses):
+    dimo = AsyncMock()
+    dimo.schema_cache = None
+    dimo.query = AsyncMock(side_effect=list(responses))
+    return Telemetry(dimo)
+
+
+def test_document_contains_only_selected_fields():
+    """
+    Tests that the document selects exactly the requested aggregations
+    """
+    telemetry = make_telemetry()
+    query = telemetry.signals(1, "1h", "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z")
+
+    document = query.select(speed=AGG.MAX, avgSpeed=("speed", "AVG")).document
+
+    parse(document)
+    assert "speed(agg: MAX)" in document
+    assert "avgSpeed: speed(agg: AVG)" in document
+    assert "powertrainRange" not in document
+    assert "filter" not in document
+    assert (
+        query.select(speed=AGG.MAX)
+        .where(source="autopi")
+        .document.count('filter: {source: "autopi"}')
+        == 1
+    )
+
+
+def test_documents_cached_per_shape():
+    """
+    Tests that queries of the same shape reuse the rendered document
+    """
+    telemetry = make_telemetry()
+    render_signals_document.cache_clear()
+
+    for token_id in range(5):
+        telemetry.signals(token_id, "1h", "a", "b").select(speed=AGG.MAX).document
+
+    assert render_signals_document.cache_info().misses == 1
+    with pytest.raises(ValueError):
+        telemetry.signals(1, "1h", "a", "b").select(speed="MEAN")
+    with pytest.raises(DimoValueError):
+        telemetry.signals(1, "1h", "a", "b").document
+
+
+@pytest.mark.asyncio
+async def test_fetch_validates_signals_against_cached_schema():
+    """
+    Tests that signal names are checked against the schema loaded once
+    """
+    rows = {"data": {"signals": [{"timestamp": "t", "speed": 1.0}]}}
+    telemetry = make_telemetry(SIGNAL_FIELDS, rows)
+    query = telemetry.signals(7, "24h", "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z")
+
+    result = await query.select(speed=AGG.MAX).fetch("jwt")
+
+    assert result == rows
+    variables = telemetry.dimo.query.await_args.kwargs["variables"]
+    assert variables == {
+        "tokenId": 7,
+        "startDate": "2024-01-01T00:00:00Z",
+        "endDate": "2024-01-02T00:00:00Z",
+        "interval": "24h",
+    }
+
+    with pytest.raises(DimoValueError, match="fuelLevel"):
+        await query.select(fuelLevel=AGG.MIN).fetch("jwt")
+    assert telemetry.dimo.query.await_count == 2
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from dimo.cache import SingleFlight, TTLCache
+
+from helpers import FakeClock
+
+
+def test_ttl_cache_expiry():
+    """
+    Tests that entries disappear after their deadline
+    """
+    clock = FakeClock(0.0)
+    cache = TTLCache(maxsize=4, clock=clock)
+    cache.set("a", 1, expires_at=10)
+
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_lru_eviction():
+    """
+    Tests that the least recently used entry is evicted first
+    """
+    cache = TTLCache(maxsize=2, clock=FakeClock(0.0))
+    cache.set("a", 1, expires_at=10)
+    cache.set("b", 2, expires_at=10)
+    cache.get("a")
+    cache.set("c", 3, expires_at=10)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_invalid_size():
+    """
+    Tests that a non-positive size is rejected
+    """
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=0)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_join_cancels_when_all_waiters_leave():
+    """
+    Tests that the shared call survives one cancelled waiter but not all of them
+    """
+    flight = SingleFlight()
+    started = []
+
+    async def call():
+        started.append(True)
+        await asyncio.sleep(10)
+
+    first = asyncio.ensure_future(flight.join("key", call))
+    second = asyncio.ensure_future(flight.join("key", call))
+    await asyncio.sleep(0)
+    shared = flight.start("key", call)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not shared.cancelled() and not shared.done()
+
+    second.cancel()
+    await asyncio.gather(shared, return_exceptions=True)
+    assert shared.cancelled()
+    assert len(started) == 1
+    assert "key" not in flight
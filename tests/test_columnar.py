@@ -0,0 +1,71 @@
+import httpx
+import pytest
+
+from dimo import DIMO
+from dimo.columnar import ColumnBuilder, to_numpy
+from dimo.errors import DimoValueError
+
+ROWS = [
+    {"timestamp": "2024-01-01T00:00:00Z", "avgSpeed": 42.5},
+    {"timestamp": "2024-01-02T00:00:00Z", "avgSpeed": None},
+    {"timestamp": "2024-01-03T00:00:00Z", "avgSpeed": 40, "powertrainType": "BEV"},
+]
+
+
+def test_column_builder_aligns_missing_fields():
+    """
+    Tests that fields missing from some rows are padded with None
+    """
+    columns = ColumnBuilder().extend(ROWS).build("columns")
+
+    assert columns == {
+        "timestamp": [row["timestamp"] for row in ROWS],
+        "avgSpeed": [42.5, None, 40],
+        "powertrainType": [None, None, "BEV"],
+    }
+
+
+def test_to_numpy_types():
+    """
+    Tests datetime64 timestamps, float values with NaN and object fallbacks
+    """
+    np = pytest.importorskip("numpy")
+
+    arrays = to_numpy(ColumnBuilder().extend(ROWS).columns)
+
+    assert arrays["timestamp"].dtype == np.dtype("datetime64[ms]")
+    assert arrays["timestamp"][0] == np.datetime64("2024-01-01T00:00:00")
+    assert arrays["avgSpeed"].dtype == np.float64
+    assert np.isnan(arrays["avgSpeed"][1])
+    assert arrays["powertrainType"].dtype == object
+
+
+@pytest.mark.asyncio
+async def test_telemetry_result_formats():
+    """
+    Tests the columnar result formats of the daily signal queries
+    """
+    body = {"data": {"signals": ROWS}}
+    dimo = DIMO(
+        env="Production",
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json=body)),
+    )
+    args = ("jwt", 1, "2024-01-01T00:00:00Z", "2024-01-04T00:00:00Z")
+
+    columns = await dimo.telemetry.get_daily_average_speed(
+        *args, result_format="columns"
+    )
+    assert columns["avgSpeed"] == [42.5, None, 40]
+
+    pd = pytest.importorskip("pandas")
+    frame = await dimo.telemetry.get_daily_max_speed(*args, result_format="pandas")
+    assert isinstance(frame, pd.DataFrame)
+    assert len(frame) == 3
+
+    pytest.importorskip("pyarrow")
+    table = await dimo.telemetry.get_daily_signals_autopi(*args, result_format="arrow")
+    assert table.num_rows == 3
+
+    with pytest.raises(DimoValueError):
+        await dimo.telemetry.get_daily_max_speed(*args, result_format="csv")
+    await dimo.aclose()
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from dimo.concurrency import bounded_as_completed
+
+
+@pytest.mark.asyncio
+async def test_bounded_as_completed_pulls_items_lazily():
+    """
+    Tests that items are only consumed as concurrency slots free up
+    """
+    consumed = []
+
+    def items():
+        for item in range(100):
+            consumed.append(item)
+            yield item
+
+    async def work(item):
+        await asyncio.sleep(0)
+        return item * 2
+
+    stream = bounded_as_completed(work, items(), concurrency=3)
+    item, result, error = await anext(stream)
+
+    assert result == item * 2 and error is None
+    assert len(consumed) <= 4
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_bounded_as_completed_cancels_on_close():
+    """
+    Tests that closing the stream early cancels running calls
+    """
+    started = []
+    cancelled = []
+
+    async def work(item):
+        started.append(item)
+        try:
+            if item == 0:
+                return item
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+
+    stream = bounded_as_completed(work, range(10), concurrency=3)
+    assert (await anext(stream))[0] == 0
+    await stream.aclose()
+
+    assert sorted(cancelled) == sorted(started[1:])
+
+
+@pytest.mark.asyncio
+async def test_bounded_as_completed_async_iterable_and_errors():
+    """
+    Tests async iterables and per-item errors
+    """
+
+    async def items():
+        for item in range(4):
+            yield item
+
+    async def work(item):
+        if item == 2:
+            raise ValueError("bad item")
+        return item
+
+    results = {
+        item: (result, error)
+        async for item, result, error in bounded_as_completed(
+            work, items(), concurrency=2
+        )
+    }
+
+    assert results[1] == (1, None)
+    assert isinstance(results[2][1], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_bounded_as_completed_invalid_concurrency():
+    """
+    Tests that concurrency must be positive
+    """
+    with pytest.raises(ValueError):
+        await anext(bounded_as_completed(asyncio.sleep, [1], concurrency=0))
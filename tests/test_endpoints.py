@@ -0,0 +1,57 @@
+import pytest
+
+from dimo import DIMO
+from dimo.endpoints import ENDPOINTS, TRIPS_TRIPS, compile_path, endpoints_for
+from dimo.errors import DimoTypeError, DimoValueError
+
+
+def test_endpoint_format():
+    """
+    Tests that endpoint paths format their typed placeholders
+    """
+    path = TRIPS_TRIPS.format(token_id=17)
+
+    assert path == "/v1/vehicle/17/trips"
+    assert path.endpoint is TRIPS_TRIPS
+    with pytest.raises(DimoTypeError):
+        TRIPS_TRIPS.format(token_id="17")
+
+
+def test_path_template_missing_params():
+    """
+    Tests strict and lenient handling of placeholders without a value
+    """
+    template = compile_path("/v1/:kind/:token_id")
+
+    assert template.names == ("kind", "token_id")
+    assert template.format({"kind": "vc", "token_id": 3}) == "/v1/vc/3"
+    assert template.format({"kind": "vc"}, strict=False) == "/v1/vc/:token_id"
+    with pytest.raises(DimoValueError):
+        template.format({"kind": "vc"})
+    assert compile_path("/v1/:kind/:token_id") is template
+
+
+def test_registry_covers_services():
+    """
+    Tests that registered endpoints can be looked up by name and service
+    """
+    assert ENDPOINTS["trips.trips"] is TRIPS_TRIPS
+    assert {endpoint.name for endpoint in endpoints_for("Attestation")} == {
+        "attestation.create_vin_vc",
+        "attestation.create_pom_vc",
+    }
+    dimo = DIMO("Production")
+    for endpoint in ENDPOINTS.values():
+        assert endpoint.service in dimo.urls
+
+
+def test_get_full_path_substitutes_params():
+    """
+    Tests that _get_full_path keeps supporting :name params
+    """
+    dimo = DIMO("Production")
+
+    assert (
+        dimo._get_full_path("Trips", "/v1/vehicle/:token_id/trips", {"token_id": 5})
+        == "https://trips-api.dimo.zone/v1/vehicle/5/trips"
+    )
@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from unittest.mock import AsyncMock
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from dimo.api.auth import Auth
+from dimo.eth_signer import EthSigner, _load_account
+
+PRIVATE_KEY = "4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318"
+ADDRESS = Account.from_key(PRIVATE_KEY).address
+
+
+def test_sign_message_recovers_address():
+    """
+    Tests that the signature recovers to the signing address
+    """
+    signature = EthSigner.sign_message("challenge", PRIVATE_KEY)
+
+    recovered = Account.recover_message(
+        encode_defunct(text="challenge"), signature=signature
+    )
+    assert signature.startswith("0x")
+    assert recovered == ADDRESS
+
+
+def test_account_cached_per_key():
+    """
+    Tests that the parsed account is reused across signatures
+    """
+    _load_account.cache_clear()
+    EthSigner.sign_message("one", PRIVATE_KEY)
+    EthSigner.sign_message("two", "0x" + PRIVATE_KEY)
+
+    info = _load_account.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_async_sign_matches_sync():
+    """
+    Tests that signing in an executor yields the same signature
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        signer = EthSigner(executor=executor)
+        signature = await signer.sign("challenge", PRIVATE_KEY)
+
+    assert signature == EthSigner.sign_message("challenge", PRIVATE_KEY)
+
+
+@pytest.mark.asyncio
+async def test_get_token_uses_external_signer():
+    """
+    Tests that Auth.get_token delegates signing to a pluggable signer
+    """
+    request = AsyncMock(
+        side_effect=[
+            {"challenge": "sign me", "state": "state"},
+            {"access_token": "jwt"},
+        ]
+    )
+    signer = AsyncMock()
+    signer.sign.return_value = "0xsignature"
+    auth = Auth(request, lambda token: {}, "Production", signer=signer)
+
+    result = await auth.get_token("client", "domain", "key")
+
+    assert result == {"access_token": "jwt"}
+    signer.sign.assert_awaited_once_with("sign me", "key")
+    assert "signature=0xsignature" in request.await_args_list[1].kwargs["data"]
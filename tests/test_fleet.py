@@ -0,0 +1,132 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+from dimo import DIMO
+from dimo.fleet import FleetProgress, map_vehicles, signals_latest
+from dimo.retry import RetryPolicy
+
+
+def fleet_transport(exchange_failures=None):
+    # Token exchange answers "jwt-<tokenId>"; Telemetry echoes the token it got.
+    # Token IDs in exchange_failures are refused with a 403.
+    exchange_failures = exchange_failures or set()
+
+    def handler(request):
+        if request.url.host.startswith("token-exchange"):
+            token_id = orjson.loads(request.content)["tokenId"]
+            if token_id in exchange_failures:
+                return httpx.Response(403, json={"message": "no access"})
+            return httpx.Response(200, json={"token": f"jwt-{token_id}"})
+        authorization = request.headers["Authorization"]
+        return httpx.Response(200, json={"data": {"jwt": authorization[7:]}})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_map_vehicles_pipelines_exchange_and_call():
+    """
+    Tests that every vehicle is queried with its own JWT and failures are reported
+    """
+    dimo = DIMO(
+        transport=fleet_transport({3}), retry_policy=RetryPolicy(max_attempts=1)
+    )
+    progress = []
+
+    results = [
+        result
+        async for result in signals_latest(
+            dimo, "dev", range(1, 6), concurrency=2, on_progress=progress.append
+        )
+    ]
+
+    by_token = {result.token_id: result for result in results}
+    assert set(by_token) == {1, 2, 3, 4, 5}
+    assert by_token[1].result == {"data": {"jwt": "jwt-1"}}
+    assert isinstance(by_token[3].error, httpx.HTTPStatusError)
+    assert progress[-1] == FleetProgress(succeeded=4, failed=1, in_flight=0)
+    assert [update.completed for update in progress] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_map_vehicles_bounds_work_and_pulls_ids_lazily():
+    """
+    Tests the concurrency limits and that token IDs are consumed on demand
+    """
+    dimo = DIMO(transport=fleet_transport())
+    consumed = []
+    running = 0
+    peak = 0
+
+    def token_ids():
+        for token_id in range(1_000_000):
+            consumed.append(token_id)
+            yield token_id
+
+    async def call(vehicle_jwt, token_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return vehicle_jwt
+
+    results = map_vehicles(dimo, "dev", token_ids(), call, concurrency=4)
+    seen = [await anext(results) for _ in range(10)]
+    await results.aclose()
+
+    assert all(result.result == f"jwt-{result.token_id}" for result in seen)
+    assert peak <= 4
+    assert len(consumed) <= 14
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_cancels_running_calls():
+    """
+    Tests that leaving the loop early cancels the vehicles in progress
+    """
+    dimo = DIMO(transport=fleet_transport())
+    cancelled = []
+
+    async def call(vehicle_jwt, token_id):
+        if token_id == 0:
+            await asyncio.sleep(0.01)
+            return "fast"
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(token_id)
+            raise
+
+    results = map_vehicles(dimo, "dev", range(5), call, concurrency=3)
+    async for result in results:
+        assert result.result == "fast"
+        break
+    await results.aclose()
+
+    assert sorted(cancelled) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_exchanges_use_the_client_retry_policy_only():
+    """
+    Tests that a vehicle whose exchange keeps failing costs max_attempts requests
+    """
+    attempts = []
+
+    def handler(request):
+        attempts.append(orjson.loads(request.content)["tokenId"])
+        return httpx.Response(503)
+
+    dimo = DIMO(
+        transport=httpx.MockTransport(handler),
+        retry_policy=RetryPolicy(max_attempts=3, backoff_base=0),
+    )
+
+    results = [result async for result in signals_latest(dimo, "dev", [7])]
+
+    assert isinstance(results[0].error, httpx.HTTPStatusError)
+    assert attempts == [7, 7, 7]
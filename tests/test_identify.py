@@ -1,7 +1,11 @@
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock
 
 from dimo import DIMO
+from dimo.errors import DimoGraphQLError
+from dimo.graphql import identity
 from dimo.graphql.identity import Identity
 
 
@@ -66,28 +70,8 @@ async def test_list_vehicle_definitions_per_address(identity_instance):
     assert result == mock_response
     identity_instance.dimo.query.assert_awaited_once_with(
         "Identity",
-        """
-      query ListVehicleDefinitionsPerAddress($owner: Address!, $first: Int!) {
-        vehicles(filterBy: {owner: $owner}, first: $first) {
-          nodes {
-            aftermarketDevice {
-              tokenId
-              address
-            } 
-            syntheticDevice {
-              address
-              tokenId
-            }
-            definition {
-              make
-              model
-              year
-            }
-          }
-        }
-      }
-      """,
-        variables={"owner": address, "first": limit},
+        identity.VEHICLE_DEFINITIONS_PER_ADDRESS_QUERY,
+        variables={"owner": address, "first": limit, "after": None},
     )
 
 
@@ -113,21 +97,26 @@ async def test_mmy_by_owner(identity_instance):
     assert result == mock_response
     identity_instance.dimo.query.assert_awaited_once_with(
         "Identity",
-        """
-    query MMYByOwner($owner: Address!, $first: Int!) {
-      vehicles(filterBy: {owner: $owner}, first: $first) {
-        nodes {
-          definition {
-            make
-            model
-            year
-          }
-        }
-      }
-    }
-    """,
-        variables={"owner": address, "first": limit},
+        identity.MMY_BY_OWNER_QUERY,
+        variables={"owner": address, "first": limit, "after": None},
+    )
+
+
+@pytest.mark.asyncio
+async def test_dcn_and_granted_token_ids_return_responses(identity_instance):
+    """
+    Tests that dcn_by_owner and list_token_ids_granted_to_dev_by_owner await
+    the query and return its response
+    """
+    mock_response = {"dcns": {"nodes": []}}
+    identity_instance.dimo.query.return_value = mock_response
+
+    assert await identity_instance.dcn_by_owner("0xOwner", 5) == mock_response
+    granted = await identity_instance.list_token_ids_granted_to_dev_by_owner(
+        "0xDev", "0xOwner", 5
     )
+    assert granted == mock_response
+    assert identity_instance.dimo.query.await_count == 2
 
 
 @pytest.mark.asyncio
@@ -224,29 +213,106 @@ async def test_rewards_history_by_owner(identity_instance):
     assert result == mock_response
     identity_instance.dimo.query.assert_awaited_once_with(
         "Identity",
-        """
-      query GetVehicleDataByOwner($owner: Address!, $first: Int!) {
-        vehicles (filterBy: {owner: $owner}, first: $first) {
-          nodes {
-            earnings {
-              history (first: $first) {
-                edges {
-                  node {
-                    week
-                    aftermarketDeviceTokens
-                    syntheticDeviceTokens
-                    sentAt
-                    beneficiary
-                    connectionStreak
-                    streakTokens
-                  }
-                }
-              }
-              totalTokens
+        identity.REWARDS_HISTORY_BY_OWNER_QUERY,
+        variables={
+            "owner": address,
+            "first": limit,
+            "after": None,
+            "historyFirst": limit,
+        },
+    )
+
+
+def make_page(nodes, end_cursor=None):
+    return {
+        "data": {
+            "vehicles": {
+                "nodes": nodes,
+                "pageInfo": {
+                    "hasNextPage": end_cursor is not None,
+                    "endCursor": end_cursor,
+                },
             }
-          }
         }
-      }
-      """,
-        variables={"owner": address, "first": limit},
-    )
+    }
+
+
+@pytest.mark.asyncio
+async def test_iter_mmy_by_owner_follows_cursors(identity_instance):
+    """
+    Tests that pagination follows endCursor until hasNextPage is false
+    """
+    identity_instance.dimo.query.side_effect = [
+        make_page([{"tokenId": 1}, {"tokenId": 2}], "cursor-1"),
+        make_page([{"tokenId": 3}]),
+    ]
+
+    nodes = [
+        node
+        async for node in identity_instance.iter_mmy_by_owner("0xOwner", page_size=2)
+    ]
+
+    assert nodes == [{"tokenId": 1}, {"tokenId": 2}, {"tokenId": 3}]
+    calls = identity_instance.dimo.query.await_args_list
+    assert calls[0].kwargs["variables"] == {
+        "owner": "0xOwner",
+        "first": 2,
+        "after": None,
+    }
+    assert calls[1].kwargs["variables"]["after"] == "cursor-1"
+
+
+@pytest.mark.asyncio
+async def test_paginate_respects_max_items(identity_instance):
+    """
+    Tests that max_items caps both the yielded nodes and the requested pages
+    """
+    identity_instance.dimo.query.side_effect = [
+        make_page([{"tokenId": 1}, {"tokenId": 2}], "cursor-1"),
+        make_page([{"tokenId": 3}], "cursor-2"),
+    ]
+
+    nodes = [
+        node
+        async for node in identity_instance.iter_token_ids_privileges_by_owner(
+            "0xOwner", privileges_limit=5, page_size=2, max_items=3
+        )
+    ]
+
+    assert [node["tokenId"] for node in nodes] == [1, 2, 3]
+    calls = identity_instance.dimo.query.await_args_list
+    assert len(calls) == 2
+    assert calls[1].kwargs["variables"]["first"] == 1
+
+
+@pytest.mark.asyncio
+async def test_paginate_prefetches_next_page(identity_instance):
+    """
+    Tests that the next page is requested before the current one is consumed
+    """
+    identity_instance.dimo.query.side_effect = [
+        make_page([{"tokenId": 1}, {"tokenId": 2}], "cursor-1"),
+        make_page([{"tokenId": 3}]),
+    ]
+
+    pages = identity_instance.iter_dcn_by_owner("0xOwner", page_size=2)
+    await anext(pages)
+    await asyncio.sleep(0)
+
+    assert identity_instance.dimo.query.await_count == 2
+    await pages.aclose()
+
+
+@pytest.mark.asyncio
+async def test_paginate_raises_on_graphql_errors(identity_instance):
+    """
+    Tests that a page without the expected connection raises DimoGraphQLError
+    """
+    identity_instance.dimo.query.return_value = {
+        "data": None,
+        "errors": [{"message": "bad owner"}],
+    }
+
+    with pytest.raises(DimoGraphQLError, match="bad owner"):
+        async for _ in identity_instance.iter_mmy_by_owner("0xOwner"):
+            pass
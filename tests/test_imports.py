@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = (
+    "eth_account",
+    "eth_utils",
+    "graphql",
+    "numpy",
+    "pandas",
+    "pyarrow",
+    "sqlite3",
+)
+
+
+def run_probe(code):
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    ).stdout.strip()
+
+
+def test_telemetry_and_rest_clients_skip_heavy_imports():
+    """
+    Tests that signing and graphql-core only load when they are needed
+    """
+    loaded = run_probe(
+        "import sys, dimo\n"
+        "d = dimo.DIMO()\n"
+        "d.telemetry, d.identity, d.token_exchange, d.valuations, d.trips\n"
+        "d.attestation, d.device_definitions, d.auth\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    assert loaded == ""
+
+    loaded = run_probe(
+        "import sys, dimo\n"
+        "dimo.DIMO().auth.signer\n"
+        "print('eth_account' in sys.modules)"
+    )
+    assert loaded == "True"
+
+
+def test_import_skips_optional_dependencies():
+    """
+    Tests that importing the SDK loads no optional or heavy module, while using
+    the SQLite cache still does
+    """
+    loaded = run_probe(
+        "import sys, dimo\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    assert loaded == ""
+
+    loaded = run_probe(
+        "import sys\n"
+        "from dimo.response_cache import SQLiteBackend\n"
+        "SQLiteBackend(':memory:')\n"
+        "print('sqlite3' in sys.modules)"
+    )
+    assert loaded == "True"
@@ -0,0 +1,194 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from dimo import DIMO
+from dimo.hooks import Hooks
+from dimo.metrics import (
+    Histogram,
+    MetricsCollector,
+    graphql_operation,
+    rest_operation,
+)
+from dimo.retry import RetryPolicy
+
+from helpers import make_jwt
+
+
+def test_operation_names():
+    """
+    Tests that operations are named after the GraphQL operation or REST route
+    """
+    assert graphql_operation("\n query GetSignalsLatest($tokenId: Int!) {}") == (
+        "GetSignalsLatest"
+    )
+    assert graphql_operation("{ vehicles { totalCount } }") == "anonymous"
+    assert rest_operation("get", "/v2/vehicles/17/valuations") == (
+        "GET /v2/vehicles/:id/valuations"
+    )
+
+
+def test_histogram_quantiles():
+    """
+    Tests bucket counts and interpolated quantile estimates
+    """
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.quantile(0.5) == pytest.approx(0.1)
+    assert histogram.quantile(1.0) == pytest.approx(2.0)
+    assert Histogram().quantile(0.5) is None
+
+
+def test_failing_hook_does_not_propagate():
+    """
+    Tests that handler errors are swallowed and other handlers still run
+    """
+    hooks = Hooks()
+    seen = []
+
+    @hooks.on("cache_hit")
+    def broken(**fields):
+        raise RuntimeError("boom")
+
+    hooks.on("cache_hit", lambda **fields: seen.append(fields))
+    hooks.emit("cache_hit", cache="vehicle_token")
+
+    assert seen == [{"cache": "vehicle_token"}]
+    with pytest.raises(ValueError):
+        hooks.on("request_done", print)
+
+
+@pytest.mark.asyncio
+async def test_collector_records_requests_and_retries():
+    """
+    Tests latency, status, byte and retry metrics collected from DIMO.request
+    """
+    responses = [httpx.Response(503), httpx.Response(200, json={"ok": True})]
+    dimo = DIMO(
+        env="Production",
+        transport=httpx.MockTransport(lambda request: responses.pop(0)),
+        retry_policy=RetryPolicy(backoff_base=0),
+    )
+    metrics = dimo.hooks.subscribe(MetricsCollector())
+
+    await dimo.valuations.get_valuations("jwt", 1)
+
+    snapshot = metrics.snapshot()
+    operation = snapshot["operations"]["Valuations valuations.get_valuations"]
+    assert operation["latency"]["count"] == 2
+    assert operation["responses"] == {503: 1, 200: 1}
+    assert operation["retries"] == 1
+    assert operation["bytes_received"] == len(b'{"ok":true}')
+    assert snapshot["in_flight"] == {"Valuations": 0}
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_ends_in_flight():
+    """
+    Tests that a cancelled request is still reported as ended
+    """
+
+    async def handler(request):
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    dimo = DIMO(env="Production", transport=httpx.MockTransport(handler))
+    metrics = dimo.hooks.subscribe(MetricsCollector())
+
+    task = asyncio.ensure_future(dimo.request("GET", "Trips", "/v1/vehicle/1/trips"))
+    await asyncio.sleep(0.01)
+    assert metrics.snapshot()["in_flight"] == {"Trips": 1}
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert metrics.snapshot()["in_flight"] == {"Trips": 0}
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_subscribing_during_a_request():
+    """
+    Tests that a handler subscribed mid-request only sees complete requests
+    """
+    release = asyncio.Event()
+
+    async def handler(request):
+        await release.wait()
+        return httpx.Response(200, json={})
+
+    dimo = DIMO(env="Production", transport=httpx.MockTransport(handler))
+    task = asyncio.ensure_future(dimo.request("GET", "Trips", "/v1/vehicle/1/trips"))
+    await asyncio.sleep(0.01)
+    metrics = dimo.hooks.subscribe(MetricsCollector())
+    release.set()
+    assert await task == {}
+
+    snapshot = metrics.snapshot()
+    assert snapshot["in_flight"].get("Trips", 0) == 0
+    assert snapshot["operations"] == {}
+
+    await dimo.request("GET", "Trips", "/v1/vehicle/1/trips")
+    assert metrics.snapshot()["in_flight"] == {"Trips": 0}
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_closed_stream_ends_in_flight():
+    """
+    Tests that a stream closed before its end is still reported as ended
+    """
+    rows = [{"timestamp": str(index)} for index in range(100)]
+    body = {"data": {"signals": rows}}
+    dimo = DIMO(
+        env="Production",
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json=body)),
+    )
+    metrics = dimo.hooks.subscribe(MetricsCollector())
+
+    stream = dimo.telemetry.stream_query("{ signals { timestamp } }", "jwt")
+    async for row in stream:
+        break
+    await stream.aclose()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["in_flight"] == {"Telemetry": 0}
+    assert snapshot["operations"]["Telemetry anonymous"]["latency"]["count"] == 1
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_collector_records_graphql_operation_and_token_cache():
+    """
+    Tests that GraphQL calls are keyed by operation name and cache lookups counted
+    """
+    vehicle_jwt = make_jwt({"exp": time.time() + 600})
+
+    def handler(request):
+        if request.url.host == "token-exchange-api.dimo.zone":
+            return httpx.Response(200, json={"token": vehicle_jwt})
+        return httpx.Response(200, json={"data": {}})
+
+    dimo = DIMO(env="Production", transport=httpx.MockTransport(handler))
+    metrics = MetricsCollector()
+    dimo.hooks.subscribe(metrics)
+
+    for _ in range(2):
+        await dimo.token_exchange.exchange("developer_jwt", [1], 1)
+    await dimo.telemetry.get_signals_latest(vehicle_jwt, 1)
+
+    snapshot = metrics.snapshot()
+    assert "Telemetry GetSignalsLatest" in snapshot["operations"]
+    assert snapshot["cache"] == {"vehicle_token.miss": 1, "vehicle_token.hit": 1}
+    assert snapshot["token_refreshes"] == {"vehicle": 1}
+    assert len(metrics.slowest(limit=1)) == 1
+
+    dimo.hooks.unsubscribe(metrics)
+    assert not dimo.hooks
+    await dimo.aclose()
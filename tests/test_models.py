@@ -0,0 +1,102 @@
+import httpx
+import orjson
+import pytest
+
+from dimo import DIMO
+from dimo.models import Record, SignalValue, compact, decode
+
+LATEST = {
+    "data": {
+        "signalsLatest": {
+            "speed": {"timestamp": "2024-01-01T00:00:00Z", "value": 42.5},
+            "powertrainType": {"timestamp": "2024-01-01T00:00:00Z", "value": "BEV"},
+            "exteriorAirTemperature": None,
+        }
+    }
+}
+
+TRIPS = {
+    "trips": [
+        {
+            "id": "trip-1",
+            "start": {"time": "2024-01-01T08:00:00Z", "location": {"lat": 52.5}},
+            "end": {"time": "2024-01-01T09:00:00Z", "location": {"lat": 48.1}},
+            "droppedData": False,
+        }
+    ],
+    "currentPage": 1,
+    "totalPages": 1,
+}
+
+
+def test_decode_builds_compact_records():
+    """
+    Tests attribute and key access, signal values and the JSON round trip
+    """
+    latest = decode(orjson.dumps(LATEST))
+    signals = latest.data.signalsLatest
+
+    assert isinstance(signals, Record)
+    assert signals.speed == SignalValue("2024-01-01T00:00:00Z", 42.5)
+    assert signals["powertrainType"]["value"] == "BEV"
+    assert signals.exteriorAirTemperature is None
+    assert signals.get("missing", 0) == 0 and "speed" in signals
+    assert not hasattr(signals, "__dict__")
+    assert latest.to_dict() == LATEST
+
+    # Records with the same keys share one generated class
+    assert type(compact(LATEST).data) is type(latest.data)
+
+
+def test_lazy_sub_trees_decode_on_first_access():
+    """
+    Tests that lazy keys stay JSON bytes until they are read
+    """
+    page = decode(orjson.dumps(TRIPS), lazy=["end"])
+    trip = page.trips[0]
+
+    assert isinstance(page.trips, tuple)
+    assert type(trip._end) is bytes
+    assert trip.start.location.lat == 52.5
+    assert trip.end.location.lat == 48.1
+    assert isinstance(trip._end, Record)
+    assert page.to_dict() == TRIPS
+
+
+def test_keys_that_are_not_attributes_stay_dicts():
+    """
+    Tests that objects keyed by IDs or reserved names are kept as dicts
+    """
+    value = compact({"byId": {"0x1": {"a": 1}}, "x": {"get": 2}})
+
+    assert value.byId == {"0x1": compact({"a": 1})}
+    assert value.x == {"get": 2}
+    assert value.to_dict() == {"byId": {"0x1": {"a": 1}}, "x": {"get": 2}}
+
+
+@pytest.mark.asyncio
+async def test_typed_api_results():
+    """
+    Tests typed=True on Trips and Telemetry and the records result format
+    """
+    signals = [{"timestamp": "2024-01-01T00:00:00Z", "avgSpeed": 42.5}]
+
+    def handler(request):
+        if request.url.host.startswith("trips"):
+            return httpx.Response(200, json=TRIPS)
+        if b"GetSignalsLatest" in request.content:
+            return httpx.Response(200, json=LATEST)
+        return httpx.Response(200, json={"data": {"signals": signals}})
+
+    dimo = DIMO(transport=httpx.MockTransport(handler))
+
+    page = await dimo.trips.trips("jwt", 1, typed=True, lazy=["start", "end"])
+    assert page.trips[0].end.time == "2024-01-01T09:00:00Z"
+
+    latest = await dimo.telemetry.get_signals_latest("jwt", 1, typed=True)
+    assert latest.data.signalsLatest.speed.value == 42.5
+
+    rows = await dimo.telemetry.get_daily_average_speed(
+        "jwt", 1, "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z", "records"
+    )
+    assert rows[0].avgSpeed == 42.5 and rows[0].to_dict() == signals[0]
@@ -0,0 +1,132 @@
+import hashlib
+
+import httpx
+import orjson
+import pytest
+
+from dimo import DIMO
+from dimo.graphql.persisted import (
+    PERSISTED_QUERY_NOT_FOUND,
+    PersistedQueries,
+    persisted_error,
+    query_hash,
+)
+
+QUERY = "query Vehicle($tokenId: Int!) { vehicle(tokenId: $tokenId) { owner } }"
+
+
+class PersistedQueryServer:
+    # Mock GraphQL server with an APQ store; unknown hashes are answered with
+    # `not_found_status` like gqlgen (422) or Apollo (200)
+    def __init__(self, not_found_status=200, supported=True):
+        self.not_found_status = not_found_status
+        self.supported = supported
+        self.store = {}
+        self.requests = []
+
+    def __call__(self, request):
+        if request.method == "GET":
+            body = {
+                key: orjson.loads(value) for key, value in request.url.params.items()
+            }
+        else:
+            body = orjson.loads(request.content)
+        self.requests.append((request.method, body))
+
+        persisted = (body.get("extensions") or {}).get("persistedQuery")
+        query = body.get("query")
+        if persisted and not self.supported:
+            error = {"message": "PersistedQueryNotSupported"}
+            return httpx.Response(200, json={"errors": [error]})
+        if persisted:
+            if query is not None:
+                self.store[persisted["sha256Hash"]] = query
+            query = self.store.get(persisted["sha256Hash"])
+            if query is None:
+                error = {
+                    "message": PERSISTED_QUERY_NOT_FOUND,
+                    "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+                }
+                return httpx.Response(self.not_found_status, json={"errors": [error]})
+        return httpx.Response(200, json={"data": {"owner": body["variables"]}})
+
+
+def test_query_hash_and_error_detection():
+    """
+    Tests the sha256 hash and both ways servers report an unknown hash
+    """
+    assert query_hash(QUERY) == hashlib.sha256(QUERY.encode()).hexdigest()
+    by_message = {"errors": [{"message": "PersistedQueryNotFound"}]}
+    by_code = {
+        "errors": [
+            {"message": "x", "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}
+        ]
+    }
+    assert persisted_error(by_message) == PERSISTED_QUERY_NOT_FOUND
+    assert persisted_error(by_code) == PERSISTED_QUERY_NOT_FOUND
+    assert persisted_error({"errors": [{"message": "other"}]}) is None
+    assert persisted_error({"data": {}}) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("not_found_status", [200, 422])
+async def test_query_registers_hash_then_sends_hash_only(not_found_status):
+    """
+    Tests the full-text fallback on an unknown hash and hash-only calls after it
+    """
+    server = PersistedQueryServer(not_found_status)
+    dimo = DIMO(transport=httpx.MockTransport(server), persisted_queries=True)
+
+    first = await dimo.query("Identity", QUERY, variables={"tokenId": 1})
+    second = await dimo.query("Identity", QUERY, variables={"tokenId": 2})
+
+    assert first == {"data": {"owner": {"tokenId": 1}}}
+    assert second == {"data": {"owner": {"tokenId": 2}}}
+    assert [("query" in body) for _, body in server.requests] == [False, True, False]
+    assert server.store == {query_hash(QUERY): QUERY}
+    assert dimo.persisted_queries.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "unsupported": [],
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_for_queries_and_post_for_mutations():
+    """
+    Tests that hash-only queries use GET while mutations and long ones POST
+    """
+    server = PersistedQueryServer()
+    persisted = PersistedQueries(use_get=True, max_get_length=200)
+    dimo = DIMO(transport=httpx.MockTransport(server), persisted_queries=persisted)
+    mutation = "mutation Rename { rename }"
+
+    await dimo.query("Identity", QUERY, variables={"tokenId": 1})
+    await dimo.query("Identity", QUERY, variables={"tokenId": 1})
+    await dimo.query("Identity", QUERY, variables={"tokenId": "x" * 200})
+    await dimo.query("Identity", mutation)
+
+    assert [method for method, _ in server.requests] == [
+        "GET",
+        "POST",
+        "GET",
+        "POST",
+        "POST",
+        "POST",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unsupported_service_falls_back_to_full_text():
+    """
+    Tests that a service without APQ support only gets full queries afterwards
+    """
+    server = PersistedQueryServer(supported=False)
+    dimo = DIMO(transport=httpx.MockTransport(server), persisted_queries=True)
+
+    await dimo.query("Telemetry", QUERY, variables={"tokenId": 1})
+    await dimo.query("Telemetry", QUERY, variables={"tokenId": 1})
+
+    assert [("query" in body) for _, body in server.requests] == [False, True, True]
+    assert all("extensions" not in body for _, body in server.requests[1:])
+    assert dimo.persisted_queries.stats()["unsupported"] == ["Telemetry"]
@@ -0,0 +1,176 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+
+from dimo import DIMO
+from dimo.errors import DimoGraphQLError, DimoValueError
+from dimo.graphql.ranges import (
+    ChunkError,
+    count_signals,
+    parse_duration,
+    split_time_range,
+)
+from dimo.graphql.telemetry import Telemetry
+from dimo.retry import RetryPolicy
+
+QUERY = """
+query Speeds($tokenId: Int!, $startDate: Time!, $endDate: Time!) {
+    signals(tokenId: $tokenId, from: $startDate, to: $endDate, interval: "1h") {
+        timestamp
+        maxSpeed: speed(agg: MAX)
+        avgSpeed: speed(agg: AVG)
+    }
+}
+"""
+
+
+def test_parse_duration():
+    """
+    Tests Go-style interval parsing
+    """
+    assert parse_duration("24h") == timedelta(hours=24)
+    assert parse_duration("1h30m") == timedelta(minutes=90)
+    with pytest.raises(DimoValueError):
+        parse_duration("1 hour")
+
+
+def test_split_time_range_sizes_windows_by_signal_count():
+    """
+    Tests that windows hold at most max_points rows x signals and cover the range
+    """
+    assert count_signals(QUERY) == 2
+
+    windows = split_time_range(
+        "2024-01-01T00:00:00Z", "2024-01-02T01:00:00Z", "1h", 2, max_points=24
+    )
+
+    assert windows == [
+        ("2024-01-01T00:00:00Z", "2024-01-01T12:00:00Z"),
+        ("2024-01-01T12:00:00Z", "2024-01-02T00:00:00Z"),
+        ("2024-01-02T00:00:00Z", "2024-01-02T01:00:00Z"),
+    ]
+    with pytest.raises(DimoValueError):
+        split_time_range("2024-01-02T00:00:00Z", "2024-01-01T00:00:00Z", "1h")
+
+
+def make_telemetry(query):
+    dimo = AsyncMock()
+    dimo.query = query
+    dimo.retry_policy = RetryPolicy(backoff_base=0)
+    return Telemetry(dimo)
+
+
+def hourly_rows(start, end):
+    start_hour = int(start[11:13]) + 24 * (int(start[8:10]) - 1)
+    end_hour = int(end[11:13]) + 24 * (int(end[8:10]) - 1)
+    return [
+        {"timestamp": f"2024-01-{1 + hour // 24:02d}T{hour % 24:02d}:00:00Z"}
+        for hour in range(start_hour, end_hour + 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_signals_range_merges_windows_in_order():
+    """
+    Tests that windows are merged in order without duplicated boundary rows
+    """
+    in_flight = 0
+    peak = 0
+
+    async def query(service, query, token, variables):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later windows finish first
+        await asyncio.sleep(0.001 * (30 - int(variables["startDate"][11:13])))
+        in_flight -= 1
+        rows = hourly_rows(variables["startDate"], variables["endDate"])
+        return {"data": {"signals": rows}}
+
+    telemetry = make_telemetry(query)
+
+    rows = await telemetry.signals_range(
+        QUERY,
+        "jwt",
+        "2024-01-01T00:00:00Z",
+        "2024-01-01T20:00:00Z",
+        "1h",
+        variables={"tokenId": 1},
+        concurrency=2,
+        max_points=8,
+    )
+
+    assert rows == hourly_rows("2024-01-01T00:00:00Z", "2024-01-01T20:00:00Z")
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_window_retried_alone():
+    """
+    Tests that a failing window is retried without refetching the others
+    """
+    calls = []
+
+    async def query(service, query, token, variables):
+        calls.append(variables["startDate"])
+        if (
+            variables["startDate"] == "2024-01-01T04:00:00Z"
+            and calls.count(variables["startDate"]) == 1
+        ):
+            return {"errors": [{"message": "timeout"}]}
+        return {"data": {"signals": [{"timestamp": variables["startDate"]}]}}
+
+    telemetry = make_telemetry(query)
+    telemetry_args = ("2024-01-01T00:00:00Z", "2024-01-01T08:00:00Z", "1h")
+
+    rows = await telemetry.signals_range(QUERY, "jwt", *telemetry_args, max_points=8)
+
+    assert len(rows) == 2
+    assert sorted(calls) == [
+        "2024-01-01T00:00:00Z",
+        "2024-01-01T04:00:00Z",
+        "2024-01-01T04:00:00Z",
+    ]
+
+    async def failing(service, query, token, variables):
+        return {"errors": [{"message": "timeout"}]}
+
+    with pytest.raises(ChunkError):
+        await make_telemetry(failing).signals_range(
+            QUERY, "jwt", *telemetry_args, retries=0
+        )
+
+
+@pytest.mark.asyncio
+async def test_windows_are_not_retried_twice():
+    """
+    Tests that failed requests are only retried by the client's RetryPolicy and
+    errors raised before sending are not retried at all
+    """
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    dimo = DIMO(
+        transport=httpx.MockTransport(handler),
+        retry_policy=RetryPolicy(backoff_base=0),
+    )
+    telemetry_args = ("2024-01-01T00:00:00Z", "2024-01-01T04:00:00Z", "1h")
+
+    with pytest.raises(ChunkError):
+        await dimo.telemetry.signals_range(QUERY, "jwt", *telemetry_args)
+    assert len(calls) == 3
+
+    async def invalid(service, query, token, variables):
+        invalid.calls += 1
+        raise DimoGraphQLError("Invalid Telemetry query")
+
+    invalid.calls = 0
+    with pytest.raises(ChunkError):
+        await make_telemetry(invalid).signals_range(QUERY, "jwt", *telemetry_args)
+    assert invalid.calls == 1
@@ -0,0 +1,114 @@
+import httpx
+import pytest
+
+from dimo import DIMO
+from dimo.errors import DimoValueError
+from dimo.ratelimit import ServiceRateLimiter, TokenBucket
+from dimo.retry import RetryPolicy
+
+from helpers import FakeClock
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_burst_then_waits(monkeypatch):
+    """
+    Tests that the bucket serves its burst immediately and then paces callers
+    """
+    clock = FakeClock(0.0)
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr("dimo.ratelimit.asyncio.sleep", fake_sleep)
+    bucket = TokenBucket(rate=10, burst=2, clock=clock)
+
+    await bucket.acquire()
+    await bucket.acquire()
+    assert sleeps == []
+
+    await bucket.acquire()
+    assert sleeps == [pytest.approx(0.1)]
+
+
+def test_token_bucket_invalid_rate():
+    """
+    Tests that a non-positive rate is rejected
+    """
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+@pytest.mark.asyncio
+async def test_service_limiter_only_throttles_configured_services(monkeypatch):
+    """
+    Tests that requests wait on their own service's bucket and others run freely
+    """
+    clock = FakeClock(0.0)
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr("dimo.ratelimit.asyncio.sleep", fake_sleep)
+    limiter = ServiceRateLimiter({"Telemetry": (5, 1)}, clock=clock)
+
+    await limiter.acquire("Telemetry")
+    await limiter.acquire("Identity")
+    await limiter.acquire("Identity")
+    assert sleeps == []
+
+    await limiter.acquire("Telemetry")
+    assert sleeps == [pytest.approx(0.2)]
+
+
+def test_service_limiter_adapts_to_429_and_recovers():
+    """
+    Tests that a 429 halves the service rate and successes restore it
+    """
+    limiter = ServiceRateLimiter({"Identity": 10}, recover=0.25, clock=FakeClock(0.0))
+    throttled = httpx.HTTPStatusError(
+        "429",
+        request=httpx.Request("POST", "https://identity-api.dimo.zone/query"),
+        response=httpx.Response(429),
+    )
+
+    limiter.observe("Identity", throttled)
+    assert limiter.rate("Identity") == 5
+    limiter.observe("Identity", throttled)
+    assert limiter.rate("Identity") == 2.5
+
+    for _ in range(4):
+        limiter.observe("Identity")
+    assert limiter.rate("Identity") == 10
+
+
+def test_service_limiter_rejects_unknown_service():
+    """
+    Tests that limits must name a DIMO service
+    """
+    with pytest.raises(DimoValueError):
+        ServiceRateLimiter({"Telemetri": 10})
+
+
+@pytest.mark.asyncio
+async def test_dimo_request_feeds_rate_limiter():
+    """
+    Tests that DIMO.request acquires capacity and reports 429s to the limiter
+    """
+    responses = [httpx.Response(429), httpx.Response(200, json={"ok": True})]
+    transport = httpx.MockTransport(lambda request: responses.pop(0))
+    dimo = DIMO(
+        env="Production",
+        transport=transport,
+        retry_policy=RetryPolicy(backoff_base=0),
+        rate_limits={"Valuations": 1000},
+    )
+
+    result = await dimo.valuations.get_valuations("jwt", 1)
+
+    assert result == {"ok": True}
+    assert dimo.rate_limiter.rate("Valuations") == pytest.approx(550)
+    await dimo.aclose()
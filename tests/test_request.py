@@ -0,0 +1,170 @@
+import asyncio
+
+import httpx
+import pytest
+
+from dimo import DIMO
+from dimo.metrics import MetricsCollector
+from dimo.request import ClientPool
+
+
+def make_transport(calls):
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_client_reused_across_requests():
+    """
+    Tests that repeated requests to the same service share one pooled client
+    """
+    calls = []
+    dimo = DIMO(env="Production", transport=make_transport(calls))
+
+    first = dimo._pool.get(dimo.urls["Trips"])
+    await dimo.request("GET", "Trips", "/v1/vehicle/1/trips")
+    await dimo.request("GET", "Trips", "/v1/vehicle/2/trips")
+
+    assert len(calls) == 2
+    assert dimo._pool.get(dimo.urls["Trips"]) is first
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_per_service_host():
+    """
+    Tests that different service hosts get separate clients
+    """
+    pool = ClientPool()
+    trips = pool.get("https://trips-api.dimo.zone/v1/vehicle/1/trips")
+    valuations = pool.get("https://valuations-api.dimo.zone/v2/vehicles/1/offers")
+
+    assert trips is not valuations
+    assert pool.get("https://trips-api.dimo.zone/other") is trips
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_graphql_query_uses_pool():
+    """
+    Tests that Identity/Telemetry queries go through the shared pool
+    """
+    calls = []
+    dimo = DIMO(env="Production", transport=make_transport(calls))
+
+    result = await dimo.identity.count_dimo_vehicles()
+
+    assert result == {"ok": True}
+    assert calls[0].url == "https://identity-api.dimo.zone/query"
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_context_manager_closes_clients():
+    """
+    Tests that leaving the async context closes all pooled clients
+    """
+    calls = []
+    async with DIMO(env="Production", transport=make_transport(calls)) as dimo:
+        await dimo.request("GET", "Trips", "/v1/vehicle/1/trips")
+        client = dimo._pool.get(dimo.urls["Trips"])
+
+    assert client.is_closed
+    assert dimo._pool._clients == {}
+
+
+def test_clients_from_a_previous_loop_are_closed():
+    """
+    Tests that reusing the client from a new event loop closes the old clients
+    """
+    calls = []
+    dimo = DIMO(env="Production", transport=make_transport(calls))
+
+    async def fetch():
+        await dimo.request("GET", "Trips", "/v1/vehicle/1/trips")
+        return dimo._pool.get(dimo.urls["Trips"])
+
+    first = asyncio.run(fetch())
+
+    async def fetch_again():
+        client = await fetch()
+        await dimo._pool._closing
+        return client
+
+    second = asyncio.run(fetch_again())
+
+    assert first is not second
+    assert first.is_closed and not second.is_closed
+    assert dimo._pool._stale == []
+    asyncio.run(dimo.aclose())
+
+
+def make_slow_transport(calls):
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"path": request.url.path})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_share_one_request():
+    """
+    Tests that identical in-flight reads are coalesced per path, token and query
+    """
+    calls = []
+    dimo = DIMO(
+        env="Production",
+        transport=make_slow_transport(calls),
+        coalesce_requests=True,
+    )
+    metrics = dimo.hooks.subscribe(MetricsCollector())
+    headers = {"Authorization": "Bearer vehicle"}
+
+    results = await asyncio.gather(
+        *[dimo.request("GET", "Trips", "/v1/1", headers=headers) for _ in range(5)],
+        dimo.request("GET", "Trips", "/v1/2", headers=headers),
+        dimo.request("GET", "Trips", "/v1/1", headers={"Authorization": "Bearer b"}),
+        *[dimo.query("Identity", "{ vehicles { totalCount } }") for _ in range(3)],
+    )
+
+    assert len(calls) == 4
+    assert results[0] is results[4]
+    assert results[5] == {"path": "/v1/2"}
+    assert metrics.cache[("inflight", "hit")] == 6
+
+
+@pytest.mark.asyncio
+async def test_writes_and_opted_out_reads_are_not_coalesced():
+    """
+    Tests that mutations, POSTs and reads without coalesce_requests always send
+    """
+    calls = []
+    dimo = DIMO(
+        env="Production",
+        transport=make_slow_transport(calls),
+        coalesce_requests=True,
+    )
+    await asyncio.gather(
+        *[dimo.query("Identity", "mutation { doThing }") for _ in range(2)],
+        *[dimo.request("POST", "Trips", "/v1/1") for _ in range(2)],
+    )
+    assert len(calls) == 4
+
+    calls.clear()
+    dimo = DIMO(env="Production", transport=make_slow_transport(calls))
+    await asyncio.gather(
+        *[dimo.request("GET", "Trips", "/v1/1") for _ in range(3)],
+        *[dimo.query("Identity", "{ vehicles { totalCount } }") for _ in range(2)],
+    )
+    assert len(calls) == 5
+
+    calls.clear()
+    await asyncio.gather(
+        *[dimo.request("GET", "Trips", "/v1/1", coalesce=True) for _ in range(3)]
+    )
+    assert len(calls) == 1
@@ -0,0 +1,171 @@
+import asyncio
+
+import httpx
+import pytest
+
+from dimo import DIMO
+from dimo.response_cache import (
+    RedisBackend,
+    ResponseCache,
+    SQLiteBackend,
+    response_key,
+)
+
+from helpers import FakeClock
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def scan_iter(self, match):
+        for key in list(self.data):
+            if key.startswith(match.rstrip("*")):
+                yield key
+
+
+def make_dimo(calls, cache, body=None):
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json=body or {"n": len(calls)})
+
+    return DIMO(
+        env="Production",
+        transport=httpx.MockTransport(handler),
+        response_cache=cache,
+    )
+
+
+@pytest.mark.asyncio
+async def test_cached_operation_served_from_cache():
+    """
+    Tests that read-mostly operations are fetched once and others every time
+    """
+    calls = []
+    dimo = make_dimo(calls, True)
+
+    first = await dimo.valuations.get_valuations("jwt", 1)
+    second = await dimo.valuations.get_valuations("jwt", 1)
+    await dimo.valuations.list_vehicle_offers("jwt", 1)
+    await dimo.valuations.list_vehicle_offers("jwt", 1)
+
+    assert first == second == {"n": 1}
+    assert len(calls) == 3
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_key_includes_params_and_token():
+    """
+    Tests that different variables or tokens do not share entries
+    """
+    base = {"headers": {"Authorization": "Bearer a"}, "data": {"variables": {"x": 1}}}
+
+    assert response_key("Identity", "", base) == response_key("Identity", "", base)
+    assert response_key("Identity", "", base) != response_key(
+        "Identity", "", {**base, "data": {"variables": {"x": 2}}}
+    )
+    assert response_key("Identity", "", base) != response_key(
+        "Identity", "", {**base, "headers": {"Authorization": "Bearer b"}}
+    )
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_revalidating():
+    """
+    Tests that an expired entry is returned immediately and refreshed in the background
+    """
+    clock = FakeClock()
+    calls = []
+    cache = ResponseCache(ttls={"MMYByTokenID": 60}, stale_ttl=60, clock=clock)
+    dimo = make_dimo(calls, cache)
+
+    assert await dimo.identity.mmy_by_token_id(1) == {"n": 1}
+    clock.now += 90
+    assert await dimo.identity.mmy_by_token_id(1) == {"n": 1}
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert len(calls) == 2
+
+    assert await dimo.identity.mmy_by_token_id(1) == {"n": 2}
+    clock.now += 500
+    assert await dimo.identity.mmy_by_token_id(1) == {"n": 3}
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_graphql_errors_not_cached():
+    """
+    Tests that responses with GraphQL errors are refetched
+    """
+    calls = []
+    dimo = make_dimo(calls, True, body={"errors": [{"message": "boom"}]})
+
+    await dimo.identity.mmy_by_token_id(1)
+    await dimo.identity.mmy_by_token_id(1)
+
+    assert len(calls) == 2
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_persists_and_evicts(tmp_path):
+    """
+    Tests that the SQLite backend survives reopening and honours expiry
+    """
+    clock = FakeClock()
+    path = str(tmp_path / "responses.db")
+    backend = SQLiteBackend(path, clock=clock)
+    await backend.set("key", {"a": [1, 2]}, fresh_until=1010, stale_until=1020)
+    backend.close()
+
+    reopened = SQLiteBackend(path, clock=clock)
+    assert await reopened.get("key") == ({"a": [1, 2]}, 1010)
+    clock.now = 1030
+    assert await reopened.get("key") is None
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_hits_batch_access_times(tmp_path):
+    """
+    Tests that cache hits do not write until a batch of access times is pending
+    """
+    clock = FakeClock()
+    backend = SQLiteBackend(str(tmp_path / "responses.db"), clock=clock, touch_batch=3)
+    await backend.set("key", {"a": 1}, fresh_until=1010, stale_until=1020)
+    changes = backend._conn.total_changes
+
+    clock.now = 1005
+    for _ in range(2):
+        assert await backend.get("key") == ({"a": 1}, 1010)
+    assert backend._conn.total_changes == changes
+
+    await backend.get("key")
+    assert backend._conn.total_changes == changes + 1
+    (accessed,) = backend._conn.execute("SELECT accessed FROM responses").fetchone()
+    assert accessed == 1005
+    backend.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_round_trip():
+    """
+    Tests the Redis-compatible backend against an in-memory client
+    """
+    redis = FakeRedis()
+    backend = RedisBackend(redis, clock=FakeClock())
+
+    await backend.set("key", {"a": 1}, fresh_until=1010, stale_until=1020)
+    assert await backend.get("key") == ({"a": 1}, 1010)
+    await backend.clear()
+    assert redis.data == {}
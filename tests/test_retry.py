@@ -0,0 +1,136 @@
+import httpx
+import pytest
+
+from dimo import DIMO
+from dimo.retry import RetryPolicy, parse_retry_after
+
+
+def make_dimo(responses, calls, **policy):
+    def handler(request):
+        calls.append(request)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    policy.setdefault("backoff_base", 0)
+    return DIMO(
+        env="Production",
+        transport=httpx.MockTransport(handler),
+        retry_policy=RetryPolicy(**policy),
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_retried_on_503():
+    """
+    Tests that idempotent requests are retried on transient status codes
+    """
+    calls = []
+    dimo = make_dimo(
+        [httpx.Response(503), httpx.Response(200, json={"ok": True})], calls
+    )
+
+    result = await dimo.valuations.get_valuations("jwt", 1)
+
+    assert result == {"ok": True}
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_post_not_retried_on_503():
+    """
+    Tests that create_vin_vc is not repeated after the server may have acted
+    """
+    calls = []
+    dimo = make_dimo([httpx.Response(503), httpx.Response(200)], calls)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await dimo.attestation.create_vin_vc("jwt", 1)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_post_retried_when_not_processed():
+    """
+    Tests that 429 and connection failures are safe to retry for any request
+    """
+    calls = []
+    dimo = make_dimo(
+        [
+            httpx.Response(429),
+            httpx.ConnectError("refused"),
+            httpx.Response(200, json={"message": "ok"}),
+        ],
+        calls,
+    )
+
+    result = await dimo.attestation.create_vin_vc("jwt", 1)
+
+    assert result == {"message": "ok"}
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_gives_up_after_max_attempts():
+    """
+    Tests that the last error is raised once attempts are exhausted
+    """
+    calls = []
+    dimo = make_dimo([httpx.Response(502)] * 3, calls, max_attempts=3)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await dimo.trips.trips("jwt", 1)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_graphql_mutation_not_retried():
+    """
+    Tests that GraphQL queries retry but mutations do not
+    """
+    calls = []
+    dimo = make_dimo(
+        [httpx.Response(502), httpx.Response(200, json={}), httpx.Response(502)],
+        calls,
+    )
+
+    await dimo.query("Identity", "query { vehicles { totalCount } }")
+    with pytest.raises(httpx.HTTPStatusError):
+        await dimo.query("Identity", "mutation { doThing }")
+    assert len(calls) == 3
+
+
+def test_delay_honours_retry_after():
+    """
+    Tests that Retry-After takes precedence over backoff and is capped
+    """
+    policy = RetryPolicy(max_retry_after=10)
+    request = httpx.Request("GET", "https://trips-api.dimo.zone")
+
+    def error(headers):
+        response = httpx.Response(429, headers=headers, request=request)
+        return httpx.HTTPStatusError("429", request=request, response=response)
+
+    assert policy.delay(error({"Retry-After": "3"}), 0) == 3
+    assert policy.delay(error({"Retry-After": "120"}), 0) == 10
+
+
+def test_backoff_is_capped_and_jittered():
+    """
+    Tests exponential growth, the cap, and full jitter
+    """
+    policy = RetryPolicy(backoff_base=1, backoff_cap=5, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(4)] == [1, 2, 4, 5]
+
+    jittered = RetryPolicy(backoff_base=1, random=lambda: 0.5)
+    assert jittered.backoff(2) == 2
+
+
+def test_parse_retry_after_http_date():
+    """
+    Tests parsing of HTTP-date Retry-After values
+    """
+    assert parse_retry_after("Thu, 01 Jan 1970 00:00:30 GMT", now=0) == 30
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
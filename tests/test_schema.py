@@ -0,0 +1,163 @@
+import httpx
+import orjson
+import pytest
+from graphql import build_schema, graphql_sync
+
+from dimo import DIMO
+from dimo.errors import DimoGraphQLError
+from dimo.graphql.schema import (
+    INTROSPECTION_QUERY,
+    SCHEMA_FORMAT_VERSION,
+    SchemaCache,
+    minify_query,
+)
+
+from helpers import FakeClock
+
+SCHEMA = build_schema("""
+    type Vehicle {
+        tokenId: Int!
+        owner: String
+    }
+
+    type SignalAggregations {
+        timestamp: String!
+        speed: Float
+        powertrainRange: Float
+    }
+
+    type Query {
+        vehicle(tokenId: Int!): Vehicle
+        signals(tokenId: Int!): [SignalAggregations!]
+    }
+    """)
+INTROSPECTION = graphql_sync(SCHEMA, INTROSPECTION_QUERY).data
+
+QUERY = """
+    # owner of one vehicle
+    query Owner($tokenId: Int!) {
+        vehicle(tokenId: $tokenId) {
+            owner
+        }
+    }
+"""
+
+
+class SchemaServer:
+    # Answers introspection with SCHEMA and records every other query text
+    def __init__(self):
+        self.introspections = 0
+        self.queries = []
+
+    def __call__(self, request):
+        query = orjson.loads(request.content)["query"]
+        if "__schema" in query:
+            self.introspections += 1
+            return httpx.Response(200, json={"data": INTROSPECTION})
+        self.queries.append(query)
+        return httpx.Response(200, json={"data": {"vehicle": None}})
+
+
+def test_minify_query():
+    """
+    Tests that comments and insignificant whitespace are removed
+    """
+    assert minify_query(QUERY) == (
+        "query Owner($tokenId:Int!){vehicle(tokenId:$tokenId){owner}}"
+    )
+
+
+@pytest.mark.asyncio
+async def test_invalid_queries_fail_before_sending():
+    """
+    Tests local syntax and schema errors and one introspection per service
+    """
+    server = SchemaServer()
+    dimo = DIMO(transport=httpx.MockTransport(server), schema_cache=True)
+
+    with pytest.raises(DimoGraphQLError) as error:
+        await dimo.query("Identity", "{ vehicle(tokenId: 1) { color } }")
+    assert "color" in error.value.message
+    with pytest.raises(DimoGraphQLError):
+        await dimo.query("Identity", "{ vehicle(")
+
+    await dimo.query("Identity", QUERY, variables={"tokenId": 1})
+    await dimo.query("Identity", QUERY, variables={"tokenId": 2})
+
+    assert server.introspections == 1
+    assert server.queries == [minify_query(QUERY)] * 2
+
+
+@pytest.mark.asyncio
+async def test_schema_is_persisted_with_version_stamp(tmp_path):
+    """
+    Tests that a second process reuses the file until it is stale or outdated
+    """
+    clock = FakeClock()
+    server = SchemaServer()
+    transport = httpx.MockTransport(server)
+
+    first = DIMO(transport=transport, schema_cache=SchemaCache(tmp_path, clock=clock))
+    await first.query("Identity", QUERY, variables={"tokenId": 1})
+    stamp = orjson.loads((tmp_path / "Identity.schema.json").read_bytes())
+    assert stamp["version"] == SCHEMA_FORMAT_VERSION
+    assert stamp["url"] == first.urls["Identity"]
+
+    second = DIMO(transport=transport, schema_cache=SchemaCache(tmp_path, clock=clock))
+    await second.query("Identity", QUERY, variables={"tokenId": 1})
+    assert server.introspections == 1
+
+    clock.now += 2 * 86400
+    third = DIMO(transport=transport, schema_cache=SchemaCache(tmp_path, clock=clock))
+    await third.query("Identity", QUERY, variables={"tokenId": 1})
+    assert server.introspections == 2
+
+    stamp["version"] = SCHEMA_FORMAT_VERSION + 1
+    (tmp_path / "Identity.schema.json").write_bytes(orjson.dumps(stamp))
+    fourth = DIMO(transport=transport, schema_cache=SchemaCache(tmp_path, clock=clock))
+    await fourth.query("Identity", QUERY, variables={"tokenId": 1})
+    assert server.introspections == 3
+
+
+@pytest.mark.asyncio
+async def test_unavailable_schema_sends_queries_unchecked():
+    """
+    Tests that a server without introspection still receives the queries
+    """
+    clock = FakeClock()
+    requests = []
+
+    def handler(request):
+        query = orjson.loads(request.content)["query"]
+        requests.append(query)
+        if "__schema" in query:
+            return httpx.Response(200, json={"errors": [{"message": "disabled"}]})
+        return httpx.Response(200, json={"data": {}})
+
+    dimo = DIMO(
+        transport=httpx.MockTransport(handler),
+        schema_cache=SchemaCache(retry_after=60, clock=clock),
+    )
+    await dimo.query("Identity", "{ anything }")
+    await dimo.query("Identity", "{ anything }")
+    clock.now += 61
+    await dimo.query("Identity", "{ anything }")
+
+    introspections = [query for query in requests if "__schema" in query]
+    assert len(introspections) == 2
+    assert requests.count("{ anything }") == 3
+
+
+@pytest.mark.asyncio
+async def test_signal_names_come_from_the_schema():
+    """
+    Tests that Telemetry.signal_names reads the cached schema
+    """
+    server = SchemaServer()
+    dimo = DIMO(transport=httpx.MockTransport(server), schema_cache=True)
+
+    names = await dimo.telemetry.signal_names("vehicle_jwt")
+
+    assert names == {"speed", "powertrainRange"}
+    assert server.introspections == 1
+    assert server.queries == []
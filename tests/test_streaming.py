@@ -0,0 +1,109 @@
+import httpx
+import orjson
+import pytest
+
+from dimo import DIMO
+from dimo.errors import DimoGraphQLError, DimoValueError
+from dimo.retry import RetryPolicy
+from dimo.streaming import JsonStreamParser
+
+DOCUMENT = orjson.dumps(
+    {
+        "errors": [{"message": "partial", "path": ["x"]}],
+        "data": {
+            "other": [1, 2, {"signals": ["decoy"]}],
+            "signals": [
+                {"timestamp": "2024-01-01T00:00:00Z", "speed": 1.5},
+                {"timestamp": "2024-01-02T00:00:00Z", "note": 'quote " [and] {brace}'},
+                {"timestamp": "2024-01-03T00:00:00Z", "nested": [[1], {"a": []}]},
+            ],
+        },
+    }
+)
+
+
+def feed_in_chunks(parser, document, size):
+    items = []
+    for start in range(0, len(document), size):
+        items.extend(parser.feed(document[start : start + size]))
+    parser.close()
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 100000])
+def test_parser_yields_items_across_chunk_boundaries(size):
+    """
+    Tests that elements and captured keys decode the same for any chunking
+    """
+    parser = JsonStreamParser(("data", "signals"), capture=("errors",))
+
+    items = feed_in_chunks(parser, DOCUMENT, size)
+
+    assert items == orjson.loads(DOCUMENT)["data"]["signals"]
+    assert parser.captured == {"errors": [{"message": "partial", "path": ["x"]}]}
+
+
+def test_parser_keeps_buffer_small():
+    """
+    Tests that consumed elements are dropped from the buffer
+    """
+    parser = JsonStreamParser(("data", "signals"))
+    parser.feed(b'{"data": {"signals": [')
+    for index in range(1000):
+        parser.feed(orjson.dumps({"value": index}) + b",")
+    assert len(parser._buffer) < 64
+
+
+def test_parser_top_level_array_and_truncation():
+    """
+    Tests an empty path for top-level arrays and errors on truncated bodies
+    """
+    assert feed_in_chunks(JsonStreamParser(()), b"[1, 2, 3]", 2) == [1, 2, 3]
+    assert feed_in_chunks(JsonStreamParser(()), b"[ ]", 1) == []
+
+    parser = JsonStreamParser(("data", "signals"))
+    parser.feed(b'{"data": {"signals": [1, 2')
+    with pytest.raises(DimoValueError):
+        parser.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_query_yields_nodes_and_raises_errors():
+    """
+    Tests streaming through DIMO with GraphQL errors raised after the data
+    """
+    dimo = DIMO(
+        env="Production",
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, content=DOCUMENT)
+        ),
+    )
+    received = []
+
+    with pytest.raises(DimoGraphQLError):
+        async for item in dimo.telemetry.stream_query("query { signals }", "jwt"):
+            received.append(item)
+
+    assert len(received) == 3
+    await dimo.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stream_retries_before_first_item():
+    """
+    Tests that a transient status is retried when nothing was yielded yet
+    """
+    responses = [
+        httpx.Response(503),
+        httpx.Response(200, json={"data": {"vehicles": {"nodes": [{"tokenId": 1}]}}}),
+    ]
+    dimo = DIMO(
+        env="Production",
+        transport=httpx.MockTransport(lambda request: responses.pop(0)),
+        retry_policy=RetryPolicy(backoff_base=0),
+    )
+
+    nodes = [node async for node in dimo.identity.stream_query("{ vehicles }")]
+
+    assert nodes == [{"tokenId": 1}]
+    await dimo.aclose()
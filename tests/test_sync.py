@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import orjson
+import pytest
+
+from dimo import fleet
+from dimo.sync import DIMO, LoopThread
+
+
+def make_transport(calls):
+    def handler(request):
+        calls.append(threading.current_thread().name)
+        if request.url.path.endswith("/404/valuations"):
+            return httpx.Response(404, json={"message": "missing"})
+        if request.url.host.startswith("token-exchange"):
+            token_id = orjson.loads(request.content)["tokenId"]
+            return httpx.Response(200, json={"token": f"jwt-{token_id}"})
+        if request.url.host.startswith("telemetry"):
+            signals = [
+                {"timestamp": "2024-01-01T00:00:00Z", "speed": float(i)}
+                for i in range(3)
+            ]
+            return httpx.Response(200, json={"data": {"signals": signals}})
+        return httpx.Response(200, json={"path": request.url.path})
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def runner():
+    runner = LoopThread()
+    yield runner
+    runner.stop()
+
+
+def test_blocking_calls_from_many_threads_share_one_loop_and_pool(runner):
+    """
+    Tests that threads get results from one background loop and one pool
+    """
+    calls = []
+    dimo = DIMO(transport=make_transport(calls), runner=runner)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(
+                lambda token_id: dimo.valuations.get_valuations("jwt", token_id),
+                range(20),
+            )
+        )
+
+    assert results[7] == {"path": "/v2/vehicles/7/valuations"}
+    assert set(calls) == {"dimo-sync-loop"}
+    assert len(dimo.async_client._pool._clients) == 1
+    with pytest.raises(httpx.HTTPStatusError):
+        dimo.valuations.get_valuations("jwt", 404)
+    dimo.close()
+
+
+def test_streams_become_iterators(runner):
+    """
+    Tests that async generators are exposed as plain iterators
+    """
+    dimo = DIMO(transport=make_transport([]), runner=runner)
+
+    rows = list(dimo.telemetry.stream_query("{ signals { speed } }", "jwt"))
+    results = dimo.iterate(
+        fleet.map_vehicles(
+            dimo.async_client, "dev", [1, 2], lambda jwt, token_id: _echo(jwt)
+        )
+    )
+
+    assert [row["speed"] for row in rows] == [0.0, 1.0, 2.0]
+    assert sorted(result.result for result in results) == ["jwt-1", "jwt-2"]
+    dimo.close()
+
+
+async def _echo(value):
+    return value
+
+
+def test_calls_from_the_loop_thread_are_refused(runner):
+    """
+    Tests that a blocking call from inside the loop fails instead of deadlocking
+    """
+    dimo = DIMO(transport=make_transport([]), runner=runner)
+
+    async def nested():
+        return dimo.valuations.get_valuations("jwt", 1)
+
+    with pytest.raises(RuntimeError):
+        dimo.run(nested())
+    dimo.close()
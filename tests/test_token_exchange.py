@@ -1,6 +1,13 @@
+import asyncio
+import base64
+
+import httpx
+import orjson
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+from dimo import DIMO
 from dimo.api.token_exchange import TokenExchange
+from dimo.ratelimit import TokenBucket
 
 
 @pytest.fixture
@@ -54,3 +61,140 @@ async def test_exchange(token_exchange, mock_request_method, mock_get_auth_heade
     )
     mock_get_auth_headers.assert_called_once_with(developer_jwt)
     assert response == mock_response
+
+
+def make_vehicle_jwt(exp):
+    payload = base64.urlsafe_b64encode(orjson.dumps({"exp": exp})).rstrip(b"=")
+    return f"header.{payload.decode()}.signature"
+
+
+@pytest.mark.asyncio
+async def test_exchange_cached(token_exchange, mock_request_method):
+    """Vehicle JWTs are reused for the same developer, token and privileges."""
+    mock_request_method.return_value = {"token": make_vehicle_jwt(4102444800)}
+
+    first = await token_exchange.exchange("dev_jwt", [4, 1], 7)
+    second = await token_exchange.exchange("dev_jwt", [1, 4], 7)
+    await token_exchange.exchange("dev_jwt", [1, 4], 8)
+
+    assert first is second
+    assert mock_request_method.await_count == 2
+    assert token_exchange.cache.hits == 1
+    assert token_exchange.cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_exchange_expired_token_not_reused(token_exchange, mock_request_method):
+    """Tokens past their exp claim are fetched again."""
+    mock_request_method.return_value = {"token": make_vehicle_jwt(1)}
+
+    await token_exchange.exchange("dev_jwt", [1], 7)
+    await token_exchange.exchange("dev_jwt", [1], 7)
+
+    assert mock_request_method.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_exchange_bypass_cache(token_exchange, mock_request_method):
+    """use_cache=False always performs the exchange."""
+    mock_request_method.return_value = {"token": make_vehicle_jwt(4102444800)}
+
+    await token_exchange.exchange("dev_jwt", [1], 7)
+    await token_exchange.exchange("dev_jwt", [1], 7, use_cache=False)
+
+    assert mock_request_method.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_exchange_cache_hits_skip_the_limiter(token_exchange, mock_request_method):
+    """Only exchanges that miss the cache take a limiter token."""
+    mock_request_method.return_value = {"token": make_vehicle_jwt(4102444800)}
+    limiter = TokenBucket(0.001, burst=1)
+
+    await token_exchange.exchange("dev_jwt", [1], 7, limiter=limiter)
+    for _ in range(5):
+        await asyncio.wait_for(
+            token_exchange.exchange("dev_jwt", [1], 7, limiter=limiter), 1
+        )
+
+    assert mock_request_method.await_count == 1
+    assert token_exchange.cache.hits == 5
+
+
+@pytest.mark.asyncio
+async def test_exchange_single_flight(token_exchange, mock_request_method):
+    """Concurrent exchanges for the same key share one request."""
+    release = asyncio.Event()
+
+    async def respond(*args, **kwargs):
+        await release.wait()
+        return {"token": make_vehicle_jwt(4102444800)}
+
+    mock_request_method.side_effect = respond
+    waiters = [
+        asyncio.ensure_future(token_exchange.exchange("dev_jwt", [1], 7))
+        for _ in range(10)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert all(result is results[0] for result in results)
+    assert mock_request_method.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_exchange_many_bounded_concurrency(token_exchange, mock_request_method):
+    """exchange_many never exceeds the concurrency limit and yields every token."""
+    in_flight = 0
+    peak = 0
+
+    async def respond(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return {"token": make_vehicle_jwt(4102444800)}
+
+    mock_request_method.side_effect = respond
+    results = [
+        result
+        async for result in token_exchange.exchange_many(
+            "dev_jwt", range(1, 51), [1], concurrency=5
+        )
+    ]
+
+    assert sorted(result.token_id for result in results) == list(range(1, 51))
+    assert all(result.error is None for result in results)
+    assert peak <= 5
+
+
+@pytest.mark.asyncio
+async def test_exchange_many_reports_errors():
+    """A failing token is reported without aborting the batch; transient errors retry once per attempt."""
+    calls = {}
+
+    def handler(request):
+        token_id = orjson.loads(request.content)["tokenId"]
+        calls[token_id] = calls.get(token_id, 0) + 1
+        if token_id == 2:
+            return httpx.Response(403)
+        if token_id == 4 or (token_id == 3 and calls[token_id] == 1):
+            return httpx.Response(503)
+        return httpx.Response(200, json={"token": make_vehicle_jwt(4102444800)})
+
+    dimo = DIMO(transport=httpx.MockTransport(handler))
+    results = {
+        result.token_id: result
+        async for result in dimo.token_exchange.exchange_many(
+            "dev_jwt", [1, 2, 3, 4], [1], retries=2, backoff=0
+        )
+    }
+
+    assert results[1].error is None
+    assert isinstance(results[2].error, httpx.HTTPStatusError)
+    assert results[3].error is None
+    assert isinstance(results[4].error, httpx.HTTPStatusError)
+    # One retry layer: retries=2 means at most three requests per token
+    assert calls == {1: 1, 2: 1, 3: 2, 4: 3}
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from dimo import DIMO
+from dimo.errors import DimoValueError
+from dimo.tokens import (
+    DeveloperTokenManager,
+    decode_jwt_claims,
+    jwt_expiry,
+    token_identity,
+)
+
+from helpers import FakeClock, make_jwt
+
+
+def test_decode_jwt_claims():
+    """
+    Tests decoding of the JWT payload and its expiry
+    """
+    token = make_jwt({"sub": "dev", "exp": 1234})
+    assert decode_jwt_claims(token) == {"sub": "dev", "exp": 1234}
+    assert jwt_expiry(token) == 1234.0
+    assert jwt_expiry("not-a-jwt") is None
+    with pytest.raises(DimoValueError):
+        decode_jwt_claims("not-a-jwt")
+
+
+def test_token_identity_ignores_only_time_claims():
+    """
+    Tests that re-issued tokens share an identity and other claims separate them
+    """
+    claims = {"sub": "0xvehicles", "tokenId": 7, "privilege_ids": [1, 4]}
+    token = make_jwt({**claims, "exp": 1000, "iat": 1, "jti": "a"})
+    reissued = make_jwt({**claims, "exp": 2000, "iat": 2, "jti": "b"})
+    narrower = make_jwt({**claims, "privilege_ids": [1], "exp": 1000})
+
+    assert token_identity(token) == token_identity(reissued)
+    assert token_identity(token) != token_identity(narrower)
+    assert token_identity("opaque-a") != token_identity("opaque-b")
+
+
+@pytest.mark.asyncio
+async def test_developer_token_cached_until_refresh_margin():
+    """
+    Tests that a cached developer JWT is reused while fresh
+    """
+    clock = FakeClock()
+    response = {"access_token": make_jwt({"exp": 2000})}
+    fetch = AsyncMock(return_value=response)
+    manager = DeveloperTokenManager(fetch, refresh_margin=60, clock=clock)
+
+    first = await manager.get("client", "domain", "key")
+    clock.now = 1900
+    second = await manager.get("client", "domain", "key")
+
+    assert first is second is response
+    fetch.assert_awaited_once_with(
+        client_id="client",
+        domain="domain",
+        private_key="key",
+        address="client",
+        scope="openid email",
+        response_type="code",
+    )
+
+
+@pytest.mark.asyncio
+async def test_developer_token_background_refresh():
+    """
+    Tests that a token inside the refresh margin is served while refreshing
+    """
+    clock = FakeClock()
+    old = {"access_token": make_jwt({"exp": 2000})}
+    new = {"access_token": make_jwt({"exp": 5000})}
+    fetch = AsyncMock(side_effect=[old, new])
+    manager = DeveloperTokenManager(fetch, refresh_margin=60, clock=clock)
+
+    await manager.get("client", "domain", "key")
+    clock.now = 1970
+    assert await manager.get("client", "domain", "key") is old
+
+    await asyncio.sleep(0)
+    assert await manager.get("client", "domain", "key") is new
+    assert fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_developer_token_expired_blocks_on_refresh():
+    """
+    Tests that an expired token is never returned
+    """
+    clock = FakeClock()
+    old = {"access_token": make_jwt({"exp": 2000})}
+    new = {"access_token": make_jwt({"exp": 5000})}
+    fetch = AsyncMock(side_effect=[old, new])
+    manager = DeveloperTokenManager(fetch, refresh_margin=60, clock=clock)
+
+    await manager.get("client", "domain", "key")
+    clock.now = 2001
+    assert await manager.get("client", "domain", "key") is new
+
+
+@pytest.mark.asyncio
+async def test_developer_token_single_flight():
+    """
+    Tests that concurrent callers share one token request
+    """
+    release = asyncio.Event()
+    response = {"access_token": make_jwt({"exp": 2000})}
+
+    async def fetch(**kwargs):
+        await release.wait()
+        return response
+
+    fetch_mock = AsyncMock(side_effect=fetch)
+    manager = DeveloperTokenManager(fetch_mock, clock=FakeClock())
+
+    waiters = [
+        asyncio.ensure_future(manager.get("client", "domain", "key")) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert all(result is response for result in results)
+    assert fetch_mock.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_auth_get_cached_token():
+    """
+    Tests that Auth.get_cached_token goes through the token manager
+    """
+    dimo = DIMO(env="Production")
+    response = {"access_token": make_jwt({"exp": 4102444800})}
+    dimo.auth.get_token = AsyncMock(return_value=response)
+
+    first = await dimo.auth.get_cached_token("client", "domain", "key")
+    second = await dimo.auth.get_cached_token("client", "domain", "key")
+
+    assert first is second is response
+    dimo.auth.get_token.assert_awaited_once()
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from dimo.api.device_definitions import DeviceDefinitions
+from dimo.vin_cache import VinDecodeCache, vin_pattern
+
+
+def make_device_definitions(cache, side_effect=None):
+    request = AsyncMock(side_effect=side_effect)
+    headers = MagicMock(return_value={"Authorization": "Bearer test_token"})
+    return DeviceDefinitions(request, headers, vin_cache=cache), request
+
+
+def test_vin_pattern_drops_check_digit_and_serial():
+    """
+    Tests that the pattern keeps WMI, VDS and model year only
+    """
+    assert vin_pattern("1HGCM82633A123456") == "1HGCM8263"
+    assert vin_pattern("1HGCM82693A654321") == "1HGCM8263"
+    assert vin_pattern("SHORTVIN") is None
+
+
+@pytest.mark.asyncio
+async def test_decode_vin_cached_on_disk(tmp_path):
+    """
+    Tests that decodes survive reopening the cache file
+    """
+    path = str(tmp_path / "vins.db")
+    cache = VinDecodeCache(path)
+    device_definitions, request = make_device_definitions(cache)
+    request.return_value = {"deviceDefinitionId": "honda_accord_2003"}
+
+    await device_definitions.decode_vin("jwt", "USA", "1HGCM82633A123456")
+    cache.close()
+
+    reopened = VinDecodeCache(path)
+    device_definitions, request = make_device_definitions(reopened)
+    response = await device_definitions.decode_vin("jwt", "USA", "1hgcm82633a123456")
+
+    assert response == {"deviceDefinitionId": "honda_accord_2003"}
+    request.assert_not_called()
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_decode_vins_only_sends_misses(tmp_path):
+    """
+    Tests that VINs sharing a pattern are decoded once and errors are reported
+    """
+    cache = VinDecodeCache(str(tmp_path / "vins.db"))
+
+    async def decode(*args, data, **kwargs):
+        await asyncio.sleep(0)
+        if data["vin"] == "BAD":
+            raise ValueError("invalid vin")
+        return {"deviceDefinitionId": data["vin"][:3]}
+
+    device_definitions, request = make_device_definitions(cache, decode)
+    vins = ["1HGCM82633A123456", "1HGCM82693A654321", "WVWZZZ1JZXW000001", "BAD"]
+
+    results = {
+        result.vin: result
+        async for result in device_definitions.decode_vins(
+            "jwt", "USA", vins, concurrency=2
+        )
+    }
+
+    assert results["1HGCM82693A654321"].response == {"deviceDefinitionId": "1HG"}
+    assert isinstance(results["BAD"].error, ValueError)
+    assert request.await_count == 3
+    cache.close()